@@ -18,14 +18,19 @@ try:
     import json
 except ImportError:
     import simplejson as json
+import contextlib
 import logging
 import os
+import select
+import threading
+import time
 
 import httplib2
 
 from neutronclient.common import exceptions
 from neutronclient.common import utils
 from neutronclient.openstack.common.gettextutils import _
+from neutronclient.openstack.common import timeutils
 
 _logger = logging.getLogger(__name__)
 
@@ -34,6 +39,24 @@ _logger = logging.getLogger(__name__)
 # See: https://code.google.com/p/httplib2/issues/detail?id=124
 httplib2.RETRIES = 1
 
+# Maximum number of idle keep-alive connections kept per host
+DEFAULT_POOL_MAXSIZE = 10
+# Seconds an idle keep-alive connection is kept before being closed
+DEFAULT_POOL_IDLE_TIMEOUT = 60
+# Tokens are renewed this many seconds before they expire
+DEFAULT_TOKEN_REFRESH_SKEW = 60
+# Seconds an open circuit breaker fails requests before letting one through
+DEFAULT_BREAKER_RESET_TIMEOUT = 30
+# Consecutive failures after which one of several endpoints is skipped
+DEFAULT_ENDPOINT_BREAKER_THRESHOLD = 3
+# How requests are spread over several endpoints
+ROUND_ROBIN = 'round-robin'
+LEAST_OUTSTANDING = 'least-outstanding'
+# Requests which are sent again to another endpoint when one fails
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE')
+# Responses after which idempotent requests are sent to another endpoint
+FAILOVER_STATUS_CODES = (502, 503, 504)
+
 if os.environ.get('NEUTRONCLIENT_DEBUG'):
     ch = logging.StreamHandler()
     _logger.setLevel(logging.DEBUG)
@@ -59,13 +82,7 @@ class ServiceCatalog(object):
             pass
         return token
 
-    def url_for(self, attr=None, filter_value=None,
-                service_type='network', endpoint_type='publicURL'):
-        """Fetch the URL from the Neutron service for
-        a particular endpoint type. If none given, return
-        publicURL.
-        """
-
+    def _matching_endpoints(self, attr, filter_value, service_type):
         catalog = self.catalog['access'].get('serviceCatalog', [])
         matching_endpoints = []
         for service in catalog:
@@ -79,7 +96,17 @@ class ServiceCatalog(object):
 
         if not matching_endpoints:
             raise exceptions.EndpointNotFound()
-        elif len(matching_endpoints) > 1:
+        return matching_endpoints
+
+    def url_for(self, attr=None, filter_value=None,
+                service_type='network', endpoint_type='publicURL'):
+        """Fetch the URL from the Neutron service for
+        a particular endpoint type. If none given, return
+        publicURL.
+        """
+        matching_endpoints = self._matching_endpoints(attr, filter_value,
+                                                      service_type)
+        if len(matching_endpoints) > 1:
             raise exceptions.AmbiguousEndpoints(message=matching_endpoints)
         else:
             if endpoint_type not in matching_endpoints[0]:
@@ -87,6 +114,192 @@ class ServiceCatalog(object):
 
             return matching_endpoints[0][endpoint_type]
 
+    def urls_for(self, attr=None, filter_value=None,
+                 service_type='network', endpoint_type='publicURL'):
+        """Fetch the URLs of every matching endpoint of the service."""
+        matching_endpoints = self._matching_endpoints(attr, filter_value,
+                                                      service_type)
+        for endpoint in matching_endpoints:
+            if endpoint_type not in endpoint:
+                raise exceptions.EndpointTypeNotFound(message=endpoint_type)
+        return [endpoint[endpoint_type] for endpoint in matching_endpoints]
+
+
+class ConnectionPool(object):
+    """Bounded pool of idle keep-alive connections, keyed by host.
+
+    Connections are handed out most recently used first. A connection
+    which has been idle for longer than idle_timeout, or whose socket
+    became readable while idle (the peer closed it or the descriptor
+    was reused underneath us), is closed instead of being reused.
+    """
+
+    def __init__(self, maxsize=DEFAULT_POOL_MAXSIZE,
+                 idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT):
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return an idle connection for key or None if there is none."""
+        while True:
+            with self._lock:
+                conns = self._idle.get(key)
+                if not conns:
+                    return None
+                conn, last_used = conns.pop()
+            if (time.time() - last_used > self.idle_timeout or
+                    not self._is_usable(conn)):
+                self.discard(conn)
+                continue
+            return conn
+
+    def put(self, key, conn):
+        """Return a connection to the pool, closing it if the pool is full."""
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < self.maxsize:
+                conns.append((conn, time.time()))
+                return
+        self.discard(conn)
+
+    def discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def clear(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn, _last_used in conns:
+                self.discard(conn)
+
+    def _is_usable(self, conn):
+        sock = getattr(conn, 'sock', None)
+        if sock is None:
+            # httplib2 (re)connects sockets which are not open yet
+            return True
+        try:
+            readable = select.select([sock], [], [], 0)[0]
+        except Exception:
+            return False
+        # An idle keep-alive socket has nothing to read. If it has, the
+        # server closed it or the data does not belong to us.
+        return not readable
+
+
+class CircuitBreaker(object):
+    """Fails the requests to an endpoint which keeps failing at once.
+
+    The breaker is closed while requests succeed. After threshold
+    consecutive connection failures or 5xx responses of idempotent
+    requests it opens, and requests are refused without being sent.
+    After reset_timeout seconds it is half open: one request is let
+    through, which closes the breaker if it succeeds and opens it again
+    if it fails.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, threshold, reset_timeout=DEFAULT_BREAKER_RESET_TIMEOUT):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.failed_at = None
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.time() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def remaining(self):
+        """Seconds until the breaker lets a request through."""
+        with self._lock:
+            if self._opened_at is None:
+                return 0
+            return max(0, self._opened_at + self.reset_timeout - time.time())
+
+    def admits(self):
+        """Return whether allow() would let a request through now."""
+        with self._lock:
+            state = self._state()
+            return (state == self.CLOSED or
+                    (state == self.HALF_OPEN and not self._probing))
+
+    def allow(self):
+        """Return whether a request may be sent, and count it if so."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self, count=True):
+        """Record a failed request.
+
+        Without count, as for a failed POST, the failure only settles the
+        probe of a half-open breaker, opening it again.
+        """
+        with self._lock:
+            if not count:
+                if self._probing:
+                    self._probing = False
+                    self.failed_at = self._opened_at = time.time()
+                return
+            self.failures += 1
+            self.failed_at = time.time()
+            self._probing = False
+            if (self._opened_at is not None or
+                    self.failures >= self.threshold):
+                self._opened_at = time.time()
+
+
+class RequestTiming(object):
+    """What HTTPClient measured of a request, given to its timing hooks.
+
+    Times are in seconds from the start of the request. connect_time is
+    0 when a kept-alive connection was reused, ttfb is the time until the
+    response headers were read, and status is None when no response was
+    received.
+    """
+
+    def __init__(self, method, url, bytes_out=0):
+        self.method = method
+        self.url = url
+        self.path = utils.path_template(url)
+        self.status = None
+        self.bytes_out = bytes_out
+        self.bytes_in = 0
+        self.connect_time = 0.0
+        self.ttfb = None
+        self.total_time = None
+        self.start = time.time()
+
 
 class HTTPClient(httplib2.Http):
     """Handles the REST calls and responses, include authn."""
@@ -99,7 +312,18 @@ class HTTPClient(httplib2.Http):
                  endpoint_url=None, insecure=False,
                  endpoint_type='publicURL',
                  auth_strategy='keystone', ca_cert=None, log_credentials=False,
+                 keepalive=False, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 pool_idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT,
+                 token_cache=None,
+                 token_refresh_skew=DEFAULT_TOKEN_REFRESH_SKEW,
+                 breaker_threshold=None,
+                 breaker_reset_timeout=DEFAULT_BREAKER_RESET_TIMEOUT,
+                 endpoint_urls=None, multiple_endpoints=False,
+                 endpoint_selection=ROUND_ROBIN, timing_hooks=None,
                  **kwargs):
+        # httplib2 keeps its open connections in self.connections, which
+        # is made per thread so that threads never share a socket.
+        self._local = threading.local()
         super(HTTPClient, self).__init__(timeout=timeout, ca_certs=ca_cert)
 
         self.username = username
@@ -110,15 +334,53 @@ class HTTPClient(httplib2.Http):
         self.endpoint_type = endpoint_type
         self.region_name = region_name
         self.auth_token = token
+        self.auth_token_expires = None
+        self.token_refresh_skew = token_refresh_skew
+        self._auth_lock = threading.Lock()
         self.auth_tenant_id = None
         self.auth_user_id = None
         self.content_type = 'application/json'
+        self.endpoint_urls = list(endpoint_urls or []) or None
+        self.multiple_endpoints = multiple_endpoints
+        self.endpoint_selection = endpoint_selection
+        if self.endpoint_urls and not endpoint_url:
+            endpoint_url = self.endpoint_urls[0]
         self.endpoint_url = endpoint_url
+        self._next_endpoint = 0
+        self._outstanding = {}
+        self._endpoints_lock = threading.Lock()
         self.auth_strategy = auth_strategy
         self.log_credentials = log_credentials
+        self.token_cache = token_cache
+        if keepalive:
+            self.connection_pool = ConnectionPool(
+                maxsize=pool_maxsize, idle_timeout=pool_idle_timeout)
+        else:
+            self.connection_pool = None
+        if breaker_threshold is None and (endpoint_urls or
+                                          multiple_endpoints):
+            # Unhealthy endpoints are those whose breaker is open
+            breaker_threshold = DEFAULT_ENDPOINT_BREAKER_THRESHOLD
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset_timeout = breaker_reset_timeout
+        self.circuit_breakers = {}
+        self._breakers_lock = threading.Lock()
+        self.timing_hooks = list(timing_hooks or [])
         # httplib2 overrides
         self.disable_ssl_certificate_validation = insecure
 
+    @property
+    def connections(self):
+        try:
+            return self._local.connections
+        except AttributeError:
+            self._local.connections = {}
+            return self._local.connections
+
+    @connections.setter
+    def connections(self, value):
+        self._local.connections = value
+
     def _cs_request(self, *args, **kwargs):
         kargs = {}
         kargs.setdefault('headers', kwargs.get('headers', {}))
@@ -142,8 +404,22 @@ class HTTPClient(httplib2.Http):
             log_kargs = self._strip_credentials(kargs)
 
         utils.http_log_req(_logger, args, log_kargs)
+        breaker = self.get_circuit_breaker(args[0])
+        if (breaker is not None and not kwargs.get('ignore_breaker') and
+                not breaker.allow()):
+            raise exceptions.CircuitOpen(endpoint=self._endpoint_key(args[0]),
+                                         seconds=breaker.remaining())
+        idempotent = args[1] in IDEMPOTENT_METHODS
+        self._checkout_connection(args[0])
+        timing = None
+        if self.timing_hooks:
+            timing = RequestTiming(args[1], args[0],
+                                   len(kargs.get('body') or ''))
+            self._local.timing = timing
+        reusable = False
         try:
             resp, body = self.request(*args, **kargs)
+            reusable = True
         except httplib2.SSLHandshakeError as e:
             raise exceptions.SslCertificateValidationError(reason=e)
         except Exception as e:
@@ -153,16 +429,126 @@ class HTTPClient(httplib2.Http):
             _logger.debug("throwing ConnectionFailed : %s", e)
             raise exceptions.ConnectionFailed(reason=e)
         finally:
-            # Temporary Fix for gate failures. RPC calls and HTTP requests
-            # seem to be stepping on each other resulting in bogus fd's being
-            # picked up for making http requests
-            self.connections.clear()
+            self._release_connections(reusable)
+            if breaker is not None and not reusable:
+                breaker.record_failure(count=idempotent)
+            if timing is not None:
+                self._local.timing = None
+                if reusable:
+                    timing.status = self.get_status_code(resp)
+                    timing.bytes_in = len(body or '')
+                self._report_timing(timing)
         utils.http_log_resp(_logger, resp, body)
         status_code = self.get_status_code(resp)
+        if breaker is not None:
+            if status_code >= 500:
+                # A failed POST tells more of the request than of the
+                # endpoint, it does not make the endpoint unhealthy
+                breaker.record_failure(count=idempotent)
+            else:
+                breaker.record_success()
         if status_code == 401:
             raise exceptions.Unauthorized(message=body)
         return resp, body
 
+    def _report_timing(self, timing):
+        timing.total_time = time.time() - timing.start
+        for hook in self.timing_hooks:
+            try:
+                hook(timing)
+            except Exception:
+                _logger.exception(_('Request timing hook failed'))
+
+    def _conn_request(self, conn, request_uri, method, body, headers):
+        timing = getattr(self._local, 'timing', None)
+        if timing is None:
+            return super(HTTPClient, self)._conn_request(
+                conn, request_uri, method, body, headers)
+
+        # Time the calls httplib2 makes on the connection
+        connect = conn.connect
+        getresponse = conn.getresponse
+
+        def timed_connect(*args, **kwargs):
+            start = time.time()
+            try:
+                return connect(*args, **kwargs)
+            finally:
+                timing.connect_time += time.time() - start
+
+        def timed_getresponse(*args, **kwargs):
+            response = getresponse(*args, **kwargs)
+            timing.ttfb = time.time() - timing.start
+            return response
+
+        conn.connect = timed_connect
+        conn.getresponse = timed_getresponse
+        try:
+            return super(HTTPClient, self)._conn_request(
+                conn, request_uri, method, body, headers)
+        finally:
+            del conn.connect
+            del conn.getresponse
+
+    @staticmethod
+    def _endpoint_key(url):
+        """Return the 'scheme:host:port' key of url, None if it is relative.
+
+        httplib2 keys its connections the same way.
+        """
+        try:
+            scheme, authority = httplib2.urlnorm(url)[:2]
+        except httplib2.RelativeURIError:
+            return None
+        return scheme + ':' + authority
+
+    def get_circuit_breaker(self, url):
+        """Return the CircuitBreaker of the endpoint of url.
+
+        Returns None when circuit breakers are disabled, which they are
+        unless breaker_threshold is set.
+        """
+        key = self._endpoint_key(url)
+        if self.breaker_threshold is None or key is None:
+            return None
+        with self._breakers_lock:
+            breaker = self.circuit_breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(self.breaker_threshold,
+                                         self.breaker_reset_timeout)
+                self.circuit_breakers[key] = breaker
+            return breaker
+
+    def _checkout_connection(self, url):
+        if self.connection_pool is None:
+            return
+        conn_key = self._endpoint_key(url)
+        if conn_key is None:
+            return
+        conn = self.connection_pool.get(conn_key)
+        if conn is not None:
+            self.connections[conn_key] = conn
+
+    def _release_connections(self, reusable):
+        if self.connection_pool is None:
+            # Temporary Fix for gate failures. RPC calls and HTTP requests
+            # seem to be stepping on each other resulting in bogus fd's being
+            # picked up for making http requests
+            self.connections.clear()
+            return
+        connections, self.connections = self.connections, {}
+        for conn_key, conn in connections.items():
+            if reusable:
+                self.connection_pool.put(conn_key, conn)
+            else:
+                # The connection may be left half way through a request
+                self.connection_pool.discard(conn)
+
+    def close_connections(self):
+        """Close the idle keep-alive connections of this client."""
+        if self.connection_pool is not None:
+            self.connection_pool.clear()
+
     def _strip_credentials(self, kwargs):
         if kwargs.get('body') and self.password:
             log_kwargs = kwargs.copy()
@@ -172,29 +558,111 @@ class HTTPClient(httplib2.Http):
         else:
             return kwargs
 
+    def _token_expiring(self):
+        return (self.token_refresh_skew is not None and
+                self.auth_token_expires is not None and
+                timeutils.is_soon(self.auth_token_expires,
+                                  self.token_refresh_skew))
+
+    def _refresh_token(self, stale_token):
+        """Authenticate unless another thread replaced stale_token already.
+
+        Only one thread authenticates at a time, the others wait for it
+        and use the token it fetched.
+        """
+        with self._auth_lock:
+            if self.auth_token == stale_token:
+                self.authenticate()
+
     def authenticate_and_fetch_endpoint_url(self):
-        if not self.auth_token:
-            self.authenticate()
+        if not self.auth_token or self._token_expiring():
+            self._refresh_token(self.auth_token)
         elif not self.endpoint_url:
             self.endpoint_url = self._get_endpoint_url()
 
+    def _ordered_endpoints(self):
+        """Return the endpoints to try in order, and whether they are down.
+
+        The order follows endpoint_selection, without the endpoints whose
+        circuit breaker refuses requests, open or already probing. When
+        every breaker refuses them, the endpoint which failed least
+        recently is returned, to be tried anyway.
+        """
+        with self._endpoints_lock:
+            start = self._next_endpoint % len(self.endpoint_urls)
+            self._next_endpoint = start + 1
+            endpoints = self.endpoint_urls[start:] + self.endpoint_urls[:start]
+            if self.endpoint_selection == LEAST_OUTSTANDING:
+                # Stable, so ties are broken round-robin
+                endpoints.sort(key=lambda e: self._outstanding.get(e, 0))
+
+        breakers = dict((e, self.get_circuit_breaker(e)) for e in endpoints)
+        healthy = [e for e in endpoints
+                   if breakers[e] is None or breakers[e].admits()]
+        if healthy:
+            return healthy, False
+        return [min(endpoints, key=lambda e: breakers[e].failed_at)], True
+
+    @contextlib.contextmanager
+    def _outstanding_request(self, endpoint):
+        with self._endpoints_lock:
+            self._outstanding[endpoint] = self._outstanding.get(endpoint,
+                                                                0) + 1
+        try:
+            yield
+        finally:
+            with self._endpoints_lock:
+                self._outstanding[endpoint] -= 1
+
     def do_request(self, url, method, **kwargs):
         self.authenticate_and_fetch_endpoint_url()
+        if not self.endpoint_urls or len(self.endpoint_urls) == 1:
+            return self._do_endpoint_request(self.endpoint_url, url, method,
+                                             **kwargs)
+        endpoints, down = self._ordered_endpoints()
+        idempotent = method in IDEMPOTENT_METHODS
+        if down:
+            # Rather than failing while every endpoint is down
+            kwargs['ignore_breaker'] = True
+        for i, endpoint in enumerate(endpoints):
+            last = i == len(endpoints) - 1
+            try:
+                with self._outstanding_request(endpoint):
+                    resp, body = self._do_endpoint_request(endpoint, url,
+                                                           method, **kwargs)
+            except exceptions.CircuitOpen:
+                # Nothing was sent, any request can go to another endpoint
+                if last:
+                    raise
+                _logger.debug("Trying another endpoint than %s", endpoint)
+                continue
+            except exceptions.ConnectionFailed:
+                if last or not idempotent:
+                    raise
+                _logger.debug("Trying another endpoint than %s", endpoint)
+                continue
+            if (last or not idempotent or
+                    self.get_status_code(resp) not in FAILOVER_STATUS_CODES):
+                return resp, body
+            _logger.debug("Trying another endpoint than %s", endpoint)
+
+    def _do_endpoint_request(self, endpoint_url, url, method, **kwargs):
         # Perform the request once. If we get a 401 back then it
         # might be because the auth token expired, so try to
         # re-authenticate and try again. If it still fails, bail.
+        token = self.auth_token
         try:
             kwargs.setdefault('headers', {})
-            kwargs['headers']['X-Auth-Token'] = self.auth_token
-            resp, body = self._cs_request(self.endpoint_url + url, method,
+            kwargs['headers']['X-Auth-Token'] = token
+            resp, body = self._cs_request(endpoint_url + url, method,
                                           **kwargs)
             return resp, body
         except exceptions.Unauthorized:
-            self.authenticate()
+            self._refresh_token(token)
             kwargs.setdefault('headers', {})
             kwargs['headers']['X-Auth-Token'] = self.auth_token
             resp, body = self._cs_request(
-                self.endpoint_url + url, method, **kwargs)
+                endpoint_url + url, method, **kwargs)
             return resp, body
 
     def _extract_service_catalog(self, body):
@@ -207,12 +675,53 @@ class HTTPClient(httplib2.Http):
             self.auth_user_id = sc.get('user_id')
         except KeyError:
             raise exceptions.Unauthorized()
-        if not self.endpoint_url:
+        self.auth_token_expires = self._parse_expires(sc['expires'])
+        if self.multiple_endpoints and not self.endpoint_urls:
+            self.endpoint_urls = self.service_catalog.urls_for(
+                attr='region', filter_value=self.region_name,
+                endpoint_type=self.endpoint_type)
+            self.endpoint_url = self.endpoint_url or self.endpoint_urls[0]
+        elif not self.endpoint_url:
             self.endpoint_url = self.service_catalog.url_for(
                 attr='region', filter_value=self.region_name,
                 endpoint_type=self.endpoint_type)
 
+    def _token_cache_key(self):
+        return self.token_cache.make_key(
+            self.auth_url, self.username, self.tenant_id or self.tenant_name,
+            self.region_name)
+
+    def _parse_expires(self, expires):
+        try:
+            expires = timeutils.parse_isotime(expires)
+        except ValueError:
+            return None
+        if (self.token_refresh_skew is not None and
+                timeutils.is_soon(expires, self.token_refresh_skew)):
+            # A brand new token which already looks expiring means our
+            # clock is off; renewing it early would renew it on every
+            # request, so rely on the server refusing it instead.
+            _logger.debug("Token expiring at %s is too short lived to be "
+                          "renewed before it expires", expires)
+            return None
+        return expires
+
     def authenticate(self):
+        if self.token_cache is None or self.auth_strategy != 'keystone':
+            self._authenticate()
+            return
+        key = self._token_cache_key()
+        with self.token_cache.lock(key):
+            catalog = self.token_cache.get(key)
+            # The token we hold may be the cached one which was refused
+            if (catalog is not None and
+                    catalog['access']['token']['id'] != self.auth_token):
+                self._extract_service_catalog(catalog)
+                return
+            self._authenticate()
+            self.token_cache.put(key, self.service_catalog.catalog)
+
+    def _authenticate(self):
         if self.auth_strategy != 'keystone':
             raise exceptions.Unauthorized(message=_('Unknown auth strategy'))
         if self.tenant_id:
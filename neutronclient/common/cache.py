@@ -0,0 +1,103 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""A cache of the responses of GET requests."""
+
+import copy
+import itertools
+import threading
+import time
+
+# Responses a ResponseCache keeps, the least recently used are dropped
+DEFAULT_RESPONSE_CACHE_SIZE = 256
+
+
+class ResponseCache(object):
+    """The responses of GET requests of some collections, kept a while.
+
+    ttls maps the collections to cache, such as 'extensions', to the
+    seconds their responses are kept. At most maxsize responses are
+    kept, the least recently used are dropped first.
+
+    A write to a collection drops its responses. Only that collection is
+    invalidated: a write with side effects on other collections, such as
+    adding a router interface, leaves their responses until they expire.
+    """
+
+    def __init__(self, ttls=None, maxsize=DEFAULT_RESPONSE_CACHE_SIZE):
+        self.ttls = dict(ttls or {})
+        self.maxsize = maxsize
+        # (response, expiry, last use) by (collection, key)
+        self._responses = {}
+        self._uses = itertools.count()
+        # Writes to each collection, so that a response fetched before a
+        # write is not kept after it
+        self._generations = dict.fromkeys(self.ttls, 0)
+        self._lock = threading.Lock()
+
+    def caches(self, collection):
+        return collection in self.ttls
+
+    def generation(self, collection):
+        with self._lock:
+            return self._generations[collection]
+
+    def get(self, collection, key):
+        """Return a copy of the response kept for key, or None."""
+        with self._lock:
+            entry = self._responses.get((collection, key))
+            if entry is None:
+                return None
+            response, expires, _used = entry
+            if expires <= time.time():
+                del self._responses[(collection, key)]
+                return None
+            self._responses[(collection, key)] = (response, expires,
+                                                  next(self._uses))
+        return copy.deepcopy(response)
+
+    def put(self, collection, key, response, generation):
+        """Keep a copy of response for key.
+
+        It is not kept if the collection was written since generation
+        was read, before the request was sent.
+        """
+        response = copy.deepcopy(response)
+        with self._lock:
+            if self._generations[collection] != generation:
+                return
+            self._responses[(collection, key)] = (
+                response, time.time() + self.ttls[collection],
+                next(self._uses))
+            if len(self._responses) > self.maxsize:
+                least_used = min(self._responses,
+                                 key=lambda k: self._responses[k][2])
+                del self._responses[least_used]
+
+    def invalidate(self, collection=None):
+        """Drop the responses of a collection, or of all collections."""
+        if collection is not None and not self.caches(collection):
+            return
+        with self._lock:
+            if collection is None:
+                self._responses.clear()
+                for collection in self._generations:
+                    self._generations[collection] += 1
+                return
+            self._generations[collection] += 1
+            for key in [key for key in self._responses
+                        if key[0] == collection]:
+                del self._responses[key]
@@ -18,6 +18,7 @@
 """
 
 import logging
+import threading
 
 from neutronclient import client
 from neutronclient.neutron import client as neutron_client
@@ -33,11 +34,13 @@ class ClientCache(object):
     def __init__(self, factory):
         self.factory = factory
         self._handle = None
+        self._lock = threading.Lock()
 
     def __get__(self, instance, owner):
         # Tell the ClientManager to login to keystone
-        if self._handle is None:
-            self._handle = self.factory(instance)
+        with self._lock:
+            if self._handle is None:
+                self._handle = self.factory(instance)
         return self._handle
 
 
@@ -60,6 +63,12 @@ class ClientManager(object):
                  insecure=False,
                  ca_cert=None,
                  log_credentials=False,
+                 token_cache=None,
+                 resolution_cache=None,
+                 trust_uuids=False,
+                 list_workers=1,
+                 timing_hooks=None,
+                 keepalive=False,
                  ):
         self._token = token
         self._url = url
@@ -76,6 +85,12 @@ class ClientManager(object):
         self._insecure = insecure
         self._ca_cert = ca_cert
         self._log_credentials = log_credentials
+        self._token_cache = token_cache
+        self._resolution_cache = resolution_cache
+        self._trust_uuids = trust_uuids
+        self._list_workers = list_workers
+        self._timing_hooks = timing_hooks
+        self._keepalive = keepalive
         return
 
     def initialize(self):
@@ -90,7 +105,9 @@ class ClientManager(object):
                 endpoint_type=self._endpoint_type,
                 insecure=self._insecure,
                 ca_cert=self._ca_cert,
-                log_credentials=self._log_credentials)
+                log_credentials=self._log_credentials,
+                token_cache=self._token_cache,
+                timing_hooks=self._timing_hooks)
             httpclient.authenticate()
             # Populate other password flow attributes
             self._token = httpclient.auth_token
@@ -146,6 +146,18 @@ class ConnectionFailed(NeutronClientException):
     message = _("Connection to neutron failed: %(reason)s")
 
 
+class CircuitOpen(ConnectionFailed):
+    """Raised instead of sending a request to an endpoint which is down."""
+    message = _("Connection to neutron failed: %(endpoint)s failed "
+                "repeatedly, not retried for %(seconds)d seconds")
+
+
+class RateLimited(NeutronClientException):
+    """Raised instead of exceeding the rate allowed by a RateLimiter."""
+    message = _("Too many %(method)s requests, the next one is allowed in "
+                "%(seconds).1f seconds")
+
+
 class BadInputError(Exception):
     """Error resulting from a client sending bad input to a server."""
     pass
@@ -164,7 +176,7 @@ class Invalid(Error):
     pass
 
 
-class InvalidContentType(Invalid):
+class InvalidContentType(NeutronException, Invalid):
     message = _("Invalid content type %(content_type)s.")
 
 
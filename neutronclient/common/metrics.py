@@ -0,0 +1,196 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Counters and latency histograms of the requests of a client.
+
+A RequestMetrics is a timing hook of HTTPClient::
+
+    collector = metrics.RequestMetrics()
+    neutron = client.Client(..., timing_hooks=[collector])
+
+The requests are counted by resource collection, HTTP method and status
+class, and can be exported as Prometheus text or pushed to StatsD.
+"""
+
+import bisect
+import random
+import re
+import socket
+import threading
+
+from neutronclient.v2_0 import client as v2_client
+
+# Upper bounds of the latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+# Durations kept per key between two StatsD pushes, the others are sampled
+DEFAULT_STATSD_SAMPLES = 1000
+# Collection of the requests which match no path of the client
+OTHER_COLLECTION = 'other'
+# UDP payload StatsD lines are batched up to
+STATSD_PACKET_SIZE = 512
+
+
+def _label(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace(
+        '\n', r'\n')
+
+
+def _bound(bound):
+    return bound == float('inf') and '+Inf' or repr(bound)
+
+
+class _Stats(object):
+    """The requests of one key."""
+
+    def __init__(self, buckets):
+        self.count = 0
+        self.sum = 0.0
+        self.buckets = [0] * (len(buckets) + 1)
+        # Requests and durations not pushed to StatsD yet
+        self.pending_count = 0
+        self.pending = []
+
+
+class RequestMetrics(object):
+    """Collects the requests of HTTPClient, given as a timing hook."""
+
+    def __init__(self, client_class=v2_client.Client,
+                 buckets=DEFAULT_BUCKETS,
+                 statsd_samples=DEFAULT_STATSD_SAMPLES):
+        self.client_class = client_class
+        self.bucket_bounds = tuple(sorted(buckets))
+        self.statsd_samples = statsd_samples
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def collection(self, path):
+        """Return the collection of client_class a request path belongs to."""
+        return self.client_class.collection(path) or OTHER_COLLECTION
+
+    @staticmethod
+    def status_class(status):
+        return status and '%dxx' % (status // 100) or 'error'
+
+    def __call__(self, timing):
+        key = (self.collection(timing.path), timing.method,
+               self.status_class(timing.status))
+        duration = timing.total_time
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _Stats(self.bucket_bounds)
+            stats.count += 1
+            stats.sum += duration
+            stats.buckets[bisect.bisect_left(self.bucket_bounds,
+                                             duration)] += 1
+            stats.pending_count += 1
+            if len(stats.pending) < self.statsd_samples:
+                stats.pending.append(duration)
+            else:
+                # Keep a uniform sample of the durations
+                index = random.randint(0, stats.pending_count - 1)
+                if index < self.statsd_samples:
+                    stats.pending[index] = duration
+
+    def snapshot(self):
+        """Return the count, sum and cumulative buckets of each key.
+
+        The keys are (collection, method, status class) tuples.
+        """
+        with self._lock:
+            snapshot = {}
+            for key, stats in self._stats.items():
+                cumulative = []
+                total = 0
+                for count in stats.buckets:
+                    total += count
+                    cumulative.append(total)
+                snapshot[key] = (stats.count, stats.sum, cumulative)
+            return snapshot
+
+    def prometheus_text(self, prefix='neutronclient'):
+        """Return the metrics in the Prometheus text exposition format."""
+        snapshot = sorted(self.snapshot().items())
+        bounds = self.bucket_bounds + (float('inf'),)
+        lines = ['# HELP %s_requests_total Requests sent by the client.' %
+                 prefix,
+                 '# TYPE %s_requests_total counter' % prefix]
+        labels = dict((key, 'collection="%s",method="%s",status="%s"' %
+                       tuple(_label(part) for part in key))
+                      for key, stats in snapshot)
+        for key, (count, total, cumulative) in snapshot:
+            lines.append('%s_requests_total{%s} %d' %
+                         (prefix, labels[key], count))
+        lines += ['# HELP %s_request_duration_seconds Duration of the '
+                  'requests sent by the client.' % prefix,
+                  '# TYPE %s_request_duration_seconds histogram' % prefix]
+        for key, (count, total, cumulative) in snapshot:
+            for bound, bucket_count in zip(bounds, cumulative):
+                lines.append('%s_request_duration_seconds_bucket{%s,'
+                             'le="%s"} %d' % (prefix, labels[key],
+                                              _bound(bound), bucket_count))
+            lines.append('%s_request_duration_seconds_sum{%s} %r' %
+                         (prefix, labels[key], total))
+            lines.append('%s_request_duration_seconds_count{%s} %d' %
+                         (prefix, labels[key], count))
+        return '\n'.join(lines) + '\n'
+
+    def statsd_lines(self, prefix='neutronclient'):
+        """Return the StatsD lines of the requests since the last call.
+
+        Each key gets a counter of its requests and a timer of their
+        durations in milliseconds, sampled when there were more than
+        statsd_samples of them.
+        """
+        with self._lock:
+            lines = []
+            for key, stats in sorted(self._stats.items()):
+                if not stats.pending_count:
+                    continue
+                name = '.'.join([prefix, 'requests'] +
+                                [re.sub(r'[^\w-]', '_', part)
+                                 for part in key])
+                lines.append('%s:%d|c' % (name, stats.pending_count))
+                rate = ''
+                if stats.pending_count > len(stats.pending):
+                    rate = '|@%.4f' % (float(len(stats.pending)) /
+                                       stats.pending_count)
+                for duration in stats.pending:
+                    lines.append('%s.duration:%.3f|ms%s' %
+                                 (name, duration * 1000, rate))
+                stats.pending_count = 0
+                stats.pending = []
+            return lines
+
+    def push_statsd(self, host='localhost', port=8125,
+                    prefix='neutronclient'):
+        """Send the requests since the last push to StatsD over UDP."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            packet = []
+            size = 0
+            for line in self.statsd_lines(prefix):
+                if packet and size + len(line) + 1 > STATSD_PACKET_SIZE:
+                    sock.sendto('\n'.join(packet), (host, port))
+                    packet = []
+                    size = 0
+                packet.append(line)
+                size += len(line) + 1
+            if packet:
+                sock.sendto('\n'.join(packet), (host, port))
+        finally:
+            sock.close()
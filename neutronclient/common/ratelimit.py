@@ -0,0 +1,107 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Limits of the rate of the requests sent to the server."""
+
+import threading
+import time
+
+from neutronclient.common import exceptions
+
+
+class TokenBucket(object):
+    """Allows rate requests per second on average, and bursts of burst.
+
+    The bucket holds at most burst tokens and gains rate tokens per
+    second. A request takes a token; when there are none, the token is
+    reserved and the request waits until it is added. Waiting requests
+    are thus served in the order they arrived.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = burst or max(1, self.rate)
+        self._tokens = self.burst
+        self._updated = time.time()
+
+    def delay(self, now):
+        """Return the seconds before a token is available."""
+        self._tokens = min(self.burst,
+                           self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return max(0, (1 - self._tokens) / self.rate)
+
+    def take(self):
+        self._tokens -= 1
+
+
+class RateLimiter(object):
+    """Limits the requests of a client, globally and by method or collection.
+
+    rate is the requests per second allowed overall, methods and
+    collections map an HTTP method such as 'POST' or a collection such as
+    'ports' to its own rate. Each rate is either a number or a (rate,
+    burst) tuple. A request is sent once each of its limits allows it.
+
+    With block, requests over the rate wait for their turn, at most
+    max_wait seconds. Otherwise, or when they would wait longer, they
+    fail with RateLimited.
+    """
+
+    def __init__(self, rate=None, methods=None, collections=None,
+                 block=True, max_wait=None):
+        self.block = block
+        self.max_wait = max_wait
+        self.bucket = rate and self._bucket(rate) or None
+        self.method_buckets = dict((method.upper(), self._bucket(limit))
+                                   for method, limit in
+                                   (methods or {}).items())
+        self.collection_buckets = dict((collection, self._bucket(limit))
+                                       for collection, limit in
+                                       (collections or {}).items())
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bucket(limit):
+        if isinstance(limit, tuple):
+            return TokenBucket(*limit)
+        return TokenBucket(limit)
+
+    def _buckets(self, method, collection):
+        buckets = [self.bucket, self.method_buckets.get(method),
+                   self.collection_buckets.get(collection)]
+        return [bucket for bucket in buckets if bucket is not None]
+
+    def acquire(self, method, collection=None):
+        """Wait until a request may be sent.
+
+        :raises: RateLimited if it may not be sent now without blocking,
+                 or within max_wait seconds.
+        """
+        buckets = self._buckets(method, collection)
+        if not buckets:
+            return
+        with self._lock:
+            now = time.time()
+            delay = max(bucket.delay(now) for bucket in buckets)
+            if delay and (not self.block or
+                          (self.max_wait is not None and
+                           delay > self.max_wait)):
+                raise exceptions.RateLimited(method=method, seconds=delay)
+            for bucket in buckets:
+                bucket.take()
+        if delay:
+            time.sleep(delay)
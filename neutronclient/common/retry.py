@@ -0,0 +1,106 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Delays and limits of the retries of failed requests."""
+
+import collections
+from email import utils as email_utils
+import random
+import threading
+import time
+
+# Share of the recent requests which may be retried
+DEFAULT_BUDGET_RATIO = 0.2
+# Retries allowed in a window whatever the number of requests
+DEFAULT_BUDGET_MIN_RETRIES = 10
+# Seconds over which requests and retries are counted
+DEFAULT_BUDGET_WINDOW = 10
+
+
+def backoff_delay(attempt, interval, max_interval=None, jitter=True):
+    """Return the seconds to wait before retrying a request.
+
+    The delay is interval doubled for each previous attempt, up to
+    max_interval. With jitter, a random delay between 0 and that is
+    returned instead, so that clients which failed together do not
+    retry together.
+    """
+    delay = interval * (2 ** attempt)
+    if max_interval is not None:
+        delay = min(delay, max_interval)
+    if jitter:
+        delay = random.uniform(0, delay)
+    return delay
+
+
+def parse_retry_after(value):
+    """Return the seconds asked by a Retry-After header, or None.
+
+    The header holds either a number of seconds or an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(0, int(value))
+    except ValueError:
+        pass
+    date = email_utils.parsedate_tz(value)
+    if date is None:
+        return None
+    return max(0, email_utils.mktime_tz(date) - time.time())
+
+
+class RetryBudget(object):
+    """Allows retries for a share of the requests of the last seconds.
+
+    Once the budget is spent, failed requests are not retried, so that
+    a server which fails under load is not sent still more requests.
+    The counts are kept per second, so the memory used is bounded by
+    the window.
+    """
+
+    def __init__(self, ratio=DEFAULT_BUDGET_RATIO,
+                 min_retries=DEFAULT_BUDGET_MIN_RETRIES,
+                 window=DEFAULT_BUDGET_WINDOW):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        # [second, requests, retries] of the seconds of the window
+        self._counts = collections.deque()
+        self._lock = threading.Lock()
+
+    def _current(self):
+        now = int(time.time())
+        while self._counts and self._counts[0][0] <= now - self.window:
+            self._counts.popleft()
+        if not self._counts or self._counts[-1][0] != now:
+            self._counts.append([now, 0, 0])
+        return self._counts[-1]
+
+    def record_request(self):
+        with self._lock:
+            self._current()[1] += 1
+
+    def withdraw(self):
+        """Take a retry from the budget, return False if it is spent."""
+        with self._lock:
+            current = self._current()
+            requests = sum(count[1] for count in self._counts)
+            retries = sum(count[2] for count in self._counts)
+            if retries >= self.min_retries + self.ratio * requests:
+                return False
+            current[2] += 1
+            return True
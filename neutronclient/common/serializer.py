@@ -36,6 +36,8 @@ class ActionDispatcher(object):
     def dispatch(self, *args, **kwargs):
         """Find and call local method."""
         action = kwargs.pop('action', 'default')
+        if action == 'default':
+            return self.default(*args, **kwargs)
         action_method = getattr(self, str(action), self.default)
         return action_method(*args, **kwargs)
 
@@ -53,13 +55,24 @@ class DictSerializer(ActionDispatcher):
         return ""
 
 
+def _sanitizer(obj):
+    return unicode(obj)
+
+
 class JSONDictSerializer(DictSerializer):
     """Default JSON request body serialization."""
 
+    def __init__(self, codec=None):
+        """JSONDictSerializer constructor.
+
+        :param codec: module or object providing dumps(obj, default=None),
+                      defaults to the codec set by set_json_codec().
+        """
+        super(JSONDictSerializer, self).__init__()
+        self.codec = codec or _json_codec
+
     def default(self, data):
-        def sanitizer(obj):
-            return unicode(obj)
-        return jsonutils.dumps(data, default=sanitizer)
+        return self.codec.dumps(data, default=_sanitizer)
 
 
 class XMLDictSerializer(DictSerializer):
@@ -219,9 +232,18 @@ class TextDeserializer(ActionDispatcher):
 
 class JSONDeserializer(TextDeserializer):
 
+    def __init__(self, codec=None):
+        """JSONDeserializer constructor.
+
+        :param codec: module or object providing loads(s), defaults to the
+                      codec set by set_json_codec().
+        """
+        super(JSONDeserializer, self).__init__()
+        self.codec = codec or _json_codec
+
     def _from_json(self, datastring):
         try:
-            return jsonutils.loads(datastring)
+            return self.codec.loads(datastring)
         except ValueError:
             msg = _("Cannot understand JSON")
             raise exception.MalformedRequestBody(reason=msg)
@@ -232,6 +254,11 @@ class JSONDeserializer(TextDeserializer):
 
 class XMLDeserializer(TextDeserializer):
 
+    converters = {constants.TYPE_BOOL: lambda x: x.lower() == 'true',
+                  constants.TYPE_INT: int,
+                  constants.TYPE_LONG: long,
+                  constants.TYPE_FLOAT: float}
+
     def __init__(self, metadata=None):
         """XMLDeserializer constructor.
 
@@ -322,16 +349,8 @@ class XMLDeserializer(TextDeserializer):
             else:
                 return ''
         elif (len(node) == 0 and node.text):
-            converters = {constants.TYPE_BOOL:
-                          lambda x: x.lower() == 'true',
-                          constants.TYPE_INT:
-                          lambda x: int(x),
-                          constants.TYPE_LONG:
-                          lambda x: long(x),
-                          constants.TYPE_FLOAT:
-                          lambda x: float(x)}
-            if attrType and attrType in converters:
-                return converters[attrType](node.text)
+            if attrType and attrType in self.converters:
+                return self.converters[attrType](node.text)
             else:
                 return node.text
         elif self._get_key(node.tag) in listnames:
@@ -359,6 +378,52 @@ class XMLDeserializer(TextDeserializer):
         return self.default(datastring)
 
 
+_json_codec = jsonutils
+
+# Handler factories by content type, called with the serializer metadata
+_serializers = {
+    'application/json': lambda metadata: JSONDictSerializer(),
+    'application/xml': XMLDictSerializer,
+}
+_deserializers = {
+    'application/json': lambda metadata: JSONDeserializer(),
+    'application/xml': XMLDeserializer,
+}
+# Bumped on every registry change so Serializers drop their handlers
+_registry_generation = 0
+
+
+def register_content_type(content_type, serializer_factory,
+                          deserializer_factory):
+    """Register the handlers used for a content type.
+
+    :param serializer_factory: callable taking the serializer metadata and
+                               returning an object with a
+                               serialize(data) method
+    :param deserializer_factory: callable taking the serializer metadata
+                                 and returning an object with a
+                                 deserialize(datastring) method returning
+                                 {'body': data}
+    """
+    global _registry_generation
+    _serializers[content_type] = serializer_factory
+    _deserializers[content_type] = deserializer_factory
+    _registry_generation += 1
+
+
+def set_json_codec(codec):
+    """Use another JSON implementation, e.g. simplejson.
+
+    :param codec: module or object providing dumps(obj, default=None) and
+                  loads(s)
+    """
+    global _json_codec
+    _json_codec = codec
+    register_content_type('application/json',
+                          lambda metadata: JSONDictSerializer(codec),
+                          lambda metadata: JSONDeserializer(codec))
+
+
 # NOTE(maru): this class is duplicated from neutron.wsgi
 class Serializer(object):
     """Serializes and deserializes dictionaries to certain MIME types."""
@@ -369,20 +434,31 @@ class Serializer(object):
         'metadata' is an optional dict mapping MIME types to information
         needed to serialize a dictionary to that type.
 
+        Handlers are created on first use and reused afterwards.
         """
         self.metadata = metadata or {}
         self.default_xmlns = default_xmlns
-
-    def _get_serialize_handler(self, content_type):
-        handlers = {
-            'application/json': JSONDictSerializer(),
-            'application/xml': XMLDictSerializer(self.metadata),
-        }
-
+        self._handlers = {}
+        self._generation = _registry_generation
+
+    def _get_handler(self, registry, content_type):
+        if self._generation != _registry_generation:
+            self._handlers = {}
+            self._generation = _registry_generation
+        key = (id(registry), content_type)
         try:
-            return handlers[content_type]
+            return self._handlers[key]
+        except KeyError:
+            pass
+        try:
+            handler = registry[content_type](self.metadata)
         except Exception:
             raise exception.InvalidContentType(content_type=content_type)
+        self._handlers[key] = handler
+        return handler
+
+    def _get_serialize_handler(self, content_type):
+        return self._get_handler(_serializers, content_type)
 
     def serialize(self, data, content_type):
         """Serialize a dictionary into the specified content type."""
@@ -398,12 +474,4 @@ class Serializer(object):
             datastring)
 
     def get_deserialize_handler(self, content_type):
-        handlers = {
-            'application/json': JSONDeserializer(),
-            'application/xml': XMLDeserializer(self.metadata),
-        }
-
-        try:
-            return handlers[content_type]
-        except Exception:
-            raise exception.InvalidContentType(content_type=content_type)
+        return self._get_handler(_deserializers, content_type)
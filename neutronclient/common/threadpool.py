@@ -0,0 +1,145 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""A small pool of worker threads handing out futures."""
+
+import logging
+import Queue
+import sys
+import threading
+
+import six
+
+from neutronclient.openstack.common.gettextutils import _
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 10
+
+
+class Future(object):
+    """The pending result of a call submitted to a ThreadPool."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self):
+        """Wait for the call to finish and return its result.
+
+        If the call raised an exception, it is raised again here.
+        """
+        self._done.wait()
+        if self._exc_info:
+            six.reraise(*self._exc_info)
+        return self._result
+
+    def exception(self):
+        """Wait for the call to finish and return its exception or None."""
+        self._done.wait()
+        return self._exc_info and self._exc_info[1]
+
+    def add_done_callback(self, fn):
+        """Call fn(future) once the call has finished."""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def set_result(self, result):
+        self._result = result
+        self._finish()
+
+    def set_exc_info(self, exc_info):
+        self._exc_info = exc_info
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            try:
+                fn(self)
+            except Exception:
+                LOG.exception(_('Future callback failed'))
+
+
+class ThreadPool(object):
+    """Runs calls in at most size daemon threads, started on demand."""
+
+    def __init__(self, size=DEFAULT_POOL_SIZE):
+        self.size = size
+        self._queue = Queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule fn(*args, **kwargs) and return its Future."""
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError(_('Cannot submit to a stopped pool'))
+            self._queue.put((future, fn, args, kwargs))
+            if len(self._threads) < self.size:
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+        return future
+
+    def map(self, fn, iterable):
+        """Call fn on every item concurrently and return the results.
+
+        The results keep the order of the items. The first exception
+        raised by a call is raised again once all calls have finished.
+        """
+        futures = [self.submit(fn, item) for item in iterable]
+        for future in futures:
+            future.exception()
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait=True):
+        """Stop the worker threads once the calls queued so far are done."""
+        with self._lock:
+            self._shutdown = True
+            threads, self._threads = self._threads, []
+        for _thread in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                future.set_exc_info(sys.exc_info())
+            else:
+                future.set_result(result)
@@ -0,0 +1,120 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Cache of keystone tokens and service catalogs shared between processes.
+"""
+
+import contextlib
+import errno
+import hashlib
+import json
+import logging
+import os
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from neutronclient.common import utils
+from neutronclient.openstack.common.gettextutils import _
+from neutronclient.openstack.common import timeutils
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join('~', '.neutronclient', 'tokens')
+# Cached tokens which expire within this many seconds are not used
+DEFAULT_EXPIRY_WINDOW = 120
+
+
+class TokenCache(object):
+    """Stores keystone responses in files readable only by their owner.
+
+    Entries are keyed by auth URL, user, tenant and region. An entry is
+    used until its token is about to expire.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR,
+                 expiry_window=DEFAULT_EXPIRY_WINDOW):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.expiry_window = expiry_window
+
+    @staticmethod
+    def make_key(auth_url, username, tenant, region_name):
+        parts = [auth_url, username, tenant, region_name]
+        key = '\0'.join([part or '' for part in parts])
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _ensure_dir(self):
+        try:
+            os.makedirs(self.cache_dir, 0o700)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    @contextlib.contextmanager
+    def lock(self, key):
+        """Hold an exclusive lock on an entry.
+
+        Processes authenticating with the same credentials wait for the
+        first one to store its token instead of all fetching one.
+        """
+        if fcntl is None:
+            yield
+            return
+        self._ensure_dir()
+        fd = os.open(self._path(key) + '.lock', os.O_CREAT | os.O_RDWR,
+                     0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def get(self, key):
+        """Return the cached keystone response or None."""
+        try:
+            with open(self._path(key)) as f:
+                st = os.fstat(f.fileno())
+                if st.st_uid != os.getuid() or st.st_mode & 0o077:
+                    LOG.warning(_('Ignoring token cache file %s which is '
+                                  'accessible by other users'), f.name)
+                    return None
+                catalog = json.load(f)
+            expires = catalog['access']['token']['expires']
+            if timeutils.is_soon(timeutils.parse_isotime(expires),
+                                 self.expiry_window):
+                return None
+            return catalog
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def put(self, key, catalog):
+        """Store a keystone response, replacing the previous entry."""
+        try:
+            self._ensure_dir()
+            utils.write_file_atomically(self._path(key), json.dumps(catalog))
+        except (IOError, OSError) as e:
+            LOG.warning(_('Unable to write token cache: %s'), e)
+
+    def delete(self, key):
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
@@ -21,7 +21,10 @@ import datetime
 import json
 import logging
 import os
+import re
 import sys
+import tempfile
+import urlparse
 
 from neutronclient.common import _
 from neutronclient.common import exceptions
@@ -73,6 +76,24 @@ def loads(s):
     return json.loads(s)
 
 
+def write_file_atomically(path, content):
+    """Replace the file at path with content, readable only by the user.
+
+    The content is written to a temporary file of the same directory,
+    renamed to path once complete, so that readers never see a partial
+    file.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.rename(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
 def import_class(import_str):
     """Returns a class from a string including module and class.
 
@@ -152,6 +173,27 @@ def str2dict(strdict):
         return _info
 
 
+# A path segment which is a UUID or a hex token, with an optional format
+_ID_SEGMENT = re.compile(r'^([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-'
+                         r'[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|[0-9a-fA-F]{32})'
+                         r'(\.\w+)?$')
+
+
+def path_template(url):
+    """Return the path of url with its IDs replaced by '{id}'.
+
+    The requests of an API call share a template, such as
+    /v2.0/ports/{id}.json.
+    """
+    segments = []
+    for segment in urlparse.urlparse(url).path.split('/'):
+        match = _ID_SEGMENT.match(segment)
+        if match:
+            segment = '{id}' + (match.group(2) or '')
+        segments.append(segment)
+    return '/'.join(segments)
+
+
 def http_log_req(_logger, args, kwargs):
     if not _logger.isEnabledFor(logging.DEBUG):
         return
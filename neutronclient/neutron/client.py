@@ -46,7 +46,13 @@ def make_client(instance):
                                 token=instance._token,
                                 auth_strategy=instance._auth_strategy,
                                 insecure=instance._insecure,
-                                ca_cert=instance._ca_cert)
+                                ca_cert=instance._ca_cert,
+                                token_cache=instance._token_cache,
+                                list_workers=instance._list_workers,
+                                timing_hooks=instance._timing_hooks,
+                                keepalive=instance._keepalive)
+        client.resolution_cache = instance._resolution_cache
+        client.trust_uuids = instance._trust_uuids
         return client
     else:
         raise exceptions.UnsupportedVersion(_("API version %s is not "
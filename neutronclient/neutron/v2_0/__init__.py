@@ -19,20 +19,83 @@ from __future__ import print_function
 import argparse
 import logging
 import re
+import threading
+import time
 
+from cliff.formatters import base
 from cliff.formatters import table
 from cliff import lister
 from cliff import show
+import six
 
 from neutronclient.common import command
 from neutronclient.common import exceptions
 from neutronclient.common import utils
 from neutronclient.openstack.common.gettextutils import _
+from neutronclient.openstack.common import jsonutils
 
 HEX_ELEM = '[0-9A-Fa-f]'
 UUID_PATTERN = '-'.join([HEX_ELEM + '{8}', HEX_ELEM + '{4}',
                          HEX_ELEM + '{4}', HEX_ELEM + '{4}',
                          HEX_ELEM + '{12}'])
+# Seconds a ResolutionCache keeps the id of a resource
+DEFAULT_RESOLUTION_TTL = 60
+
+
+class ResolutionCache(object):
+    """Ids of resources found by name or id, kept for ttl seconds.
+
+    Set as the resolution_cache of a client, it saves the lookups of
+    find_resourceid_by_name_or_id() and resolve_many() for a session.
+    Commands may keep other lookups of a resource under a tuple key, as
+    ListNetwork does for the cidr of subnets; they are invalidated along
+    with the ids.
+    """
+
+    def __init__(self, ttl=DEFAULT_RESOLUTION_TTL):
+        self.ttl = ttl
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def get(self, resource, name_or_id):
+        with self._lock:
+            entry = self._ids.get((resource, name_or_id))
+            if entry is None:
+                return None
+            resource_id, expires = entry
+            if expires <= time.time():
+                del self._ids[(resource, name_or_id)]
+                return None
+            return resource_id
+
+    def put(self, resource, name_or_id, resource_id):
+        with self._lock:
+            self._ids[(resource, name_or_id)] = (resource_id,
+                                                 time.time() + self.ttl)
+
+    def invalidate(self, resource=None):
+        """Forget the ids of a resource type, or of all resources."""
+        with self._lock:
+            if resource is None:
+                self._ids.clear()
+                return
+            for key in [key for key in self._ids if key[0] == resource]:
+                del self._ids[key]
+
+
+def _is_uuid(value):
+    return re.match(UUID_PATTERN + '$', value) is not None
+
+
+def _get_resolution_cache(client):
+    return getattr(client, 'resolution_cache', None)
+
+
+def _invalidate_resolution_cache(client, resource):
+    # Names may now be taken by another resource or none
+    cache = _get_resolution_cache(client)
+    if cache is not None:
+        cache.invalidate(resource)
 
 
 def _get_resource_plural(resource, client):
@@ -67,10 +130,14 @@ def _find_resourceid_by_name(client, resource, name):
     data = obj_lister(name=name, fields='id')
     collection = resource_plural
     info = data[collection]
-    if len(info) > 1:
+    return _unique_match(resource, name, [obj['id'] for obj in info])
+
+
+def _unique_match(resource, name, ids):
+    if len(ids) > 1:
         raise exceptions.NeutronClientNoUniqueMatch(resource=resource,
                                                     name=name)
-    elif len(info) == 0:
+    elif len(ids) == 0:
         not_found_message = (_("Unable to find %(resource)s with name "
                                "'%(name)s'") %
                              {'resource': resource, 'name': name})
@@ -78,14 +145,73 @@ def _find_resourceid_by_name(client, resource, name):
         raise exceptions.NeutronClientException(
             message=not_found_message, status_code=404)
     else:
-        return info[0]['id']
+        return ids[0]
 
 
 def find_resourceid_by_name_or_id(client, resource, name_or_id):
+    cache = _get_resolution_cache(client)
+    if cache is not None:
+        resource_id = cache.get(resource, name_or_id)
+        if resource_id is not None:
+            return resource_id
+    if getattr(client, 'trust_uuids', False) and _is_uuid(name_or_id):
+        return name_or_id
     try:
-        return find_resourceid_by_id(client, resource, name_or_id)
+        resource_id = find_resourceid_by_id(client, resource, name_or_id)
     except exceptions.NeutronClientException:
-        return _find_resourceid_by_name(client, resource, name_or_id)
+        resource_id = _find_resourceid_by_name(client, resource, name_or_id)
+    if cache is not None:
+        cache.put(resource, name_or_id, resource_id)
+    return resource_id
+
+
+def resolve_many(client, resource, names_or_ids):
+    """Return the ids of resources given by name or id, in order.
+
+    The resources which are not cached are looked up with one list
+    request by id and one by name rather than two requests each.
+    """
+    names_or_ids = list(names_or_ids)
+    pending = []
+    for name_or_id in names_or_ids:
+        if name_or_id not in pending:
+            pending.append(name_or_id)
+    if len(pending) <= 1:
+        return [find_resourceid_by_name_or_id(client, resource, name_or_id)
+                for name_or_id in names_or_ids]
+
+    cache = _get_resolution_cache(client)
+    trust_uuids = getattr(client, 'trust_uuids', False)
+    resolved = {}
+    for name_or_id in pending:
+        resource_id = cache and cache.get(resource, name_or_id)
+        if resource_id:
+            resolved[name_or_id] = resource_id
+        elif trust_uuids and _is_uuid(name_or_id):
+            resolved[name_or_id] = name_or_id
+    pending = [value for value in pending if value not in resolved]
+
+    resource_plural = _get_resource_plural(resource, client)
+    obj_lister = getattr(client, "list_%s" % resource_plural)
+    ids = [value for value in pending if _is_uuid(value)]
+    if ids:
+        data = obj_lister(id=ids, fields='id')
+        for obj in data[resource_plural]:
+            resolved[obj['id']] = obj['id']
+        pending = [value for value in pending if value not in resolved]
+    if pending:
+        data = obj_lister(name=pending, fields=['id', 'name'])
+        ids_by_name = {}
+        for obj in data[resource_plural]:
+            ids_by_name.setdefault(obj['name'], []).append(obj['id'])
+        for name in pending:
+            resolved[name] = _unique_match(resource, name,
+                                           ids_by_name.get(name, []))
+
+    if cache is not None:
+        for name_or_id, resource_id in resolved.items():
+            cache.put(resource, name_or_id, resource_id)
+    return [resolved[name_or_id] for name_or_id in names_or_ids]
 
 
 def add_show_list_common_argument(parser):
@@ -334,6 +460,21 @@ class TableFormater(table.TableFormatter):
             stdout.write('\n')
 
 
+class JSONLinesFormatter(base.ListFormatter):
+    """Writes each row as a JSON object on its own line."""
+
+    def add_argument_group(self, parser):
+        pass
+
+    def emit_list(self, column_names, data, stdout, parsed_args):
+        # The pairs are written in the order of the columns
+        names = [jsonutils.dumps(name) for name in column_names]
+        for row in data:
+            stdout.write('{%s}\n' % ', '.join(
+                '%s: %s' % (name, jsonutils.dumps(value))
+                for name, value in zip(names, row)))
+
+
 class NeutronCommand(command.OpenStackCommand):
     api = 'network'
     log = logging.getLogger(__name__ + '.NeutronCommand')
@@ -419,6 +560,7 @@ class CreateCommand(NeutronCommand, show.ShowOne):
         obj_creator = getattr(neutron_client,
                               "create_%s" % self.resource)
         data = obj_creator(body)
+        _invalidate_resolution_cache(neutron_client, self.resource)
         self.format_output_data(data)
         # {u'network': {u'id': u'e9424a76-6db4-4c93-97b6-ec311cd51f19'}}
         info = self.resource in data and data[self.resource] or None
@@ -471,6 +613,7 @@ class UpdateCommand(NeutronCommand):
         obj_updator = getattr(neutron_client,
                               "update_%s" % self.resource)
         obj_updator(_id, body)
+        _invalidate_resolution_cache(neutron_client, self.resource)
         print((_('Updated %(resource)s: %(id)s') %
                {'id': parsed_args.id, 'resource': self.resource}),
               file=self.app.stdout)
@@ -510,6 +653,7 @@ class DeleteCommand(NeutronCommand):
         else:
             _id = parsed_args.id
         obj_deleter(_id)
+        _invalidate_resolution_cache(neutron_client, self.resource)
         print((_('Deleted %(resource)s: %(id)s')
                % {'id': parsed_args.id,
                   'resource': self.resource}),
@@ -538,6 +682,11 @@ class ListCommand(NeutronCommand, lister.Lister):
             add_pagination_argument(parser)
         if self.sorting_support:
             add_sorting_argument(parser)
+        parser.add_argument(
+            '--stream', action='store_true',
+            help=_('Print the rows of each page as soon as it is received '
+                   'instead of after the whole list, implied by -f jsonl. '
+                   'Use it with the csv, jsonl or value formats'))
         return parser
 
     def args2search_opts(self, parsed_args):
@@ -555,8 +704,25 @@ class ListCommand(NeutronCommand, lister.Lister):
         data = obj_lister(**search_opts)
         return data
 
-    def retrieve_list(self, parsed_args):
-        """Retrieve a list of resources from Neutron server"""
+    def call_server_pages(self, neutron_client, search_opts, parsed_args):
+        """Return an iterator over the responses of each page of the list.
+
+        Commands which override call_server() get its response as a
+        single page.
+        """
+        call_server = six.get_unbound_function(type(self).call_server)
+        if (not self.pagination_support or
+                call_server is not ListCommand.call_server.__func__):
+            return iter([self.call_server(neutron_client, search_opts,
+                                          parsed_args)])
+        search_opts = dict(search_opts, retrieve_all=False)
+        return self.call_server(neutron_client, search_opts, parsed_args)
+
+    def retrieve_pages(self, parsed_args):
+        """Retrieve a list of resources from Neutron server page by page
+
+        Each page is fetched when the previous one has been consumed.
+        """
         neutron_client = self.get_client()
         neutron_client.format = parsed_args.request_format
         _extra_values = parse_args_to_dict(self.values_specs)
@@ -580,9 +746,19 @@ class ListCommand(NeutronCommand, lister.Lister):
                 dirs = dirs[:len(keys)]
             if dirs:
                 search_opts.update({'sort_dir': dirs})
-        data = self.call_server(neutron_client, search_opts, parsed_args)
         collection = _get_resource_plural(self.resource, neutron_client)
-        return data.get(collection, [])
+        if not self._streaming(parsed_args):
+            data = self.call_server(neutron_client, search_opts, parsed_args)
+            return iter([data.get(collection, [])])
+        return (data.get(collection, []) for data in self.call_server_pages(
+            neutron_client, search_opts, parsed_args))
+
+    def retrieve_list(self, parsed_args):
+        """Retrieve a list of resources from Neutron server"""
+        data = []
+        for page in self.retrieve_pages(parsed_args):
+            data.extend(page)
+        return data
 
     def extend_list(self, data, parsed_args):
         """Update a retrieved list.
@@ -609,8 +785,41 @@ class ListCommand(NeutronCommand, lister.Lister):
             s, _columns, formatters=self._formatters, )
             for s in info), )
 
+    def _streaming(self, parsed_args):
+        return parsed_args.stream or parsed_args.formatter == 'jsonl'
+
+    def _stream_rows(self, rows, pages, parsed_args):
+        for row in rows:
+            yield row
+        for page in pages:
+            # Let the rows of the previous page out before waiting
+            self.app.stdout.flush()
+            if not page:
+                continue
+            self.extend_list(page, parsed_args)
+            for row in self.setup_columns(page, parsed_args)[1]:
+                yield row
+
+    def stream_data(self, parsed_args):
+        """Return the columns and rows of the list as it is received.
+
+        Only one page of the list is kept in memory. The columns are
+        those of the first page which is not empty.
+        """
+        pages = self.retrieve_pages(parsed_args)
+        for page in pages:
+            if page:
+                break
+        else:
+            return self.setup_columns([], parsed_args)
+        self.extend_list(page, parsed_args)
+        columns, rows = self.setup_columns(page, parsed_args)
+        return columns, self._stream_rows(rows, pages, parsed_args)
+
     def get_data(self, parsed_args):
         self.log.debug('get_data(%s)', parsed_args)
+        if self._streaming(parsed_args):
+            return self.stream_data(parsed_args)
         data = self.retrieve_list(parsed_args)
         self.extend_list(data, parsed_args)
         return self.setup_columns(data, parsed_args)
@@ -17,7 +17,6 @@
 import argparse
 import logging
 
-from neutronclient.common import exceptions
 from neutronclient.neutron import v2_0 as neutronV20
 from neutronclient.openstack.common.gettextutils import _
 
@@ -33,9 +32,6 @@ def _format_subnets(network):
 class ListNetwork(neutronV20.ListCommand):
     """List networks that belong to a given tenant."""
 
-    # Length of a query filter on subnet id
-    # id=<uuid>& (with len(uuid)=36)
-    subnet_id_filter_len = 40
     resource = 'network'
     log = logging.getLogger(__name__ + '.ListNetwork')
     _formatters = {'subnets': _format_subnets, }
@@ -44,39 +40,38 @@ class ListNetwork(neutronV20.ListCommand):
     sorting_support = True
 
     def extend_list(self, data, parsed_args):
-        """Add subnet information to a network list."""
+        """Add subnet information to a network list.
+
+        The id and cidr of subnets are kept in the resolution cache of the
+        client, so the commands of a batch look each subnet up once.
+        """
         neutron_client = self.get_client()
-        search_opts = {'fields': ['id', 'cidr']}
-        if self.pagination_support:
-            page_size = parsed_args.page_size
-            if page_size:
-                search_opts.update({'limit': page_size})
+        cache = neutronV20._get_resolution_cache(neutron_client)
+        subnet_dict = {}
         subnet_ids = []
         for n in data:
-            if 'subnets' in n:
-                subnet_ids.extend(n['subnets'])
-
-        def _get_subnet_list(sub_ids):
-            search_opts['id'] = sub_ids
-            return neutron_client.list_subnets(
+            for s in n.get('subnets', []):
+                if s in subnet_dict or s in subnet_ids:
+                    continue
+                subnet = cache and cache.get('subnet', ('cidr', s))
+                if subnet:
+                    subnet_dict[s] = subnet
+                else:
+                    subnet_ids.append(s)
+
+        if subnet_ids:
+            search_opts = {'fields': ['id', 'cidr']}
+            if self.pagination_support:
+                page_size = parsed_args.page_size
+                if page_size:
+                    search_opts.update({'limit': page_size})
+            search_opts['id'] = subnet_ids
+            subnets = neutron_client.list_subnets(
                 **search_opts).get('subnets', [])
-
-        try:
-            subnets = _get_subnet_list(subnet_ids)
-        except exceptions.RequestURITooLong as uri_len_exc:
-            # The URI is too long because of too many subnet_id filters
-            # Use the excess attribute of the exception to know how many
-            # subnet_id filters can be inserted into a single request
-            subnet_count = len(subnet_ids)
-            max_size = ((self.subnet_id_filter_len * subnet_count) -
-                        uri_len_exc.excess)
-            chunk_size = max_size / self.subnet_id_filter_len
-            subnets = []
-            for i in range(0, subnet_count, chunk_size):
-                subnets.extend(
-                    _get_subnet_list(subnet_ids[i: i + chunk_size]))
-
-        subnet_dict = dict([(s['id'], s) for s in subnets])
+            for subnet in subnets:
+                subnet_dict[subnet['id']] = subnet
+                if cache is not None:
+                    cache.put('subnet', ('cidr', subnet['id']), subnet)
         for n in data:
             if 'subnets' in n:
                 n['subnets'] = [(subnet_dict.get(s) or {"id": s})
@@ -90,11 +85,11 @@ class ListExternalNetwork(ListNetwork):
     pagination_support = True
     sorting_support = True
 
-    def retrieve_list(self, parsed_args):
+    def retrieve_pages(self, parsed_args):
         external = '--router:external=True'
         if external not in self.values_specs:
             self.values_specs.append('--router:external=True')
-        return super(ListExternalNetwork, self).retrieve_list(parsed_args)
+        return super(ListExternalNetwork, self).retrieve_pages(parsed_args)
 
 
 class ShowNetwork(neutronV20.ShowCommand):
@@ -87,14 +87,11 @@ class UpdatePortSecGroupMixin(object):
             action='store_true',
             help=_('Associate no security groups with the port'))
 
-    def _resolv_sgid(self, secgroup):
-        return neutronV20.find_resourceid_by_name_or_id(
-            self.get_client(), 'security_group', secgroup)
-
     def args2body_secgroup(self, parsed_args, port):
         if parsed_args.security_groups:
-            port['security_groups'] = [self._resolv_sgid(sg) for sg
-                                       in parsed_args.security_groups]
+            port['security_groups'] = neutronV20.resolve_many(
+                self.get_client(), 'security_group',
+                parsed_args.security_groups)
         elif parsed_args.no_security_groups:
             port['security_groups'] = []
 
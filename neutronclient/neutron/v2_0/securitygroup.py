@@ -114,6 +114,11 @@ class ListSecurityGroupRule(neutronV20.ListCommand):
         parser.add_argument(
             '--no-nameconv', action='store_true',
             help=_('Do not convert security group ID to its name'))
+        parser.add_argument(
+            '--list-all-groups', action='store_true',
+            help=_('Find the names of security groups in a list of all '
+                   'the groups rather than by ID, which is faster when '
+                   'the rules refer to most of the groups'))
         return parser
 
     @staticmethod
@@ -122,33 +127,54 @@ class ListSecurityGroupRule(neutronV20.ListCommand):
             rules = dict((rules[k], k) for k in rules.keys())
         return [rules.get(col, col) for col in cols]
 
-    def retrieve_list(self, parsed_args):
+    def retrieve_pages(self, parsed_args):
         parsed_args.fields = self.replace_columns(parsed_args.fields,
                                                   self.replace_rules,
                                                   reverse=True)
-        return super(ListSecurityGroupRule, self).retrieve_list(parsed_args)
+        return super(ListSecurityGroupRule, self).retrieve_pages(parsed_args)
 
     def extend_list(self, data, parsed_args):
+        """Replace the security group IDs of rules by the group names.
+
+        The names are kept in the resolution cache of the client, so the
+        commands of a batch and the pages of a stream look each group up
+        once.
+        """
         if parsed_args.no_nameconv:
             return
         neutron_client = self.get_client()
-        search_opts = {'fields': ['id', 'name']}
-        if self.pagination_support:
-            page_size = parsed_args.page_size
-            if page_size:
-                search_opts.update({'limit': page_size})
-        sec_group_ids = set()
+        cache = neutronV20._get_resolution_cache(neutron_client)
+        sg_dict = {}
+        sec_group_ids = []
         for rule in data:
-            for key in self.replace_rules:
-                sec_group_ids.add(rule[key])
-        search_opts.update({"id": sec_group_ids})
-        secgroups = neutron_client.list_security_groups(**search_opts)
-        secgroups = secgroups.get('security_groups', [])
-        sg_dict = dict([(sg['id'], sg['name'])
-                        for sg in secgroups if sg['name']])
+            for key in sorted(self.replace_rules):
+                sg_id = rule.get(key)
+                if sg_id is None or sg_id in sg_dict or sg_id in sec_group_ids:
+                    continue
+                name = cache and cache.get('security_group', ('name', sg_id))
+                if name is not None:
+                    sg_dict[sg_id] = name
+                else:
+                    sec_group_ids.append(sg_id)
+
+        if sec_group_ids:
+            search_opts = {'fields': ['id', 'name']}
+            if self.pagination_support:
+                page_size = parsed_args.page_size
+                if page_size:
+                    search_opts.update({'limit': page_size})
+            if not parsed_args.list_all_groups:
+                search_opts.update({"id": sec_group_ids})
+            secgroups = neutron_client.list_security_groups(**search_opts)
+            for sg in secgroups.get('security_groups', []):
+                sg_dict[sg['id']] = sg['name']
+                if cache is not None:
+                    cache.put('security_group', ('name', sg['id']),
+                              sg['name'])
         for rule in data:
             for key in self.replace_rules:
-                rule[key] = sg_dict.get(rule[key], rule[key])
+                if key in rule:
+                    rule[key] = sg_dict.get(rule[key]) or rule[key]
 
     def setup_columns(self, info, parsed_args):
         parsed_args.columns = self.replace_columns(parsed_args.columns,
@@ -21,53 +21,40 @@ Command-line interface to the Neutron APIs
 from __future__ import print_function
 
 import argparse
+import contextlib
 import logging
 import os
+import shlex
 import sys
+import threading
+import time
+import urlparse
 
 from cliff import app
 from cliff import commandmanager
+import prettytable
 
 from neutronclient.common import clientmanager
 from neutronclient.common import exceptions as exc
+from neutronclient.common import threadpool
+from neutronclient.common import tokencache
 from neutronclient.common import utils
-from neutronclient.neutron.v2_0 import agent
-from neutronclient.neutron.v2_0 import agentscheduler
-from neutronclient.neutron.v2_0 import credential
-from neutronclient.neutron.v2_0 import extension
-from neutronclient.neutron.v2_0 import floatingip
-from neutronclient.neutron.v2_0.fw import firewall
-from neutronclient.neutron.v2_0.fw import firewallpolicy
-from neutronclient.neutron.v2_0.fw import firewallrule
-from neutronclient.neutron.v2_0.lb import healthmonitor as lb_healthmonitor
-from neutronclient.neutron.v2_0.lb import member as lb_member
-from neutronclient.neutron.v2_0.lb import pool as lb_pool
-from neutronclient.neutron.v2_0.lb import vip as lb_vip
-from neutronclient.neutron.v2_0 import metering
-from neutronclient.neutron.v2_0 import netpartition
-from neutronclient.neutron.v2_0 import network
-from neutronclient.neutron.v2_0 import networkprofile
-from neutronclient.neutron.v2_0.nsx import networkgateway
-from neutronclient.neutron.v2_0.nsx import qos_queue
-from neutronclient.neutron.v2_0 import policyprofile
-from neutronclient.neutron.v2_0 import port
-from neutronclient.neutron.v2_0 import quota
-from neutronclient.neutron.v2_0 import router
-from neutronclient.neutron.v2_0 import securitygroup
-from neutronclient.neutron.v2_0 import servicetype
-from neutronclient.neutron.v2_0 import subnet
-from neutronclient.neutron.v2_0.vpn import ikepolicy
-from neutronclient.neutron.v2_0.vpn import ipsec_site_connection
-from neutronclient.neutron.v2_0.vpn import ipsecpolicy
-from neutronclient.neutron.v2_0.vpn import vpnservice
-from neutronclient.neutron.v2_0.lbssl import lbssl
+from neutronclient.neutron import v2_0 as neutronV20
 from neutronclient.openstack.common.gettextutils import _
+from neutronclient.openstack.common import importutils
 from neutronclient.openstack.common import strutils
 from neutronclient.version import __version__
 
 
 VERSION = '2.0'
 NEUTRON_API_VERSION = '2.0'
+# Commands and options printed by bash-completion, built once per version.
+# Its lines are '<command>\t<options>' after a '#version\t<version>' line,
+# with the global options on the line of '#options'. It is also read by
+# tools/neutron.bash_completion.
+COMPLETION_CACHE_FILE = os.path.join('~', '.neutronclient', 'bash-completion')
+# Requests run at the same time when a list does not fit in one URI
+DEFAULT_LIST_WORKERS = 4
 
 
 def run_command(cmd, cmd_parser, sub_argv):
@@ -97,200 +84,212 @@ def env(*_vars, **kwargs):
     return kwargs.get('default', '')
 
 
+# Commands are given as '<module>:<class>', the module being relative to
+# neutronclient.neutron.v2_0. It is only imported when the command is used.
+COMMAND_MODULE_PREFIX = 'neutronclient.neutron.v2_0.'
+
 COMMAND_V2 = {
-    'net-list': network.ListNetwork,
-    'net-external-list': network.ListExternalNetwork,
-    'net-show': network.ShowNetwork,
-    'net-create': network.CreateNetwork,
-    'net-delete': network.DeleteNetwork,
-    'net-update': network.UpdateNetwork,
-    'subnet-list': subnet.ListSubnet,
-    'subnet-show': subnet.ShowSubnet,
-    'subnet-create': subnet.CreateSubnet,
-    'subnet-delete': subnet.DeleteSubnet,
-    'subnet-update': subnet.UpdateSubnet,
-    'port-list': port.ListPort,
-    'port-show': port.ShowPort,
-    'port-create': port.CreatePort,
-    'port-delete': port.DeletePort,
-    'port-update': port.UpdatePort,
-    'quota-list': quota.ListQuota,
-    'quota-show': quota.ShowQuota,
-    'quota-delete': quota.DeleteQuota,
-    'quota-update': quota.UpdateQuota,
-    'ext-list': extension.ListExt,
-    'ext-show': extension.ShowExt,
-    'router-list': router.ListRouter,
-    'router-port-list': port.ListRouterPort,
-    'router-show': router.ShowRouter,
-    'router-create': router.CreateRouter,
-    'router-delete': router.DeleteRouter,
-    'router-update': router.UpdateRouter,
-    'router-interface-add': router.AddInterfaceRouter,
-    'router-interface-delete': router.RemoveInterfaceRouter,
-    'router-gateway-set': router.SetGatewayRouter,
-    'router-gateway-clear': router.RemoveGatewayRouter,
-    'floatingip-list': floatingip.ListFloatingIP,
-    'floatingip-show': floatingip.ShowFloatingIP,
-    'floatingip-create': floatingip.CreateFloatingIP,
-    'floatingip-delete': floatingip.DeleteFloatingIP,
-    'floatingip-associate': floatingip.AssociateFloatingIP,
-    'floatingip-disassociate': floatingip.DisassociateFloatingIP,
-    'security-group-list': securitygroup.ListSecurityGroup,
-    'security-group-show': securitygroup.ShowSecurityGroup,
-    'security-group-create': securitygroup.CreateSecurityGroup,
-    'security-group-delete': securitygroup.DeleteSecurityGroup,
-    'security-group-update': securitygroup.UpdateSecurityGroup,
-    'security-group-rule-list': securitygroup.ListSecurityGroupRule,
-    'security-group-rule-show': securitygroup.ShowSecurityGroupRule,
-    'security-group-rule-create': securitygroup.CreateSecurityGroupRule,
-    'security-group-rule-delete': securitygroup.DeleteSecurityGroupRule,
-    'lb-vip-list': lb_vip.ListVip,
-    'lb-vip-show': lb_vip.ShowVip,
-    'lb-vip-create': lb_vip.CreateVip,
-    'lb-vip-update': lb_vip.UpdateVip,
-    'lb-vip-delete': lb_vip.DeleteVip,
-    'lb-pool-list': lb_pool.ListPool,
-    'lb-pool-show': lb_pool.ShowPool,
-    'lb-pool-create': lb_pool.CreatePool,
-    'lb-pool-update': lb_pool.UpdatePool,
-    'lb-pool-delete': lb_pool.DeletePool,
-    'lb-pool-stats': lb_pool.RetrievePoolStats,
-    'lb-member-list': lb_member.ListMember,
-    'lb-member-show': lb_member.ShowMember,
-    'lb-member-create': lb_member.CreateMember,
-    'lb-member-update': lb_member.UpdateMember,
-    'lb-member-delete': lb_member.DeleteMember,
-    'lb-healthmonitor-list': lb_healthmonitor.ListHealthMonitor,
-    'lb-healthmonitor-show': lb_healthmonitor.ShowHealthMonitor,
-    'lb-healthmonitor-create': lb_healthmonitor.CreateHealthMonitor,
-    'lb-healthmonitor-update': lb_healthmonitor.UpdateHealthMonitor,
-    'lb-healthmonitor-delete': lb_healthmonitor.DeleteHealthMonitor,
-    'lb-healthmonitor-associate': lb_healthmonitor.AssociateHealthMonitor,
+    'net-list': 'network:ListNetwork',
+    'net-external-list': 'network:ListExternalNetwork',
+    'net-show': 'network:ShowNetwork',
+    'net-create': 'network:CreateNetwork',
+    'net-delete': 'network:DeleteNetwork',
+    'net-update': 'network:UpdateNetwork',
+    'subnet-list': 'subnet:ListSubnet',
+    'subnet-show': 'subnet:ShowSubnet',
+    'subnet-create': 'subnet:CreateSubnet',
+    'subnet-delete': 'subnet:DeleteSubnet',
+    'subnet-update': 'subnet:UpdateSubnet',
+    'port-list': 'port:ListPort',
+    'port-show': 'port:ShowPort',
+    'port-create': 'port:CreatePort',
+    'port-delete': 'port:DeletePort',
+    'port-update': 'port:UpdatePort',
+    'quota-list': 'quota:ListQuota',
+    'quota-show': 'quota:ShowQuota',
+    'quota-delete': 'quota:DeleteQuota',
+    'quota-update': 'quota:UpdateQuota',
+    'ext-list': 'extension:ListExt',
+    'ext-show': 'extension:ShowExt',
+    'router-list': 'router:ListRouter',
+    'router-port-list': 'port:ListRouterPort',
+    'router-show': 'router:ShowRouter',
+    'router-create': 'router:CreateRouter',
+    'router-delete': 'router:DeleteRouter',
+    'router-update': 'router:UpdateRouter',
+    'router-interface-add': 'router:AddInterfaceRouter',
+    'router-interface-delete': 'router:RemoveInterfaceRouter',
+    'router-gateway-set': 'router:SetGatewayRouter',
+    'router-gateway-clear': 'router:RemoveGatewayRouter',
+    'floatingip-list': 'floatingip:ListFloatingIP',
+    'floatingip-show': 'floatingip:ShowFloatingIP',
+    'floatingip-create': 'floatingip:CreateFloatingIP',
+    'floatingip-delete': 'floatingip:DeleteFloatingIP',
+    'floatingip-associate': 'floatingip:AssociateFloatingIP',
+    'floatingip-disassociate': 'floatingip:DisassociateFloatingIP',
+    'security-group-list': 'securitygroup:ListSecurityGroup',
+    'security-group-show': 'securitygroup:ShowSecurityGroup',
+    'security-group-create': 'securitygroup:CreateSecurityGroup',
+    'security-group-delete': 'securitygroup:DeleteSecurityGroup',
+    'security-group-update': 'securitygroup:UpdateSecurityGroup',
+    'security-group-rule-list': 'securitygroup:ListSecurityGroupRule',
+    'security-group-rule-show': 'securitygroup:ShowSecurityGroupRule',
+    'security-group-rule-create': 'securitygroup:CreateSecurityGroupRule',
+    'security-group-rule-delete': 'securitygroup:DeleteSecurityGroupRule',
+    'lb-vip-list': 'lb.vip:ListVip',
+    'lb-vip-show': 'lb.vip:ShowVip',
+    'lb-vip-create': 'lb.vip:CreateVip',
+    'lb-vip-update': 'lb.vip:UpdateVip',
+    'lb-vip-delete': 'lb.vip:DeleteVip',
+    'lb-pool-list': 'lb.pool:ListPool',
+    'lb-pool-show': 'lb.pool:ShowPool',
+    'lb-pool-create': 'lb.pool:CreatePool',
+    'lb-pool-update': 'lb.pool:UpdatePool',
+    'lb-pool-delete': 'lb.pool:DeletePool',
+    'lb-pool-stats': 'lb.pool:RetrievePoolStats',
+    'lb-member-list': 'lb.member:ListMember',
+    'lb-member-show': 'lb.member:ShowMember',
+    'lb-member-create': 'lb.member:CreateMember',
+    'lb-member-update': 'lb.member:UpdateMember',
+    'lb-member-delete': 'lb.member:DeleteMember',
+    'lb-healthmonitor-list': 'lb.healthmonitor:ListHealthMonitor',
+    'lb-healthmonitor-show': 'lb.healthmonitor:ShowHealthMonitor',
+    'lb-healthmonitor-create': 'lb.healthmonitor:CreateHealthMonitor',
+    'lb-healthmonitor-update': 'lb.healthmonitor:UpdateHealthMonitor',
+    'lb-healthmonitor-delete': 'lb.healthmonitor:DeleteHealthMonitor',
+    'lb-healthmonitor-associate': 'lb.healthmonitor:AssociateHealthMonitor',
     'lb-healthmonitor-disassociate': (
-        lb_healthmonitor.DisassociateHealthMonitor
+        'lb.healthmonitor:DisassociateHealthMonitor'
+    ),
+    'queue-create': 'nsx.qos_queue:CreateQoSQueue',
+    'queue-delete': 'nsx.qos_queue:DeleteQoSQueue',
+    'queue-show': 'nsx.qos_queue:ShowQoSQueue',
+    'queue-list': 'nsx.qos_queue:ListQoSQueue',
+    'agent-list': 'agent:ListAgent',
+    'agent-show': 'agent:ShowAgent',
+    'agent-delete': 'agent:DeleteAgent',
+    'agent-update': 'agent:UpdateAgent',
+    'net-gateway-create': 'nsx.networkgateway:CreateNetworkGateway',
+    'net-gateway-update': 'nsx.networkgateway:UpdateNetworkGateway',
+    'net-gateway-delete': 'nsx.networkgateway:DeleteNetworkGateway',
+    'net-gateway-show': 'nsx.networkgateway:ShowNetworkGateway',
+    'net-gateway-list': 'nsx.networkgateway:ListNetworkGateway',
+    'net-gateway-connect': 'nsx.networkgateway:ConnectNetworkGateway',
+    'net-gateway-disconnect': 'nsx.networkgateway:DisconnectNetworkGateway',
+    'dhcp-agent-network-add': 'agentscheduler:AddNetworkToDhcpAgent',
+    'dhcp-agent-network-remove': 'agentscheduler:RemoveNetworkFromDhcpAgent',
+    'net-list-on-dhcp-agent': 'agentscheduler:ListNetworksOnDhcpAgent',
+    'dhcp-agent-list-hosting-net': (
+        'agentscheduler:ListDhcpAgentsHostingNetwork'
+    ),
+    'l3-agent-router-add': 'agentscheduler:AddRouterToL3Agent',
+    'l3-agent-router-remove': 'agentscheduler:RemoveRouterFromL3Agent',
+    'router-list-on-l3-agent': 'agentscheduler:ListRoutersOnL3Agent',
+    'l3-agent-list-hosting-router': 'agentscheduler:ListL3AgentsHostingRouter',
+    'lb-pool-list-on-agent': 'agentscheduler:ListPoolsOnLbaasAgent',
+    'lb-agent-hosting-pool': 'agentscheduler:GetLbaasAgentHostingPool',
+    'service-provider-list': 'servicetype:ListServiceProvider',
+    'firewall-rule-list': 'fw.firewallrule:ListFirewallRule',
+    'firewall-rule-show': 'fw.firewallrule:ShowFirewallRule',
+    'firewall-rule-create': 'fw.firewallrule:CreateFirewallRule',
+    'firewall-rule-update': 'fw.firewallrule:UpdateFirewallRule',
+    'firewall-rule-delete': 'fw.firewallrule:DeleteFirewallRule',
+    'firewall-policy-list': 'fw.firewallpolicy:ListFirewallPolicy',
+    'firewall-policy-show': 'fw.firewallpolicy:ShowFirewallPolicy',
+    'firewall-policy-create': 'fw.firewallpolicy:CreateFirewallPolicy',
+    'firewall-policy-update': 'fw.firewallpolicy:UpdateFirewallPolicy',
+    'firewall-policy-delete': 'fw.firewallpolicy:DeleteFirewallPolicy',
+    'firewall-policy-insert-rule': (
+        'fw.firewallpolicy:FirewallPolicyInsertRule'
+    ),
+    'firewall-policy-remove-rule': (
+        'fw.firewallpolicy:FirewallPolicyRemoveRule'
     ),
-    'queue-create': qos_queue.CreateQoSQueue,
-    'queue-delete': qos_queue.DeleteQoSQueue,
-    'queue-show': qos_queue.ShowQoSQueue,
-    'queue-list': qos_queue.ListQoSQueue,
-    'agent-list': agent.ListAgent,
-    'agent-show': agent.ShowAgent,
-    'agent-delete': agent.DeleteAgent,
-    'agent-update': agent.UpdateAgent,
-    'net-gateway-create': networkgateway.CreateNetworkGateway,
-    'net-gateway-update': networkgateway.UpdateNetworkGateway,
-    'net-gateway-delete': networkgateway.DeleteNetworkGateway,
-    'net-gateway-show': networkgateway.ShowNetworkGateway,
-    'net-gateway-list': networkgateway.ListNetworkGateway,
-    'net-gateway-connect': networkgateway.ConnectNetworkGateway,
-    'net-gateway-disconnect': networkgateway.DisconnectNetworkGateway,
-    'dhcp-agent-network-add': agentscheduler.AddNetworkToDhcpAgent,
-    'dhcp-agent-network-remove': agentscheduler.RemoveNetworkFromDhcpAgent,
-    'net-list-on-dhcp-agent': agentscheduler.ListNetworksOnDhcpAgent,
-    'dhcp-agent-list-hosting-net': agentscheduler.ListDhcpAgentsHostingNetwork,
-    'l3-agent-router-add': agentscheduler.AddRouterToL3Agent,
-    'l3-agent-router-remove': agentscheduler.RemoveRouterFromL3Agent,
-    'router-list-on-l3-agent': agentscheduler.ListRoutersOnL3Agent,
-    'l3-agent-list-hosting-router': agentscheduler.ListL3AgentsHostingRouter,
-    'lb-pool-list-on-agent': agentscheduler.ListPoolsOnLbaasAgent,
-    'lb-agent-hosting-pool': agentscheduler.GetLbaasAgentHostingPool,
-    'service-provider-list': servicetype.ListServiceProvider,
-    'firewall-rule-list': firewallrule.ListFirewallRule,
-    'firewall-rule-show': firewallrule.ShowFirewallRule,
-    'firewall-rule-create': firewallrule.CreateFirewallRule,
-    'firewall-rule-update': firewallrule.UpdateFirewallRule,
-    'firewall-rule-delete': firewallrule.DeleteFirewallRule,
-    'firewall-policy-list': firewallpolicy.ListFirewallPolicy,
-    'firewall-policy-show': firewallpolicy.ShowFirewallPolicy,
-    'firewall-policy-create': firewallpolicy.CreateFirewallPolicy,
-    'firewall-policy-update': firewallpolicy.UpdateFirewallPolicy,
-    'firewall-policy-delete': firewallpolicy.DeleteFirewallPolicy,
-    'firewall-policy-insert-rule': firewallpolicy.FirewallPolicyInsertRule,
-    'firewall-policy-remove-rule': firewallpolicy.FirewallPolicyRemoveRule,
-    'firewall-list': firewall.ListFirewall,
-    'firewall-show': firewall.ShowFirewall,
-    'firewall-create': firewall.CreateFirewall,
-    'firewall-update': firewall.UpdateFirewall,
-    'firewall-delete': firewall.DeleteFirewall,
-    'cisco-credential-list': credential.ListCredential,
-    'cisco-credential-show': credential.ShowCredential,
-    'cisco-credential-create': credential.CreateCredential,
-    'cisco-credential-delete': credential.DeleteCredential,
-    'cisco-network-profile-list': networkprofile.ListNetworkProfile,
-    'cisco-network-profile-show': networkprofile.ShowNetworkProfile,
-    'cisco-network-profile-create': networkprofile.CreateNetworkProfile,
-    'cisco-network-profile-delete': networkprofile.DeleteNetworkProfile,
-    'cisco-network-profile-update': networkprofile.UpdateNetworkProfile,
-    'cisco-policy-profile-list': policyprofile.ListPolicyProfile,
-    'cisco-policy-profile-show': policyprofile.ShowPolicyProfile,
-    'cisco-policy-profile-update': policyprofile.UpdatePolicyProfile,
+    'firewall-list': 'fw.firewall:ListFirewall',
+    'firewall-show': 'fw.firewall:ShowFirewall',
+    'firewall-create': 'fw.firewall:CreateFirewall',
+    'firewall-update': 'fw.firewall:UpdateFirewall',
+    'firewall-delete': 'fw.firewall:DeleteFirewall',
+    'cisco-credential-list': 'credential:ListCredential',
+    'cisco-credential-show': 'credential:ShowCredential',
+    'cisco-credential-create': 'credential:CreateCredential',
+    'cisco-credential-delete': 'credential:DeleteCredential',
+    'cisco-network-profile-list': 'networkprofile:ListNetworkProfile',
+    'cisco-network-profile-show': 'networkprofile:ShowNetworkProfile',
+    'cisco-network-profile-create': 'networkprofile:CreateNetworkProfile',
+    'cisco-network-profile-delete': 'networkprofile:DeleteNetworkProfile',
+    'cisco-network-profile-update': 'networkprofile:UpdateNetworkProfile',
+    'cisco-policy-profile-list': 'policyprofile:ListPolicyProfile',
+    'cisco-policy-profile-show': 'policyprofile:ShowPolicyProfile',
+    'cisco-policy-profile-update': 'policyprofile:UpdatePolicyProfile',
     'ipsec-site-connection-list': (
-        ipsec_site_connection.ListIPsecSiteConnection
+        'vpn.ipsec_site_connection:ListIPsecSiteConnection'
     ),
     'ipsec-site-connection-show': (
-        ipsec_site_connection.ShowIPsecSiteConnection
+        'vpn.ipsec_site_connection:ShowIPsecSiteConnection'
     ),
     'ipsec-site-connection-create': (
-        ipsec_site_connection.CreateIPsecSiteConnection
+        'vpn.ipsec_site_connection:CreateIPsecSiteConnection'
     ),
     'ipsec-site-connection-update': (
-        ipsec_site_connection.UpdateIPsecSiteConnection
+        'vpn.ipsec_site_connection:UpdateIPsecSiteConnection'
     ),
     'ipsec-site-connection-delete': (
-        ipsec_site_connection.DeleteIPsecSiteConnection
+        'vpn.ipsec_site_connection:DeleteIPsecSiteConnection'
     ),
-    'vpn-service-list': vpnservice.ListVPNService,
-    'vpn-service-show': vpnservice.ShowVPNService,
-    'vpn-service-create': vpnservice.CreateVPNService,
-    'vpn-service-update': vpnservice.UpdateVPNService,
-    'vpn-service-delete': vpnservice.DeleteVPNService,
-    'vpn-ipsecpolicy-list': ipsecpolicy.ListIPsecPolicy,
-    'vpn-ipsecpolicy-show': ipsecpolicy.ShowIPsecPolicy,
-    'vpn-ipsecpolicy-create': ipsecpolicy.CreateIPsecPolicy,
-    'vpn-ipsecpolicy-update': ipsecpolicy.UpdateIPsecPolicy,
-    'vpn-ipsecpolicy-delete': ipsecpolicy.DeleteIPsecPolicy,
-    'vpn-ikepolicy-list': ikepolicy.ListIKEPolicy,
-    'vpn-ikepolicy-show': ikepolicy.ShowIKEPolicy,
-    'vpn-ikepolicy-create': ikepolicy.CreateIKEPolicy,
-    'vpn-ikepolicy-update': ikepolicy.UpdateIKEPolicy,
-    'vpn-ikepolicy-delete': ikepolicy.DeleteIKEPolicy,
-    'meter-label-create': metering.CreateMeteringLabel,
-    'meter-label-list': metering.ListMeteringLabel,
-    'meter-label-show': metering.ShowMeteringLabel,
-    'meter-label-delete': metering.DeleteMeteringLabel,
-    'meter-label-rule-create': metering.CreateMeteringLabelRule,
-    'meter-label-rule-list': metering.ListMeteringLabelRule,
-    'meter-label-rule-show': metering.ShowMeteringLabelRule,
-    'meter-label-rule-delete': metering.DeleteMeteringLabelRule,
-    'nuage-netpartition-list': netpartition.ListNetPartition,
-    'nuage-netpartition-show': netpartition.ShowNetPartition,
-    'nuage-netpartition-create': netpartition.CreateNetPartition,
-    'nuage-netpartition-delete': netpartition.DeleteNetPartition,
-    'lb-sslcert-create': lbssl.CreateLbSSLCert,
-    'lb-sslcert-list': lbssl.ListLbSSLCert,
-    'lb-sslcert-show': lbssl.ShowLbSSLCert,
-    'lb-sslcert-delete': lbssl.DeleteLbSSLCert,
-    'lb-sslcert-update': lbssl.UpdateLbSSLCert,
-    'lb-vip-sslcert-associate': lbssl.AssociateVipSSLCert,
-    'lb-vip-sslcert-disassociate': lbssl.DisassociateVipSSLCert,
-    'lb-vip-sslcert-association-list': lbssl.ListVipSSLCertAssociations,
-    'lb-vip-sslcert-association-show': lbssl.ShowVipSSLCertAssociation,
-    'lb-sslcertchain-create': lbssl.CreateLbSSLCertChain,
-    'lb-sslcertchain-list': lbssl.ListLbSSLCertChain,
-    'lb-sslcertchain-show': lbssl.ShowLbSSLCertChain,
-    'lb-sslcertchain-delete': lbssl.DeleteLbSSLCertChain,
-    'lb-sslcertchain-update': lbssl.UpdateLbSSLCertChain,
-    'lb-sslcertkey-create': lbssl.CreateLbSSLCertKey,
-    'lb-sslcertkey-list': lbssl.ListLbSSLCertKey,
-    'lb-sslcertkey-show': lbssl.ShowLbSSLCertKey,
-    'lb-sslcertkey-delete': lbssl.DeleteLbSSLCertKey,
-    'lb-sslcertkey-update': lbssl.UpdateLbSSLCertKey,
-    'lb-sslprofile-create': lbssl.CreateLbSSLProfile,
-    'lb-sslprofile-delete': lbssl.DeleteLbSSLProfile,
-    'lb-sslprofile-update': lbssl.UpdateLbSSLProfile,
-    'lb-sslprofile-show': lbssl.ShowLbSSLProfile,
-    'lb-sslprofile-list': lbssl.ListLbSSLProfile,
+    'vpn-service-list': 'vpn.vpnservice:ListVPNService',
+    'vpn-service-show': 'vpn.vpnservice:ShowVPNService',
+    'vpn-service-create': 'vpn.vpnservice:CreateVPNService',
+    'vpn-service-update': 'vpn.vpnservice:UpdateVPNService',
+    'vpn-service-delete': 'vpn.vpnservice:DeleteVPNService',
+    'vpn-ipsecpolicy-list': 'vpn.ipsecpolicy:ListIPsecPolicy',
+    'vpn-ipsecpolicy-show': 'vpn.ipsecpolicy:ShowIPsecPolicy',
+    'vpn-ipsecpolicy-create': 'vpn.ipsecpolicy:CreateIPsecPolicy',
+    'vpn-ipsecpolicy-update': 'vpn.ipsecpolicy:UpdateIPsecPolicy',
+    'vpn-ipsecpolicy-delete': 'vpn.ipsecpolicy:DeleteIPsecPolicy',
+    'vpn-ikepolicy-list': 'vpn.ikepolicy:ListIKEPolicy',
+    'vpn-ikepolicy-show': 'vpn.ikepolicy:ShowIKEPolicy',
+    'vpn-ikepolicy-create': 'vpn.ikepolicy:CreateIKEPolicy',
+    'vpn-ikepolicy-update': 'vpn.ikepolicy:UpdateIKEPolicy',
+    'vpn-ikepolicy-delete': 'vpn.ikepolicy:DeleteIKEPolicy',
+    'meter-label-create': 'metering:CreateMeteringLabel',
+    'meter-label-list': 'metering:ListMeteringLabel',
+    'meter-label-show': 'metering:ShowMeteringLabel',
+    'meter-label-delete': 'metering:DeleteMeteringLabel',
+    'meter-label-rule-create': 'metering:CreateMeteringLabelRule',
+    'meter-label-rule-list': 'metering:ListMeteringLabelRule',
+    'meter-label-rule-show': 'metering:ShowMeteringLabelRule',
+    'meter-label-rule-delete': 'metering:DeleteMeteringLabelRule',
+    'nuage-netpartition-list': 'netpartition:ListNetPartition',
+    'nuage-netpartition-show': 'netpartition:ShowNetPartition',
+    'nuage-netpartition-create': 'netpartition:CreateNetPartition',
+    'nuage-netpartition-delete': 'netpartition:DeleteNetPartition',
+    'lb-sslcert-create': 'lbssl.lbssl:CreateLbSSLCert',
+    'lb-sslcert-list': 'lbssl.lbssl:ListLbSSLCert',
+    'lb-sslcert-show': 'lbssl.lbssl:ShowLbSSLCert',
+    'lb-sslcert-delete': 'lbssl.lbssl:DeleteLbSSLCert',
+    'lb-sslcert-update': 'lbssl.lbssl:UpdateLbSSLCert',
+    'lb-vip-sslcert-associate': 'lbssl.lbssl:AssociateVipSSLCert',
+    'lb-vip-sslcert-disassociate': 'lbssl.lbssl:DisassociateVipSSLCert',
+    'lb-vip-sslcert-association-list': (
+        'lbssl.lbssl:ListVipSSLCertAssociations'
+    ),
+    'lb-vip-sslcert-association-show': 'lbssl.lbssl:ShowVipSSLCertAssociation',
+    'lb-sslcertchain-create': 'lbssl.lbssl:CreateLbSSLCertChain',
+    'lb-sslcertchain-list': 'lbssl.lbssl:ListLbSSLCertChain',
+    'lb-sslcertchain-show': 'lbssl.lbssl:ShowLbSSLCertChain',
+    'lb-sslcertchain-delete': 'lbssl.lbssl:DeleteLbSSLCertChain',
+    'lb-sslcertchain-update': 'lbssl.lbssl:UpdateLbSSLCertChain',
+    'lb-sslcertkey-create': 'lbssl.lbssl:CreateLbSSLCertKey',
+    'lb-sslcertkey-list': 'lbssl.lbssl:ListLbSSLCertKey',
+    'lb-sslcertkey-show': 'lbssl.lbssl:ShowLbSSLCertKey',
+    'lb-sslcertkey-delete': 'lbssl.lbssl:DeleteLbSSLCertKey',
+    'lb-sslcertkey-update': 'lbssl.lbssl:UpdateLbSSLCertKey',
+    'lb-sslprofile-create': 'lbssl.lbssl:CreateLbSSLProfile',
+    'lb-sslprofile-delete': 'lbssl.lbssl:DeleteLbSSLProfile',
+    'lb-sslprofile-update': 'lbssl.lbssl:UpdateLbSSLProfile',
+    'lb-sslprofile-show': 'lbssl.lbssl:ShowLbSSLProfile',
+    'lb-sslprofile-list': 'lbssl.lbssl:ListLbSSLProfile',
 }
 
 COMMANDS = {'2.0': COMMAND_V2}
@@ -323,6 +322,68 @@ class HelpAction(argparse.Action):
         sys.exit(0)
 
 
+class LazyCommand(object):
+    """Command manager entry importing its command class when loaded."""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self._command_class = None
+
+    def load(self, require=False):
+        if self._command_class is None:
+            module_name, class_name = self.path.split(':')
+            module = importutils.import_module(COMMAND_MODULE_PREFIX +
+                                               module_name)
+            self._command_class = getattr(module, class_name)
+        return self._command_class
+
+
+class CommandManager(commandmanager.CommandManager):
+    """Command manager accepting commands given as '<module>:<class>'."""
+
+    def add_command(self, name, command_class):
+        if isinstance(command_class, basestring):
+            self.commands[name] = LazyCommand(name, command_class)
+        else:
+            super(CommandManager, self).add_command(name, command_class)
+
+
+class ThreadOutput(object):
+    """Output stream which can be captured by a thread for itself.
+
+    Batch commands run at the same time capture their output so that it
+    can be written without being interleaved.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def capture(self):
+        """Keep what the calling thread writes in a list of strings."""
+        self._local.chunks = chunks = []
+        try:
+            yield chunks
+        finally:
+            self._local.chunks = None
+
+    def write(self, data):
+        chunks = getattr(self._local, 'chunks', None)
+        if chunks is None:
+            self.stream.write(data)
+        else:
+            chunks.append(data)
+
+    def flush(self):
+        if getattr(self._local, 'chunks', None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
 class NeutronShell(app.App):
 
     # verbose logging levels
@@ -337,7 +398,7 @@ class NeutronShell(app.App):
         super(NeutronShell, self).__init__(
             description=__doc__.strip(),
             version=VERSION,
-            command_manager=commandmanager.CommandManager('neutron.cli'), )
+            command_manager=CommandManager('neutron.cli'), )
         self.commands = COMMANDS
         for k, v in self.commands[apiversion].items():
             self.command_manager.add_command(k, v)
@@ -346,6 +407,8 @@ class NeutronShell(app.App):
         # password flow auth
         self.auth_client = None
         self.api_version = apiversion
+        # client.RequestTiming of the requests, with --timings
+        self.timings = []
 
     def build_option_parser(self, description, version):
         """Return an argparse option parser for this application.
@@ -469,6 +532,61 @@ class NeutronShell(app.App):
                    "verifying a TLS (https) server certificate. "
                    "Defaults to env[OS_CACERT]"))
 
+        parser.add_argument(
+            '--os-cache',
+            action='store_true',
+            default=strutils.bool_from_string(env('OS_CACHE')),
+            help=_("Reuse the keystone token of earlier invocations until "
+                   "it expires, keeping it in ~/.neutronclient/tokens. "
+                   "Defaults to env[OS_CACHE]"))
+
+        parser.add_argument(
+            '--resolve-cache-ttl',
+            metavar='<seconds>', type=int,
+            default=env('OS_RESOLVE_CACHE_TTL',
+                        default=neutronV20.DEFAULT_RESOLUTION_TTL),
+            help=_("Seconds the IDs of resources given by name are reused "
+                   "by later commands of the session, 0 to look them up "
+                   "every time. Defaults to env[OS_RESOLVE_CACHE_TTL] or "
+                   "%d") % neutronV20.DEFAULT_RESOLUTION_TTL)
+
+        parser.add_argument(
+            '--trust-uuids',
+            action='store_true',
+            default=strutils.bool_from_string(env('OS_TRUST_UUIDS')),
+            help=_("Use arguments which are well-formed UUIDs as resource "
+                   "IDs without checking that the resources exist. "
+                   "Defaults to env[OS_TRUST_UUIDS]"))
+
+        parser.add_argument(
+            '--list-workers',
+            metavar='<count>', type=int,
+            default=env('OS_LIST_WORKERS', default=DEFAULT_LIST_WORKERS),
+            help=_("Number of requests run at the same time when a list "
+                   "is split because its filters do not fit in one URI. "
+                   "Defaults to env[OS_LIST_WORKERS] or %d")
+            % DEFAULT_LIST_WORKERS)
+
+        parser.add_argument(
+            '--timings',
+            action='store_true',
+            help=_("Print the time taken by each HTTP request to stderr "
+                   "once the command is done"))
+
+        parser.add_argument(
+            '--batch',
+            metavar='<file>',
+            help=_("Run the commands of a file, or of the standard input "
+                   "with '-', one per line and with the same client. A "
+                   "line 'wait' waits for the commands above it to "
+                   "finish."))
+
+        parser.add_argument(
+            '--batch-workers',
+            metavar='<count>', type=int, default=1,
+            help=_("Number of batch commands run at the same time, "
+                   "default 1"))
+
         parser.add_argument(
             '--insecure',
             action='store_true',
@@ -480,20 +598,69 @@ class NeutronShell(app.App):
 
         return parser
 
-    def _bash_completion(self):
-        """Prints all of the commands and options for bash-completion."""
-        commands = set()
-        options = set()
-        for option, _action in self.parser._option_string_actions.items():
-            options.add(option)
+    def _bash_completion(self, command=None):
+        """Prints all of the commands and options for bash-completion.
+
+        Given a command, prints its options and the global ones only.
+        """
+        options = self._get_completion_options()
+        words = set(options.pop(''))
+        if command in options:
+            words.update(options[command])
+        else:
+            for command_name, command_options in options.items():
+                words.add(command_name)
+                words.update(command_options)
+        print(' '.join(sorted(words)))
+
+    def _get_completion_options(self):
+        """Return the options of each command, cached in a file.
+
+        Building them needs the parsers of all the commands, so they are
+        only built again when the version or the commands change.
+        """
+        path = os.path.expanduser(COMPLETION_CACHE_FILE)
+        options = self._read_completion_cache(path)
+        command_names = set(name for name, _ep in self.command_manager)
+        if options and set(options) - set(['']) == command_names:
+            return options
+        options = {'': sorted(self.parser._option_string_actions)}
         for command_name, command in self.command_manager:
-            commands.add(command_name)
             cmd_factory = command.load()
             cmd = cmd_factory(self, None)
             cmd_parser = cmd.get_parser('')
-            for option, _action in cmd_parser._option_string_actions.items():
-                options.add(option)
-        print(' '.join(commands | options))
+            options[command_name] = sorted(cmd_parser._option_string_actions)
+        self._write_completion_cache(path, options)
+        return options
+
+    def _read_completion_cache(self, path):
+        try:
+            with open(path) as f:
+                lines = f.read().splitlines()
+        except IOError:
+            return None
+        if not lines or lines[0] != '#version\t%s' % __version__:
+            return None
+        options = {}
+        for line in lines[1:]:
+            command_name, _sep, command_options = line.partition('\t')
+            if command_name == '#options':
+                command_name = ''
+            options[command_name] = command_options.split()
+        return options
+
+    def _write_completion_cache(self, path, options):
+        lines = ['#version\t%s' % __version__]
+        for command_name, command_options in sorted(options.items()):
+            lines.append('%s\t%s' % (command_name or '#options',
+                                     ' '.join(command_options)))
+        try:
+            cache_dir = os.path.dirname(path)
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            utils.write_file_atomically(path, '\n'.join(lines) + '\n')
+        except (IOError, OSError) as e:
+            self.log.debug('Unable to write %s: %s', path, e)
 
     def run(self, argv):
         """Equivalent to the main program for the application.
@@ -508,7 +675,7 @@ class NeutronShell(app.App):
             help_command_pos = -1
             for arg in argv:
                 if arg == 'bash-completion':
-                    self._bash_completion()
+                    self._bash_completion(*argv[index + 1:index + 2])
                     return 0
                 if arg in self.commands[self.api_version]:
                     if command_pos == -1:
@@ -526,7 +693,10 @@ class NeutronShell(app.App):
                 argv[help_command_pos] = '--help'
             self.options, remainder = self.parser.parse_known_args(argv)
             self.configure_logging()
-            self.interactive_mode = not remainder
+            if self.options.batch and remainder:
+                raise exc.CommandError(
+                    _("No command can be given with --batch"))
+            self.interactive_mode = not (remainder or self.options.batch)
             self.initialize_app(remainder)
         except Exception as err:
             if self.options.verbose_level == self.DEBUG_LEVEL:
@@ -536,14 +706,49 @@ class NeutronShell(app.App):
                 self.log.error(unicode(err))
             return 1
         result = 1
-        if self.interactive_mode:
+        start = time.time()
+        if self.options.batch:
+            result = self.run_batch(self.options.batch)
+        elif self.interactive_mode:
             _argv = [sys.argv[0]]
             sys.argv = _argv
             result = self.interact()
         else:
             result = self.run_subcommand(remainder)
+        if self.options.timings:
+            self.print_timings(time.time() - start)
         return result
 
+    def print_timings(self, elapsed):
+        """Print the requests recorded with --timings.
+
+        The time of the command which was not spent in requests went to
+        the client itself, in serialization for instance.
+        """
+        table = prettytable.PrettyTable(
+            ['Host', 'Method', 'Path', 'Status', 'Sent', 'Received',
+             'Connect', 'TTFB', 'Total'])
+        table.align = 'r'
+        table.align['Host'] = table.align['Path'] = 'l'
+
+        def seconds(value):
+            return value is not None and '%.3f' % value or '-'
+
+        for timing in self.timings:
+            table.add_row([urlparse.urlparse(timing.url).netloc,
+                           timing.method, timing.path, timing.status or '-',
+                           timing.bytes_out, timing.bytes_in,
+                           seconds(timing.connect_time),
+                           seconds(timing.ttfb),
+                           seconds(timing.total_time)])
+        requests_time = sum(timing.total_time for timing in self.timings)
+        print(table, file=self.stderr)
+        print(_('%(count)d requests in %(requests).3fs, command took '
+                '%(elapsed).3fs') % {'count': len(self.timings),
+                                     'requests': requests_time,
+                                     'elapsed': elapsed},
+              file=self.stderr)
+
     def run_subcommand(self, argv):
         subcommand = self.command_manager.find_command(argv)
         cmd_factory, cmd_name, sub_argv = subcommand
@@ -582,6 +787,97 @@ class NeutronShell(app.App):
                     self.log.error(_('Could not clean up: %s'), unicode(err3))
         return result
 
+    def run_batch(self, batch_file):
+        """Run the commands of a file, one per line.
+
+        The commands share the authenticated client, its connections and
+        its caches. With --batch-workers, consecutive commands run at the
+        same time up to a line 'wait'; the output of each command is
+        still written whole and in the order of the lines.
+
+        Returns 0 if all the commands succeeded, 1 otherwise.
+        """
+        if batch_file == '-':
+            lines = self.stdin
+        else:
+            lines = open(batch_file)
+        workers = self.options.batch_workers
+        pool = None
+        if workers > 1:
+            pool = threadpool.ThreadPool(workers)
+            self.stdout = ThreadOutput(self.stdout)
+        pending = []
+        statuses = []
+        try:
+            for lineno, line in enumerate(lines, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if line == 'wait':
+                    self._finish_batch_lines(pending, statuses)
+                    continue
+                argv = [strutils.safe_decode(arg)
+                        for arg in shlex.split(strutils.safe_encode(line))]
+                if pool is None:
+                    statuses.append(self._run_batch_line(lineno, argv))
+                    continue
+                pending.append(pool.submit(self._capture_batch_line,
+                                           lineno, argv))
+                # Write the output of the lines finished so far
+                while pending and (pending[0].done() or
+                                   len(pending) > 2 * workers):
+                    self._finish_batch_lines([pending.pop(0)], statuses)
+            self._finish_batch_lines(pending, statuses)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+                self.stdout = self.stdout.stream
+            if lines is not self.stdin:
+                lines.close()
+        failed = len([status for status in statuses if status])
+        if failed:
+            self.log.error(_('%(failed)d of %(total)d batch commands '
+                             'failed'),
+                           {'failed': failed, 'total': len(statuses)})
+        return failed and 1 or 0
+
+    def _finish_batch_lines(self, futures, statuses):
+        for future in futures:
+            chunks, status = future.result()
+            for chunk in chunks:
+                self.stdout.write(chunk)
+            statuses.append(status)
+        del futures[:]
+
+    def _capture_batch_line(self, lineno, argv):
+        with self.stdout.capture() as chunks:
+            status = self._run_batch_line(lineno, argv, concurrent=True)
+        return chunks, status
+
+    def _run_batch_line(self, lineno, argv, concurrent=False):
+        try:
+            if concurrent:
+                # Commands set the request format of the shared client,
+                # which must only change for the thread of the line
+                neutron = self.client_manager.neutron
+                with neutron._request_format(neutron.format):
+                    status = self.run_subcommand(argv)
+            else:
+                status = self.run_subcommand(argv)
+        except SystemExit as e:
+            # Raised by argparse for invalid arguments
+            status = e.code
+        except Exception as e:
+            self.log.error(unicode(e))
+            status = 1
+        if status:
+            self.log.error(_('Line %(line)d: exit status %(status)s'),
+                           {'line': lineno, 'status': status})
+        else:
+            self.log.info(_('Line %(line)d: exit status 0'),
+                          {'line': lineno})
+        return status
+
     def authenticate_user(self):
         """Make sure the user has provided all of the authentication
         info we need.
@@ -628,6 +924,16 @@ class NeutronShell(app.App):
                     _("You must provide a service URL via"
                       " either --os-url or env[OS_URL]"))
 
+        token_cache = None
+        if self.options.os_cache:
+            token_cache = tokencache.TokenCache()
+        timing_hooks = None
+        if self.options.timings:
+            timing_hooks = [self.timings.append]
+        resolution_cache = None
+        if self.options.resolve_cache_ttl > 0:
+            resolution_cache = neutronV20.ResolutionCache(
+                self.options.resolve_cache_ttl)
         self.client_manager = clientmanager.ClientManager(
             token=self.options.os_token,
             url=self.options.os_url,
@@ -642,7 +948,14 @@ class NeutronShell(app.App):
             endpoint_type=self.options.endpoint_type,
             insecure=self.options.insecure,
             ca_cert=self.options.os_cacert,
-            log_credentials=True)
+            log_credentials=True,
+            token_cache=token_cache,
+            resolution_cache=resolution_cache,
+            trust_uuids=self.options.trust_uuids,
+            list_workers=self.options.list_workers,
+            timing_hooks=timing_hooks,
+            # The commands of a batch reuse the connections
+            keepalive=bool(self.options.batch))
         return
 
     def initialize_app(self, argv):
@@ -15,16 +15,24 @@
 #
 
 import copy
+import datetime
 import httplib2
 import json
+import os
+import threading
+import time
 import uuid
 
+import fixtures
 import mox
 import testtools
 
 from neutronclient import client
 from neutronclient.common import exceptions
+from neutronclient.common import tokencache
 from neutronclient.common import utils
+from neutronclient.openstack.common import timeutils
+from neutronclient.tests.unit import test_cli20
 
 
 USERNAME = 'testuser'
@@ -272,6 +280,18 @@ class CLITestAuthKeystone(testtools.TestCase):
                           filter_value=REGION,
                           endpoint_type='privateURL')
 
+    def test_urls_for(self):
+        resources = copy.deepcopy(KS_TOKEN_RESULT)
+        endpoints = resources['access']['serviceCatalog'][0]['endpoints']
+        endpoints.append(dict(endpoints[0], publicURL='otherurl'))
+        catalog = client.ServiceCatalog(resources)
+
+        self.assertRaises(exceptions.AmbiguousEndpoints, catalog.url_for,
+                          attr='region', filter_value=REGION)
+        self.assertEqual([ENDPOINT_URL, 'otherurl'],
+                         catalog.urls_for(attr='region',
+                                          filter_value=REGION))
+
     # Test scenario with url_for when the service catalog only has publicURL.
     def test_url_for_only_public_url(self):
         resources = copy.deepcopy(KS_TOKEN_RESULT)
@@ -392,6 +412,92 @@ class CLITestAuthKeystone(testtools.TestCase):
         self.client.do_request('/resource', 'GET')
 
 
+class CLITestAuthKeystoneTokenRefresh(testtools.TestCase):
+
+    def setUp(self):
+        """Prepare the test environment."""
+        super(CLITestAuthKeystoneTokenRefresh, self).setUp()
+        self.mox = mox.Mox()
+        timeutils.set_time_override(datetime.datetime(2012, 8, 11, 7, 0))
+        self.addCleanup(timeutils.clear_time_override)
+        self.client = client.HTTPClient(username=USERNAME,
+                                        tenant_name=TENANT_NAME,
+                                        password=PASSWORD,
+                                        auth_url=AUTH_URL,
+                                        region_name=REGION)
+        self.addCleanup(self.mox.VerifyAll)
+        self.addCleanup(self.mox.UnsetStubs)
+
+    def _expect_requests(self, times_authenticated):
+        self.mox.StubOutWithMock(self.client, "request")
+        res200 = self.mox.CreateMock(httplib2.Response)
+        res200.status = 200
+        for i in range(times_authenticated):
+            self.client.request(
+                AUTH_URL + '/tokens', 'POST',
+                body=mox.IsA(str), headers=mox.IsA(dict)
+            ).AndReturn((res200, json.dumps(KS_TOKEN_RESULT)))
+            self.client.request(
+                mox.StrContains(ENDPOINT_URL + '/resource'), 'GET',
+                headers=mox.ContainsKeyValue('X-Auth-Token', TOKEN)
+            ).AndReturn((res200, ''))
+
+    def test_expires_tracked(self):
+        self._expect_requests(1)
+        self.mox.ReplayAll()
+        self.client.do_request('/resource', 'GET')
+        self.assertEqual(
+            timeutils.parse_isotime(KS_TOKEN_RESULT['access']['token']
+                                    ['expires']),
+            self.client.auth_token_expires)
+
+    def test_token_refreshed_before_expiry(self):
+        self._expect_requests(2)
+        self.mox.ReplayAll()
+        self.client.do_request('/resource', 'GET')
+        # Within the refresh skew of the expiry
+        timeutils.set_time_override(datetime.datetime(2012, 8, 11, 7, 48, 30))
+        self.client.do_request('/resource', 'GET')
+
+    def test_token_refresh_disabled(self):
+        self.client.token_refresh_skew = None
+        self._expect_requests(1)
+        self.client.request(
+            mox.StrContains(ENDPOINT_URL + '/resource'), 'GET',
+            headers=mox.ContainsKeyValue('X-Auth-Token', TOKEN)
+        ).AndReturn((test_cli20.MyResp(200), ''))
+        self.mox.ReplayAll()
+        self.client.do_request('/resource', 'GET')
+        timeutils.set_time_override(datetime.datetime(2012, 8, 11, 7, 48, 30))
+        self.client.do_request('/resource', 'GET')
+
+    def test_short_lived_token_not_refreshed_early(self):
+        timeutils.set_time_override(datetime.datetime(2012, 8, 11, 7, 48, 30))
+        self._expect_requests(1)
+        self.mox.ReplayAll()
+        self.client.do_request('/resource', 'GET')
+        self.assertIsNone(self.client.auth_token_expires)
+
+    def test_one_refresh_for_concurrent_callers(self):
+        calls = []
+
+        def authenticate():
+            calls.append(1)
+            time.sleep(0.1)
+            self.client.auth_token = 'newtoken'
+
+        self.client.auth_token = TOKEN
+        self.client.authenticate = authenticate
+        threads = [threading.Thread(target=self.client._refresh_token,
+                                    args=(TOKEN,)) for i in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, len(calls))
+        self.assertEqual('newtoken', self.client.auth_token)
+
+
 class CLITestAuthKeystoneWithId(CLITestAuthKeystone):
 
     # Auth Body expected when using tenant Id
@@ -421,3 +527,97 @@ class CLITestAuthKeystoneWithIdandName(CLITestAuthKeystone):
                                         password=PASSWORD,
                                         auth_url=AUTH_URL,
                                         region_name=REGION)
+
+
+class CLITestAuthKeystoneWithTokenCache(testtools.TestCase):
+
+    def setUp(self):
+        """Prepare the test environment."""
+        super(CLITestAuthKeystoneWithTokenCache, self).setUp()
+        self.mox = mox.Mox()
+        # KS_TOKEN_RESULT expires a day later
+        timeutils.set_time_override(datetime.datetime(2012, 8, 10))
+        self.addCleanup(timeutils.clear_time_override)
+        self.cache = tokencache.TokenCache(
+            cache_dir=self.useFixture(fixtures.TempDir()).path)
+        self.client = self._make_client()
+        self.key = self.client._token_cache_key()
+        self.addCleanup(self.mox.VerifyAll)
+        self.addCleanup(self.mox.UnsetStubs)
+
+    def _make_client(self):
+        return client.HTTPClient(username=USERNAME,
+                                 tenant_name=TENANT_NAME,
+                                 password=PASSWORD,
+                                 auth_url=AUTH_URL,
+                                 region_name=REGION,
+                                 token_cache=self.cache)
+
+    def _expect_authenticate(self, http_client, result=KS_TOKEN_RESULT):
+        res200 = self.mox.CreateMock(httplib2.Response)
+        res200.status = 200
+        http_client.request(
+            AUTH_URL + '/tokens', 'POST',
+            body=mox.IsA(str), headers=mox.IsA(dict)
+        ).AndReturn((res200, json.dumps(result)))
+
+    def test_token_stored(self):
+        self.mox.StubOutWithMock(self.client, "request")
+        self._expect_authenticate(self.client)
+        self.mox.ReplayAll()
+
+        self.client.authenticate()
+        self.assertEqual(KS_TOKEN_RESULT, self.cache.get(self.key))
+        path = os.path.join(self.cache.cache_dir, self.key)
+        self.assertEqual(0o600, os.stat(path).st_mode & 0o777)
+
+    def test_cached_token_reused(self):
+        self.cache.put(self.key, KS_TOKEN_RESULT)
+        self.mox.StubOutWithMock(self.client, "request")
+        self.mox.ReplayAll()
+
+        self.client.authenticate()
+        self.assertEqual(TOKEN, self.client.auth_token)
+        self.assertEqual(ENDPOINT_URL, self.client.endpoint_url)
+
+    def test_refused_cached_token_replaced(self):
+        new_result = copy.deepcopy(KS_TOKEN_RESULT)
+        new_result['access']['token']['id'] = 'newtoken'
+        self.cache.put(self.key, KS_TOKEN_RESULT)
+        self.client.auth_token = TOKEN
+        self.client.endpoint_url = ENDPOINT_URL
+        self.mox.StubOutWithMock(self.client, "request")
+        res200 = self.mox.CreateMock(httplib2.Response)
+        res200.status = 200
+        res401 = self.mox.CreateMock(httplib2.Response)
+        res401.status = 401
+        self.client.request(
+            mox.StrContains(ENDPOINT_URL + '/resource'), 'GET',
+            headers=mox.ContainsKeyValue('X-Auth-Token', TOKEN)
+        ).AndReturn((res401, ''))
+        self._expect_authenticate(self.client, new_result)
+        self.client.request(
+            mox.StrContains(ENDPOINT_URL + '/resource'), 'GET',
+            headers=mox.ContainsKeyValue('X-Auth-Token', 'newtoken')
+        ).AndReturn((res200, ''))
+        self.mox.ReplayAll()
+
+        self.client.do_request('/resource', 'GET')
+        self.assertEqual(new_result, self.cache.get(self.key))
+
+    def test_expiring_token_not_reused(self):
+        self.cache.put(self.key, KS_TOKEN_RESULT)
+        timeutils.set_time_override(datetime.datetime(2012, 8, 11, 7, 48, 30))
+        self.assertIsNone(self.cache.get(self.key))
+
+    def test_other_users_do_not_share_entries(self):
+        other_key = self.cache.make_key(AUTH_URL, 'otheruser', TENANT_NAME,
+                                        REGION)
+        self.assertNotEqual(self.key, other_key)
+        self.cache.put(self.key, KS_TOKEN_RESULT)
+        self.assertIsNone(self.cache.get(other_key))
+
+    def test_readable_by_others_ignored(self):
+        self.cache.put(self.key, KS_TOKEN_RESULT)
+        os.chmod(os.path.join(self.cache.cache_dir, self.key), 0o644)
+        self.assertIsNone(self.cache.get(self.key))
@@ -0,0 +1,76 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import fixtures
+import testtools
+
+from neutronclient.common import cache
+
+
+class ResponseCacheTest(testtools.TestCase):
+
+    def setUp(self):
+        super(ResponseCacheTest, self).setUp()
+        self.now = 1000.0
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.common.cache.time.time', lambda: self.now))
+        self.cache = cache.ResponseCache({'agents': 10, 'extensions': 60},
+                                         maxsize=2)
+
+    def _put(self, collection, key, response):
+        self.cache.put(collection, key, response,
+                       self.cache.generation(collection))
+
+    def test_get_copy(self):
+        response = {'agents': []}
+        self._put('agents', 'a', response)
+        response['agents'].append('changed')
+        cached = self.cache.get('agents', 'a')
+        self.assertEqual({'agents': []}, cached)
+        cached['agents'].append('changed')
+        self.assertEqual({'agents': []}, self.cache.get('agents', 'a'))
+
+    def test_ttl(self):
+        self._put('agents', 'a', {})
+        self._put('extensions', 'e', {})
+        self.now += 10
+        self.assertIsNone(self.cache.get('agents', 'a'))
+        self.assertEqual({}, self.cache.get('extensions', 'e'))
+
+    def test_least_recently_used_dropped(self):
+        self._put('agents', 'a', 1)
+        self._put('agents', 'b', 2)
+        self.cache.get('agents', 'a')
+        self._put('agents', 'c', 3)
+        self.assertIsNone(self.cache.get('agents', 'b'))
+        self.assertEqual(1, self.cache.get('agents', 'a'))
+        self.assertEqual(3, self.cache.get('agents', 'c'))
+
+    def test_invalidate(self):
+        self._put('agents', 'a', 1)
+        self._put('extensions', 'e', 2)
+        self.cache.invalidate('agents')
+        self.cache.invalidate('ports')
+        self.assertIsNone(self.cache.get('agents', 'a'))
+        self.assertEqual(2, self.cache.get('extensions', 'e'))
+        self.cache.invalidate()
+        self.assertIsNone(self.cache.get('extensions', 'e'))
+
+    def test_response_older_than_write_not_kept(self):
+        generation = self.cache.generation('agents')
+        self.cache.invalidate('agents')
+        self.cache.put('agents', 'a', 1, generation)
+        self.assertIsNone(self.cache.get('agents', 'a'))
@@ -14,14 +14,21 @@
 #    under the License.
 #
 
+import os
+import threading
+import time
 import urllib
 
 import fixtures
+import httplib2
 import mox
 import testtools
 
+from neutronclient.common import cache
 from neutronclient.common import constants
 from neutronclient.common import exceptions
+from neutronclient.common import ratelimit
+from neutronclient.common import retry
 from neutronclient.neutron import v2_0 as neutronV2_0
 from neutronclient import shell
 from neutronclient.v2_0 import client
@@ -40,6 +47,9 @@ class FakeStdout:
     def write(self, text):
         self.content.append(text)
 
+    def flush(self):
+        pass
+
     def make_string(self):
         result = ''
         for line in self.content:
@@ -148,6 +158,9 @@ class CLITestV20Base(testtools.TestCase):
     def _find_resourceid(self, client, resource, name_or_id):
         return name_or_id
 
+    def _resolve_many(self, client, resource, names_or_ids):
+        return list(names_or_ids)
+
     def _get_attr_metadata(self):
         return self.metadata
         client.Client.EXTED_PLURALS.update(constants.PLURALS)
@@ -175,6 +188,9 @@ class CLITestV20Base(testtools.TestCase):
         self.useFixture(fixtures.MonkeyPatch(
             'neutronclient.neutron.v2_0.find_resourceid_by_id',
             self._find_resourceid))
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.neutron.v2_0.resolve_many',
+            self._resolve_many))
         self.useFixture(fixtures.MonkeyPatch(
             'neutronclient.v2_0.client.Client.get_attr_metadata',
             self._get_attr_metadata))
@@ -526,6 +542,648 @@ class ClientV2UnicodeTestXML(ClientV2UnicodeTestJson):
     format = 'xml'
 
 
+class ClientV2ThreadSafetyTest(testtools.TestCase):
+    def setUp(self):
+        super(ClientV2ThreadSafetyTest, self).setUp()
+        self.client = client.Client(token=TOKEN, endpoint_url=ENDURL)
+
+    def _format_in_other_thread(self):
+        formats = []
+        thread = threading.Thread(
+            target=lambda: formats.append(self.client.format))
+        thread.start()
+        thread.join()
+        return formats[0]
+
+    def test_format_override_is_thread_local(self):
+        formats = {}
+
+        def fake_list(collection, path, retrieve_all=True, **params):
+            formats['caller'] = self.client.format
+            formats['other'] = self._format_in_other_thread()
+            return {collection: []}
+
+        self.client.list = fake_list
+        self.client.list_networks(format='xml')
+        self.assertEqual('xml', formats['caller'])
+        self.assertEqual('json', formats['other'])
+        self.assertEqual('json', self.client.format)
+
+    def test_format_set_for_all_threads(self):
+        self.client.format = 'xml'
+        self.assertEqual('xml', self._format_in_other_thread())
+
+    def test_do_request_leaves_httpclient_content_type(self):
+        self.client.format = 'xml'
+        self.mox = mox.Mox()
+        self.addCleanup(self.mox.UnsetStubs)
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        self.client.httpclient.request(
+            end_url('/test', format='xml'), 'GET', body=None,
+            headers=mox.ContainsKeyValue('Accept', 'application/xml')
+        ).AndReturn((MyResp(204), None))
+        self.mox.ReplayAll()
+        self.client.do_request('GET', '/test')
+        self.mox.VerifyAll()
+        self.assertEqual('application/json',
+                         self.client.httpclient.content_type)
+
+
+class ClientV2AttrMetadataTest(testtools.TestCase):
+    exts = {'extensions': [{'alias': 'prefix',
+                            'namespace': 'http://xxxx.yy.com'}]}
+
+    def setUp(self):
+        super(ClientV2AttrMetadataTest, self).setUp()
+        self.mox = mox.Mox()
+        self.addCleanup(self.mox.UnsetStubs)
+        self.metadata_file = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'metadata')
+        self.client = self._make_client()
+
+    def _make_client(self):
+        neutron_client = client.Client(token=TOKEN, endpoint_url=ENDURL,
+                                       attr_metadata_file=self.metadata_file)
+        neutron_client.format = 'xml'
+        return neutron_client
+
+    def _expect_list_extensions(self, neutron_client, times=1):
+        self.mox.StubOutWithMock(neutron_client, 'list_extensions')
+        for i in range(times):
+            neutron_client.list_extensions().AndReturn(self.exts)
+
+    def test_json_needs_no_metadata(self):
+        self.client.format = 'json'
+        self._expect_list_extensions(self.client, times=0)
+        self.mox.ReplayAll()
+        self.assertEqual({}, self.client.get_attr_metadata())
+        self.mox.VerifyAll()
+
+    def test_metadata_cached(self):
+        self._expect_list_extensions(self.client)
+        self.mox.ReplayAll()
+        metadata = self.client.get_attr_metadata()
+        self.assertEqual({'prefix': 'http://xxxx.yy.com'},
+                         metadata[constants.EXT_NS])
+        self.assertIs(metadata, self.client.get_attr_metadata())
+        self.mox.VerifyAll()
+
+    def test_metadata_invalidated(self):
+        self._expect_list_extensions(self.client, times=2)
+        self.mox.ReplayAll()
+        self.client.get_attr_metadata()
+        self.client.invalidate_attr_metadata()
+        self.client.get_attr_metadata()
+        self.mox.VerifyAll()
+
+    def test_metadata_persisted(self):
+        self._expect_list_extensions(self.client)
+        other_client = self._make_client()
+        self._expect_list_extensions(other_client, times=0)
+        self.mox.ReplayAll()
+        metadata = self.client.get_attr_metadata()
+        self.assertEqual(metadata[constants.EXT_NS],
+                         other_client.get_attr_metadata()[constants.EXT_NS])
+        self.mox.VerifyAll()
+
+
+class AsyncClientTest(testtools.TestCase):
+    def setUp(self):
+        super(AsyncClientTest, self).setUp()
+        self.client = client.AsyncClient(workers=2, token=TOKEN,
+                                         endpoint_url=ENDURL)
+        self.addCleanup(self.client.close)
+        self.mox = mox.Mox()
+        self.addCleanup(self.mox.UnsetStubs)
+        self.mox.StubOutWithMock(self.client.client.httpclient, "request")
+
+    def test_paths(self):
+        self.assertEqual(client.Client.networks_path,
+                         self.client.networks_path)
+        self.assertEqual(client.Client.ssl_profiles_path,
+                         self.client.ssl_profiles_path)
+
+    def test_resource_method_returns_future(self):
+        body = {'network': {'id': 'myid'}}
+        self.client.client.httpclient.request(
+            end_url('/networks/myid'), 'GET', body=None,
+            headers=mox.ContainsKeyValue('X-Auth-Token', TOKEN)
+        ).AndReturn((MyResp(200), self.client.serialize(body)))
+        self.mox.ReplayAll()
+        future = self.client.show_network('myid')
+        self.assertEqual(body, future.result())
+        self.mox.VerifyAll()
+
+    def test_exception_raised_by_result(self):
+        self.client.client.httpclient.request(
+            end_url('/networks/myid'), 'GET', body=None,
+            headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(404), None))
+        self.mox.ReplayAll()
+        future = self.client.show_network('myid')
+        self.assertRaises(exceptions.NeutronClientException, future.result)
+        self.mox.VerifyAll()
+
+    def test_pages(self):
+        page1 = {'networks': [{'id': 'a'}],
+                 'networks_links': [{'rel': 'next',
+                                     'href': 'http://x/networks?marker=a'}]}
+        page2 = {'networks': [{'id': 'b'}]}
+        self.client.client.httpclient.request(
+            end_url('/networks'), 'GET', body=None, headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(200), self.client.serialize(page1)))
+        self.client.client.httpclient.request(
+            end_url('/networks', 'marker=a'), 'GET', body=None,
+            headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(200), self.client.serialize(page2)))
+        self.mox.ReplayAll()
+        pages = list(self.client.pages('networks',
+                                       self.client.networks_path))
+        self.assertEqual([page1, page2], pages)
+        self.mox.VerifyAll()
+
+
+class ClientV2IterateTest(testtools.TestCase):
+    page1 = {'ports': [{'id': 'a'}, {'id': 'b'}],
+             'ports_links': [{'rel': 'next',
+                              'href': 'http://x/ports?marker=b'}]}
+    page2 = {'ports': [{'id': 'c'}]}
+
+    def setUp(self):
+        super(ClientV2IterateTest, self).setUp()
+        self.client = client.Client(token=TOKEN, endpoint_url=ENDURL)
+        self.mox = mox.Mox()
+        self.addCleanup(self.mox.UnsetStubs)
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+
+    def _expect_pages(self):
+        self.client.httpclient.request(
+            end_url('/ports'), 'GET', body=None,
+            headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(200), self.client.serialize(self.page1)))
+        self.client.httpclient.request(
+            end_url('/ports', 'marker=b'), 'GET', body=None,
+            headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(200), self.client.serialize(self.page2)))
+
+    def test_iterate(self):
+        self._expect_pages()
+        self.mox.ReplayAll()
+        ports = self.client.iterate('ports', self.client.ports_path)
+        self.assertEqual(['a', 'b', 'c'], [port['id'] for port in ports])
+        self.mox.VerifyAll()
+
+    def test_iterate_is_lazy(self):
+        self.client.httpclient.request(
+            end_url('/ports'), 'GET', body=None, headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(200), self.client.serialize(self.page1)))
+        self.mox.ReplayAll()
+        ports = self.client.iterate('ports', self.client.ports_path)
+        self.assertEqual({'id': 'a'}, next(ports))
+        self.assertEqual({'id': 'b'}, next(ports))
+        self.mox.VerifyAll()
+
+    def test_iterate_prefetch(self):
+        self._expect_pages()
+        self.mox.ReplayAll()
+        ports = self.client.iterate('ports', self.client.ports_path,
+                                    prefetch=True)
+        self.assertEqual(['a', 'b', 'c'], [port['id'] for port in ports])
+        self.mox.VerifyAll()
+
+    def test_iter_resource(self):
+        self.client.httpclient.request(
+            end_url('/ports', 'device_owner=x'), 'GET', body=None,
+            headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(200), self.client.serialize(self.page2)))
+        self.mox.ReplayAll()
+        ports = self.client.iter_ports(device_owner='x')
+        self.assertEqual([{'id': 'c'}], list(ports))
+        self.mox.VerifyAll()
+
+    def test_iter_unpaginated_resource(self):
+        self.assertRaises(AttributeError, getattr, self.client, 'iter_agents')
+        self.assertRaises(AttributeError, getattr, self.client, 'iter_foos')
+
+
+class ClientV2BulkTest(testtools.TestCase):
+    def setUp(self):
+        super(ClientV2BulkTest, self).setUp()
+        self.client = client.Client(token=TOKEN, endpoint_url=ENDURL)
+        self.mox = mox.Mox()
+        self.addCleanup(self.mox.UnsetStubs)
+
+    def test_bulk_create_chunks(self):
+        ports = [{'name': name} for name in 'abc']
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        self.client.httpclient.request(
+            end_url('/ports'), 'POST',
+            body=self.client.serialize({'ports': ports[:2]}),
+            headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(201), self.client.serialize(
+            {'ports': [{'id': 'id_a'}, {'id': 'id_b'}]})))
+        self.client.httpclient.request(
+            end_url('/ports'), 'POST',
+            body=self.client.serialize({'ports': ports[2:]}),
+            headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(409), None))
+        self.mox.ReplayAll()
+        results = self.client.bulk_create_ports(ports, chunk_size=2)
+        self.mox.VerifyAll()
+        self.assertEqual(ports, [r.item for r in results])
+        self.assertEqual([{'id': 'id_a'}, {'id': 'id_b'}, None],
+                         [r.result for r in results])
+        self.assertIsNone(results[0].error)
+        self.assertIsInstance(results[2].error,
+                              exceptions.NeutronClientException)
+
+    def test_bulk_delete_reports_failures(self):
+        def fake_delete(action, **kwargs):
+            if action == '/ports/bad':
+                raise exceptions.PortNotFoundClient()
+        self.client.delete = fake_delete
+        results = self.client.bulk_delete_ports(['good', 'bad'], workers=1)
+        self.assertEqual(['good', 'bad'], [r.item for r in results])
+        self.assertIsNone(results[0].error)
+        self.assertIsInstance(results[1].error, exceptions.PortNotFoundClient)
+
+    def test_bulk_update_concurrent(self):
+        started = threading.Event()
+        seen = []
+
+        def fake_put(action, body=None, **kwargs):
+            seen.append((self.client.format, action))
+            # Both updates must be running at once to get past here
+            if started.is_set():
+                release.set()
+            started.set()
+            release.wait(5)
+            return body
+
+        release = threading.Event()
+        self.client.put = fake_put
+        updates = [('a', {'port': {'name': 'x'}}),
+                   ('b', {'port': {'name': 'y'}})]
+        with self.client._request_format('xml'):
+            results = self.client.bulk_update_ports(updates, workers=2)
+        self.assertTrue(release.is_set())
+        self.assertEqual([body for _id, body in updates],
+                         [r.result for r in results])
+        self.assertEqual([('xml', '/ports/a'), ('xml', '/ports/b')],
+                         sorted(seen))
+
+
+class ClientV2SplitFiltersTest(testtools.TestCase):
+    def setUp(self):
+        super(ClientV2SplitFiltersTest, self).setUp()
+        self.client = client.Client(token=TOKEN, endpoint_url=ENDURL)
+        self.mox = mox.Mox()
+        self.addCleanup(self.mox.UnsetStubs)
+        # Room for two "id=idN" filters
+        self.client.MAX_URI_LEN = len(end_url('/ports') + '?') + 14
+
+    def test_split_filters(self):
+        params = {'id': ['id1', 'id2', 'id3'], 'fields': ['id', 'name'],
+                  'name': 'x'}
+        self.assertEqual(
+            [{'id': ['id1', 'id2'], 'fields': ['id', 'name'], 'name': 'x'},
+             {'id': ['id3'], 'fields': ['id', 'name'], 'name': 'x'}],
+            self.client._split_filters(params, 6))
+
+    def test_split_filters_not_possible(self):
+        params = {'id': 'id1', 'fields': ['id', 'name']}
+        self.assertIsNone(self.client._split_filters(params, 1))
+
+    def test_split_filters_not_sorted(self):
+        params = {'id': ['id1', 'id2', 'id3'], 'sort_key': ['name'],
+                  'sort_dir': ['asc']}
+        self.assertIsNone(self.client._split_filters(params, 6))
+
+    def test_list_splits_long_filters(self):
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        self.client.httpclient.request(
+            end_url('/ports', 'id=id1&id=id2'), 'GET', body=None,
+            headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(200), self.client.serialize(
+            {'ports': [{'id': 'id1'}, {'id': 'id2'}]})))
+        self.client.httpclient.request(
+            end_url('/ports', 'id=id3'), 'GET', body=None,
+            headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(200), self.client.serialize(
+            {'ports': [{'id': 'id2'}, {'id': 'id3'}]})))
+        self.mox.ReplayAll()
+        ports = self.client.list_ports(id=['id1', 'id2', 'id3'])
+        self.mox.VerifyAll()
+        self.assertEqual({'ports': [{'id': 'id1'}, {'id': 'id2'},
+                                    {'id': 'id3'}]}, ports)
+
+    def test_list_splits_in_parallel(self):
+        self.client.list_workers = 2
+        requested = []
+
+        def fake_get(path, params=None, **kwargs):
+            self.client._check_uri_length(
+                '/v2.0/ports.json?' + urllib.urlencode(params, doseq=1))
+            requested.append(params['id'])
+            return {'ports': [{'id': port_id} for port_id in params['id']]}
+
+        self.client.get = fake_get
+        ports = self.client.list_ports(id=['id1', 'id2', 'id3'])
+        self.assertEqual([['id1', 'id2'], ['id3']], sorted(requested))
+        self.assertEqual(['id1', 'id2', 'id3'],
+                         [port['id'] for port in ports['ports']])
+
+    def test_list_unsplittable_filters(self):
+        self.assertRaises(exceptions.RequestURITooLong,
+                          self.client.list_ports, name='x' * 20)
+
+    def test_list_sorted_long_filters(self):
+        self.assertRaises(exceptions.RequestURITooLong,
+                          self.client.list_ports, id=['id1', 'id2', 'id3'],
+                          sort_key='name')
+
+
+class ClientV2RetryTest(testtools.TestCase):
+    def setUp(self):
+        super(ClientV2RetryTest, self).setUp()
+        self.client = client.Client(token=TOKEN, endpoint_url=ENDURL)
+        self.client.retries = 3
+        self.client.retry_jitter = False
+        self.client.retry_budget = None
+        self.mox = mox.Mox()
+        self.addCleanup(self.mox.UnsetStubs)
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        self.delays = []
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.v2_0.client.time.sleep', self.delays.append))
+
+    def _expect_get(self, status, headers=None):
+        resp = httplib2.Response(dict(headers or {}, status=status))
+        body = self.client.serialize({'ports': []})
+        self.client.httpclient.request(
+            end_url('/ports'), 'GET', body=None, headers=mox.IgnoreArg()
+        ).AndReturn((resp, body if status == 200 else ''))
+
+    def test_retry_unavailable_with_backoff(self):
+        self._expect_get(503)
+        self._expect_get(502)
+        self._expect_get(200)
+        self.mox.ReplayAll()
+        self.assertEqual({'ports': []}, self.client.list_ports())
+        self.mox.VerifyAll()
+        self.assertEqual([1, 2], self.delays)
+
+    def test_retry_connection_failed(self):
+        self.client.httpclient.request(
+            end_url('/ports'), 'GET', body=None, headers=mox.IgnoreArg()
+        ).MultipleTimes().AndRaise(Exception('refused'))
+        self.mox.ReplayAll()
+        self.assertRaises(exceptions.ConnectionFailed,
+                          self.client.list_ports)
+        self.assertEqual([1, 2, 4], self.delays)
+
+    def test_circuit_open_not_retried(self):
+        self.client.httpclient.breaker_threshold = 1
+        # Circuit breakers are kept for absolute URLs only
+        self.client.httpclient.endpoint_url = 'http://neutron:9696'
+        self.client.httpclient.request(
+            'http://neutron:9696/v2.0/ports.json', 'GET', body=None,
+            headers=mox.IgnoreArg()
+        ).AndRaise(Exception('refused'))
+        self.mox.ReplayAll()
+        self.assertRaises(exceptions.CircuitOpen, self.client.list_ports)
+        self.mox.VerifyAll()
+        self.assertEqual([1], self.delays)
+
+    def test_retry_after(self):
+        self._expect_get(503, {'retry-after': '7'})
+        self._expect_get(200)
+        self.mox.ReplayAll()
+        self.client.list_ports()
+        self.mox.VerifyAll()
+        self.assertEqual([7], self.delays)
+
+    def test_retry_after_capped(self):
+        self._expect_get(503, {'retry-after': '86400'})
+        self._expect_get(200)
+        self.mox.ReplayAll()
+        self.client.list_ports()
+        self.mox.VerifyAll()
+        self.assertEqual([self.client.retry_max_interval], self.delays)
+
+    def test_no_retry_on_other_errors(self):
+        self._expect_get(500)
+        self.mox.ReplayAll()
+        e = self.assertRaises(exceptions.NeutronClientException,
+                              self.client.list_ports)
+        self.assertEqual(500, e.status_code)
+        self.assertEqual([], self.delays)
+
+    def test_max_time(self):
+        self.client.retry_max_time = 2
+        self._expect_get(503)
+        self._expect_get(503)
+        self.mox.ReplayAll()
+        e = self.assertRaises(exceptions.NeutronClientException,
+                              self.client.list_ports)
+        self.mox.VerifyAll()
+        self.assertEqual(503, e.status_code)
+        self.assertEqual([1], self.delays)
+
+    def test_budget_spent(self):
+        self.client.retry_budget = retry.RetryBudget(ratio=0, min_retries=1)
+        self._expect_get(503)
+        self._expect_get(503)
+        self.mox.ReplayAll()
+        self.assertRaises(exceptions.NeutronClientException,
+                          self.client.list_ports)
+        self.mox.VerifyAll()
+        self.assertEqual([1], self.delays)
+
+
+class ClientV2CoalesceTest(testtools.TestCase):
+    def setUp(self):
+        super(ClientV2CoalesceTest, self).setUp()
+        self.client = client.Client(token=TOKEN, endpoint_url=ENDURL)
+        self.requests = []
+        self.release = threading.Event()
+        self.client.httpclient.request = self._request
+
+    def _request(self, url, method, body=None, headers=None):
+        self.requests.append(url)
+        self.release.wait()
+        if 'fail' in url:
+            return MyResp(404), ''
+        return MyResp(200), self.client.serialize({'network': {'id': 'x'}})
+
+    def _show_concurrently(self, network_id, callers):
+        results = [None] * callers
+
+        def show(i):
+            try:
+                results[i] = self.client.show_network(network_id)
+            except exceptions.NeutronClientException as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=show, args=(i,))
+                   for i in range(callers)]
+        threads[0].start()
+        while not self.requests:
+            time.sleep(0.001)
+        for thread in threads[1:]:
+            thread.start()
+        # Wait for the other callers to join the request in progress
+        while [waiters for future, waiters in self.client._inflight.values()
+               ] != [callers - 1]:
+            time.sleep(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_identical_gets_coalesced(self):
+        results = self._show_concurrently('x', 3)
+        self.assertEqual([end_url('/networks/x')], self.requests)
+        self.assertEqual([{'network': {'id': 'x'}}] * 3, results)
+        self.assertEqual(3, len(set(id(result) for result in results)))
+        self.assertEqual({}, self.client._inflight)
+
+    def test_error_shared(self):
+        results = self._show_concurrently('fail', 2)
+        self.assertEqual(1, len(self.requests))
+        self.assertIs(results[0], results[1])
+        self.assertIsInstance(results[0], exceptions.NeutronClientException)
+
+    def test_interrupted_request_sent_again(self):
+        def interrupt(*args, **kwargs):
+            self.requests.append(args)
+            self.release.wait()
+            raise KeyboardInterrupt()
+
+        self.client.retry_request = interrupt
+        results = []
+        leader = threading.Thread(target=lambda: self.assertRaises(
+            KeyboardInterrupt, self.client.show_network, 'x'))
+        leader.start()
+        while not self.requests:
+            time.sleep(0.001)
+        waiter = threading.Thread(target=lambda: results.append(
+            self.client.show_network('x')))
+        waiter.start()
+        while [waiters for future, waiters in self.client._inflight.values()
+               ] != [1]:
+            time.sleep(0.001)
+        del self.client.retry_request
+        self.release.set()
+        leader.join()
+        waiter.join()
+        self.assertEqual([{'network': {'id': 'x'}}], results)
+        self.assertEqual({}, self.client._inflight)
+        # A later GET is not left waiting for the interrupted one
+        self.assertEqual({'network': {'id': 'x'}},
+                         self.client.show_network('x'))
+
+    def test_later_get_sent_again(self):
+        self.release.set()
+        self.client.show_network('x')
+        self.client.show_network('x')
+        self.assertEqual(2, len(self.requests))
+
+    def test_coalescing_disabled(self):
+        self.client.coalesce_gets = False
+        results = []
+        self.client.retry_request = lambda *args, **kwargs: (
+            results.append(dict(self.client._inflight)))
+        self.client.show_network('x')
+        self.assertEqual([{}], results)
+
+
+class ClientV2ResponseCacheTest(testtools.TestCase):
+    def setUp(self):
+        super(ClientV2ResponseCacheTest, self).setUp()
+        self.client = client.Client(
+            token=TOKEN, endpoint_url=ENDURL,
+            response_cache=cache.ResponseCache({'agents': 60}))
+        self.requests = []
+        self.client.httpclient.request = self._request
+
+    def _request(self, url, method, body=None, headers=None):
+        self.requests.append((method, url))
+        if method == 'PUT' and 'fail' in url:
+            return MyResp(500), ''
+        return MyResp(200), self.client.serialize({'agents': []})
+
+    def test_cached(self):
+        self.assertEqual({'agents': []}, self.client.list_agents())
+        self.assertEqual({'agents': []}, self.client.list_agents())
+        self.client.show_network('x')
+        self.client.show_network('x')
+        self.assertEqual([('GET', end_url('/agents')),
+                          ('GET', end_url('/networks/x')),
+                          ('GET', end_url('/networks/x'))], self.requests)
+
+    def test_query_cached_apart(self):
+        self.client.list_agents(host='a')
+        self.client.list_agents(host='b')
+        self.client.list_agents(host='a')
+        self.assertEqual(2, len(self.requests))
+
+    def test_write_invalidates(self):
+        self.client.list_agents()
+        self.client.update_agent('x', {'agent': {}})
+        self.client.list_agents()
+        self.assertEqual(['GET', 'PUT', 'GET'],
+                         [method for method, url in self.requests])
+
+    def test_failed_write_invalidates(self):
+        self.client.list_agents()
+        self.assertRaises(exceptions.NeutronClientException,
+                          self.client.update_agent, 'fail', {'agent': {}})
+        self.client.list_agents()
+        self.assertEqual(['GET', 'PUT', 'GET'],
+                         [method for method, url in self.requests])
+
+
+NETWORK_ID = 'e2b5a9f5-6a36-4f6d-8c5e-1b2c3d4e5f60'
+
+
+class ClientV2RateLimitTest(testtools.TestCase):
+    def setUp(self):
+        super(ClientV2RateLimitTest, self).setUp()
+        self.limiter = ratelimit.RateLimiter(rate=1, block=False)
+        self.client = client.Client(token=TOKEN, endpoint_url=ENDURL,
+                                    rate_limiter=self.limiter)
+        self.mox = mox.Mox()
+        self.addCleanup(self.mox.UnsetStubs)
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+
+    def test_collection(self):
+        self.assertEqual('ports', client.Client.collection(
+            '/v2.0/ports/%s.json?fields=id' % NETWORK_ID))
+        self.assertEqual('pools', client.Client.collection(
+            '/v2.0/lb/pools/%s/health_monitors.json' % NETWORK_ID))
+        self.assertIsNone(client.Client.collection('/v2.0/tokens'))
+
+    def test_rate_limited(self):
+        self.client.httpclient.request(
+            end_url('/ports'), 'GET', body=None, headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(200), self.client.serialize({'ports': []})))
+        self.mox.ReplayAll()
+        self.client.list_ports()
+        self.assertRaises(exceptions.RateLimited, self.client.list_ports)
+        self.mox.VerifyAll()
+
+    def test_limit_by_collection(self):
+        self.mox.StubOutWithMock(self.limiter, 'acquire')
+        self.limiter.acquire('GET', 'ports')
+        self.client.httpclient.request(
+            end_url('/ports'), 'GET', body=None, headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(200), self.client.serialize({'ports': []})))
+        self.mox.ReplayAll()
+        self.client.list_ports()
+        self.mox.VerifyAll()
+
+
 class CLITestV20ExceptionHandler(CLITestV20Base):
 
     def _test_exception_handler_v20(
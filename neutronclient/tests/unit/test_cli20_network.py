@@ -15,10 +15,13 @@
 
 import sys
 
+import fixtures
 import mox
+import stevedore.extension
 
 from neutronclient.common import exceptions
 from neutronclient.common import utils
+from neutronclient.neutron import v2_0 as neutronV20
 from neutronclient.neutron.v2_0 import network
 from neutronclient import shell
 from neutronclient.tests.unit import test_cli20
@@ -527,6 +530,111 @@ class CLITestV20NetworkJSON(test_cli20.CLITestV20Base):
 
         self._test_extend_list(mox_calls)
 
+    def test_extend_list_cached_subnets(self):
+        self.client.resolution_cache = neutronV20.ResolutionCache()
+        data = [{'id': 'netid1', 'subnets': ['mysubid1', 'mysubid2']}]
+        filters, response = self._build_test_data(data)
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        cmd = network.ListNetwork(test_cli20.MyApp(sys.stdout), None)
+        self.mox.StubOutWithMock(cmd, "get_client")
+        cmd.get_client().MultipleTimes().AndReturn(self.client)
+        self.client.httpclient.request(
+            test_cli20.end_url(self.client.subnets_path,
+                               'fields=id&fields=cidr' + filters),
+            'GET', body=None, headers=mox.IgnoreArg()).AndReturn(response)
+        self.mox.ReplayAll()
+        known_args, _vs = cmd.get_parser('list_networks').parse_known_args()
+        cmd.extend_list(data, known_args)
+        # A later command of the batch finds the subnets in the cache
+        data2 = [{'id': 'netid2', 'subnets': ['mysubid2']}]
+        cmd.extend_list(data2, known_args)
+        self.mox.VerifyAll()
+        self.assertEqual([{'id': 'mysubid2', 'cidr': '192.168.0.0/16'}],
+                         data2[0]['subnets'])
+
+    def _expect_network_pages(self, pages=2):
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        path = self.client.networks_path
+        reses1 = {'networks': [{'id': 'myid1', 'name': 'net1'},
+                               {'id': 'myid2', 'name': 'net2'}],
+                  'networks_links': [
+                      {'href': test_cli20.end_url(path, 'marker=myid2',
+                                                  format=self.format),
+                       'rel': 'next'}]}
+        reses2 = {'networks': [{'id': 'myid3', 'name': 'net3'}]}
+        self.client.format = self.format
+        for query, reses in [('', reses1), ('marker=myid2', reses2)][:pages]:
+            self.client.httpclient.request(
+                test_cli20.end_url(path, query, format=self.format), 'GET',
+                body=None,
+                headers=mox.ContainsKeyValue('X-Auth-Token', test_cli20.TOKEN)
+            ).AndReturn((test_cli20.MyResp(200), self.client.serialize(reses)))
+
+    def _run_stream(self, args, pages=2):
+        # The jsonl entry point is only found once the package is installed
+        load_formatter_plugins = network.ListNetwork._load_formatter_plugins
+
+        def _load_with_jsonl(cmd):
+            plugins = load_formatter_plugins(cmd)
+            if 'jsonl' not in plugins.names():
+                plugins.extensions.append(stevedore.extension.Extension(
+                    'jsonl', None, neutronV20.JSONLinesFormatter,
+                    neutronV20.JSONLinesFormatter()))
+            return plugins
+
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.neutron.v2_0.network.ListNetwork.'
+            '_load_formatter_plugins', _load_with_jsonl))
+        cmd = network.ListNetwork(test_cli20.MyApp(sys.stdout), None)
+        self.mox.StubOutWithMock(cmd, "get_client")
+        cmd.get_client().MultipleTimes().AndReturn(self.client)
+        self.mox.StubOutWithMock(network.ListNetwork, "extend_list")
+        for page in range(pages):
+            network.ListNetwork.extend_list(mox.IsA(list), mox.IgnoreArg())
+        self._expect_network_pages(pages)
+        self.mox.ReplayAll()
+        cmd_parser = cmd.get_parser('list_networks')
+        args = ['--request-format', self.format] + args
+        shell.run_command(cmd, cmd_parser, args)
+        self.mox.VerifyAll()
+        self.mox.UnsetStubs()
+        return self.fake_stdout.make_string()
+
+    def test_list_nets_jsonl(self):
+        _str = self._run_stream(['-f', 'jsonl'])
+        self.assertEqual(['{"id": "myid1", "name": "net1"}',
+                          '{"id": "myid2", "name": "net2"}',
+                          '{"id": "myid3", "name": "net3"}'],
+                         _str.splitlines())
+
+    def test_list_nets_jsonl_column_order(self):
+        _str = self._run_stream(['-f', 'jsonl', '-c', 'name', '-c', 'id'])
+        self.assertEqual('{"name": "net1", "id": "myid1"}',
+                         _str.splitlines()[0])
+
+    def test_list_nets_csv_stream(self):
+        _str = self._run_stream(['-f', 'csv', '--stream', '-c', 'name'])
+        self.assertEqual(['"name"', '"net1"', '"net2"', '"net3"'],
+                         _str.splitlines())
+
+    def test_list_nets_stream_is_lazy(self):
+        cmd = network.ListNetwork(test_cli20.MyApp(sys.stdout), None)
+        self.mox.StubOutWithMock(cmd, "get_client")
+        cmd.get_client().MultipleTimes().AndReturn(self.client)
+        self.mox.StubOutWithMock(network.ListNetwork, "extend_list")
+        network.ListNetwork.extend_list(mox.IsA(list), mox.IgnoreArg())
+        self._expect_network_pages(pages=1)
+        self.mox.ReplayAll()
+        parsed_args = cmd.get_parser('list_networks').parse_args(
+            ['--request-format', self.format, '--stream'])
+        cmd.values_specs = []
+        columns, rows = cmd.get_data(parsed_args)
+        self.assertEqual(['id', 'name'], columns)
+        self.assertEqual(('myid1', 'net1'), next(rows))
+        self.assertEqual(('myid2', 'net2'), next(rows))
+        self.mox.VerifyAll()
+        self.mox.UnsetStubs()
+
 
 class CLITestV20NetworkXML(CLITestV20NetworkJSON):
     format = 'xml'
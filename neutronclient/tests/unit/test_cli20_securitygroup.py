@@ -18,6 +18,7 @@ import sys
 
 import mox
 
+from neutronclient.neutron import v2_0 as neutronV20
 from neutronclient.neutron.v2_0 import securitygroup
 from neutronclient.tests.unit import test_cli20
 
@@ -228,7 +229,8 @@ class CLITestV20SecurityGroupsJSON(test_cli20.CLITestV20Base):
 
     def _test_list_security_group_rules_extend(self, data=None, expected=None,
                                                args=[], conv=True,
-                                               query_field=False):
+                                               query_field=False,
+                                               list_all=False):
         def setup_list_stub(resources, data, query):
             reses = {resources: data}
             resstr = self.client.serialize(reses)
@@ -268,11 +270,15 @@ class CLITestV20SecurityGroupsJSON(test_cli20.CLITestV20Base):
         setup_list_stub('security_group_rules', list_data, query)
         if conv:
             cmd.get_client().AndReturn(self.client)
-            sec_ids = set()
+            sec_ids = []
             for n in data['data']:
-                sec_ids.add(n[1])
-                sec_ids.add(n[2])
+                # remote_group_id, then security_group_id
+                for sec_id in (n[2], n[1]):
+                    if sec_id not in sec_ids:
+                        sec_ids.append(sec_id)
             filters = ''
+            if list_all:
+                sec_ids = []
             for id in sec_ids:
                 filters = filters + "&id=%s" % id
             setup_list_stub('security_groups',
@@ -326,6 +332,35 @@ class CLITestV20SecurityGroupsJSON(test_cli20.CLITestV20Base):
         self._test_list_security_group_rules_extend(args=args,
                                                     query_field=True)
 
+    def test_list_security_group_rules_extend_list_all_groups(self):
+        self._test_list_security_group_rules_extend(
+            args=['--list-all-groups'], list_all=True)
+
+    def test_list_security_group_rules_extend_cached_names(self):
+        self.client.resolution_cache = neutronV20.ResolutionCache()
+        cmd = securitygroup.ListSecurityGroupRule(
+            test_cli20.MyApp(sys.stdout), None)
+        self.mox.StubOutWithMock(cmd, 'get_client')
+        self.mox.StubOutWithMock(self.client.httpclient, 'request')
+        cmd.get_client().MultipleTimes().AndReturn(self.client)
+        resstr = self.client.serialize(
+            {'security_groups': [{'id': 'myid1', 'name': 'group1'}]})
+        self.client.httpclient.request(
+            test_cli20.end_url(self.client.security_groups_path,
+                               'fields=id&fields=name&id=myid1'),
+            'GET', body=None, headers=mox.IgnoreArg()
+        ).AndReturn((test_cli20.MyResp(200), resstr))
+        self.mox.ReplayAll()
+        parsed_args = cmd.get_parser('list_security_group_rules').parse_args(
+            [])
+        for rule_id in ('ruleid1', 'ruleid2'):
+            rules = [{'id': rule_id, 'security_group_id': 'myid1',
+                      'remote_group_id': None}]
+            cmd.extend_list(rules, parsed_args)
+            self.assertEqual('group1', rules[0]['security_group_id'])
+        self.mox.VerifyAll()
+        self.mox.UnsetStubs()
+
 
 class CLITestV20SecurityGroupsXML(CLITestV20SecurityGroupsJSON):
     format = 'xml'
@@ -13,10 +13,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+
+import fixtures
 import httplib2
 import mox
 import testtools
 
+from neutronclient import client
 from neutronclient.client import HTTPClient
 from neutronclient.common import exceptions
 from neutronclient.tests.unit.test_cli20 import MyResp
@@ -26,6 +30,16 @@ AUTH_TOKEN = 'test_token'
 END_URL = 'test_url'
 METHOD = 'GET'
 URL = 'http://test.test:1234/v2.0/test'
+CONN_KEY = 'http:test.test:1234'
+
+
+class FakeConnection(object):
+    def __init__(self):
+        self.sock = None
+        self.closed = False
+
+    def close(self):
+        self.closed = True
 
 
 class TestHTTPClient(testtools.TestCase):
@@ -83,3 +97,419 @@ class TestHTTPClient(testtools.TestCase):
 
         self.assertEqual(rv_should_be, self.http._cs_request(URL, METHOD))
         self.mox.VerifyAll()
+
+    def test_connections_are_per_thread(self):
+        self.http.connections['key'] = 'conn'
+        connections = []
+        thread = threading.Thread(
+            target=lambda: connections.append(self.http.connections))
+        thread.start()
+        thread.join()
+        self.assertEqual({}, connections[0])
+        self.assertEqual({'key': 'conn'}, self.http.connections)
+
+
+class TestHTTPClientTimingHooks(testtools.TestCase):
+    def setUp(self):
+        super(TestHTTPClientTimingHooks, self).setUp()
+
+        self.mox = mox.Mox()
+        self.mox.StubOutWithMock(httplib2.Http, 'request')
+        self.addCleanup(self.mox.UnsetStubs)
+
+        self.timings = []
+        self.http = HTTPClient(token=AUTH_TOKEN, endpoint_url=END_URL,
+                               timing_hooks=[self.timings.append])
+
+    def test_request_timed(self):
+        httplib2.Http.request(
+            URL + '/myid.json', 'PUT', body='{"a": 1}',
+            headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(200), 'test content'))
+        self.mox.ReplayAll()
+
+        self.http._cs_request(URL + '/myid.json', 'PUT', body='{"a": 1}')
+        self.mox.VerifyAll()
+        timing = self.timings[0]
+        self.assertEqual(('PUT', '/v2.0/test/myid.json', 200, 8, 12),
+                         (timing.method, timing.path, timing.status,
+                          timing.bytes_out, timing.bytes_in))
+        self.assertTrue(timing.total_time >= 0)
+
+    def test_failed_request_timed(self):
+        httplib2.Http.request(
+            URL, METHOD, headers=mox.IgnoreArg()
+        ).AndRaise(Exception('error msg'))
+        self.mox.ReplayAll()
+
+        self.assertRaises(exceptions.ConnectionFailed,
+                          self.http._cs_request, URL, METHOD)
+        self.assertIsNone(self.timings[0].status)
+
+    def test_failing_hook_ignored(self):
+        self.http.timing_hooks.insert(0, lambda timing: 1 / 0)
+        httplib2.Http.request(
+            URL, METHOD, headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(200), ''))
+        self.mox.ReplayAll()
+
+        self.http._cs_request(URL, METHOD)
+        self.assertEqual(1, len(self.timings))
+
+
+class TestHTTPClientKeepalive(testtools.TestCase):
+    def setUp(self):
+        super(TestHTTPClientKeepalive, self).setUp()
+
+        self.mox = mox.Mox()
+        self.mox.StubOutWithMock(httplib2.Http, 'request')
+        self.addCleanup(self.mox.UnsetStubs)
+
+        self.http = HTTPClient(token=AUTH_TOKEN, endpoint_url=END_URL,
+                               keepalive=True)
+        self.conn = FakeConnection()
+
+    def _open_connection(self, *args, **kwargs):
+        self.http.connections.setdefault(CONN_KEY, self.conn)
+
+    def test_connection_reused(self):
+        for i in range(2):
+            httplib2.Http.request(
+                URL, METHOD, headers=mox.IgnoreArg()
+            ).WithSideEffects(self._open_connection).AndReturn(
+                (MyResp(200), 'test content'))
+        self.mox.ReplayAll()
+
+        self.http._cs_request(URL, METHOD)
+        self.assertEqual({}, self.http.connections)
+        self.assertIs(self.conn, self.http.connection_pool.get(CONN_KEY))
+        self.http.connection_pool.put(CONN_KEY, self.conn)
+
+        self.http._cs_request(URL, METHOD)
+        self.assertFalse(self.conn.closed)
+        self.mox.VerifyAll()
+
+    def test_connection_discarded_on_error(self):
+        httplib2.Http.request(
+            URL, METHOD, headers=mox.IgnoreArg()
+        ).WithSideEffects(self._open_connection).AndRaise(
+            Exception('error msg'))
+        self.mox.ReplayAll()
+
+        self.assertRaises(exceptions.ConnectionFailed,
+                          self.http._cs_request, URL, METHOD)
+        self.assertTrue(self.conn.closed)
+        self.assertIsNone(self.http.connection_pool.get(CONN_KEY))
+        self.mox.VerifyAll()
+
+    def test_close_connections(self):
+        self.http.connection_pool.put(CONN_KEY, self.conn)
+        self.http.close_connections()
+        self.assertTrue(self.conn.closed)
+        self.assertIsNone(self.http.connection_pool.get(CONN_KEY))
+
+
+class TestConnectionPool(testtools.TestCase):
+    def test_get_empty(self):
+        pool = client.ConnectionPool()
+        self.assertIsNone(pool.get(CONN_KEY))
+
+    def test_most_recently_used_first(self):
+        pool = client.ConnectionPool()
+        conn1 = FakeConnection()
+        conn2 = FakeConnection()
+        pool.put(CONN_KEY, conn1)
+        pool.put(CONN_KEY, conn2)
+        self.assertIs(conn2, pool.get(CONN_KEY))
+        self.assertIs(conn1, pool.get(CONN_KEY))
+        self.assertIsNone(pool.get(CONN_KEY))
+
+    def test_maxsize(self):
+        pool = client.ConnectionPool(maxsize=1)
+        conn1 = FakeConnection()
+        conn2 = FakeConnection()
+        pool.put(CONN_KEY, conn1)
+        pool.put(CONN_KEY, conn2)
+        self.assertFalse(conn1.closed)
+        self.assertTrue(conn2.closed)
+
+    def test_idle_timeout(self):
+        pool = client.ConnectionPool(idle_timeout=-1)
+        conn = FakeConnection()
+        pool.put(CONN_KEY, conn)
+        self.assertIsNone(pool.get(CONN_KEY))
+        self.assertTrue(conn.closed)
+
+    def test_unusable_socket_discarded(self):
+        pool = client.ConnectionPool()
+        conn = FakeConnection()
+        conn.sock = object()
+        pool.put(CONN_KEY, conn)
+        self.assertIsNone(pool.get(CONN_KEY))
+        self.assertTrue(conn.closed)
+
+
+class TestCircuitBreaker(testtools.TestCase):
+    def setUp(self):
+        super(TestCircuitBreaker, self).setUp()
+        self.now = 1000.0
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.client.time.time', lambda: self.now))
+        self.breaker = client.CircuitBreaker(2, reset_timeout=30)
+
+    def test_opens_after_threshold(self):
+        self.breaker.record_failure()
+        self.assertEqual(client.CircuitBreaker.CLOSED, self.breaker.state)
+        self.breaker.record_failure()
+        self.assertEqual(client.CircuitBreaker.OPEN, self.breaker.state)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(30, self.breaker.remaining())
+
+    def test_success_resets_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(client.CircuitBreaker.CLOSED, self.breaker.state)
+
+    def test_half_open_lets_one_request_through(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now += 30
+        self.assertEqual(client.CircuitBreaker.HALF_OPEN, self.breaker.state)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(client.CircuitBreaker.CLOSED, self.breaker.state)
+        self.assertTrue(self.breaker.allow())
+
+    def test_half_open_failure_reopens(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now += 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(client.CircuitBreaker.OPEN, self.breaker.state)
+
+
+class TestHTTPClientCircuitBreaker(testtools.TestCase):
+    def setUp(self):
+        super(TestHTTPClientCircuitBreaker, self).setUp()
+
+        self.mox = mox.Mox()
+        self.mox.StubOutWithMock(httplib2.Http, 'request')
+        self.addCleanup(self.mox.UnsetStubs)
+
+        self.http = HTTPClient(token=AUTH_TOKEN, endpoint_url=END_URL,
+                               breaker_threshold=2)
+
+    def test_disabled_by_default(self):
+        http = HTTPClient(token=AUTH_TOKEN, endpoint_url=END_URL)
+        self.assertIsNone(http.get_circuit_breaker(URL))
+
+    def test_breaker_per_endpoint(self):
+        breaker = self.http.get_circuit_breaker(URL)
+        self.assertIs(breaker, self.http.get_circuit_breaker(URL + '/x'))
+        self.assertIsNot(breaker, self.http.get_circuit_breaker(
+            'http://other.test:1234/v2.0'))
+        self.assertIs(breaker, self.http.circuit_breakers[CONN_KEY])
+
+    def test_fails_fast_when_open(self):
+        httplib2.Http.request(
+            URL, METHOD, headers=mox.IgnoreArg()
+        ).AndRaise(Exception('error msg'))
+        httplib2.Http.request(
+            URL, METHOD, headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(503), 'unavailable'))
+        self.mox.ReplayAll()
+
+        self.assertRaises(exceptions.ConnectionFailed,
+                          self.http._cs_request, URL, METHOD)
+        self.http._cs_request(URL, METHOD)
+        self.assertEqual(client.CircuitBreaker.OPEN,
+                         self.http.get_circuit_breaker(URL).state)
+        self.assertRaises(exceptions.CircuitOpen,
+                          self.http._cs_request, URL, METHOD)
+        self.mox.VerifyAll()
+
+    def test_failed_post_probe_settled(self):
+        now = [1000.0]
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.client.time.time', lambda: now[0]))
+        breaker = self.http.get_circuit_breaker(URL)
+        breaker.record_failure()
+        breaker.record_failure()
+        now[0] += breaker.reset_timeout
+        httplib2.Http.request(
+            URL, 'POST', headers=mox.IgnoreArg()
+        ).AndRaise(Exception('error msg'))
+        httplib2.Http.request(
+            URL, 'POST', headers=mox.IgnoreArg()
+        ).AndReturn((MyResp(200), 'ok'))
+        self.mox.ReplayAll()
+
+        # The failed probe opens the breaker again for reset_timeout
+        self.assertRaises(exceptions.ConnectionFailed,
+                          self.http._cs_request, URL, 'POST')
+        self.assertEqual(client.CircuitBreaker.OPEN, breaker.state)
+        self.assertEqual(2, breaker.failures)
+        now[0] += breaker.reset_timeout
+        self.http._cs_request(URL, 'POST')
+        self.assertEqual(client.CircuitBreaker.CLOSED, breaker.state)
+        self.mox.VerifyAll()
+
+    def test_failed_post_not_counted(self):
+        httplib2.Http.request(
+            URL, 'POST', headers=mox.IgnoreArg()
+        ).MultipleTimes().AndReturn((MyResp(500), 'error'))
+        self.mox.ReplayAll()
+
+        for i in range(3):
+            self.http._cs_request(URL, 'POST')
+        self.assertEqual(client.CircuitBreaker.CLOSED,
+                         self.http.get_circuit_breaker(URL).state)
+
+
+class TestHTTPClientMultipleEndpoints(testtools.TestCase):
+    endpoints = ['http://a.test:9696', 'http://b.test:9696']
+
+    def setUp(self):
+        super(TestHTTPClientMultipleEndpoints, self).setUp()
+
+        self.mox = mox.Mox()
+        self.mox.StubOutWithMock(httplib2.Http, 'request')
+        self.addCleanup(self.mox.UnsetStubs)
+
+        self.http = HTTPClient(token=AUTH_TOKEN, endpoint_urls=self.endpoints)
+
+    def _expect(self, endpoint, method=METHOD):
+        return httplib2.Http.request(
+            endpoint + '/v2.0/test', method, headers=mox.IgnoreArg())
+
+    def test_round_robin(self):
+        for endpoint in self.endpoints * 2:
+            self._expect(endpoint).AndReturn((MyResp(200), ''))
+        self.mox.ReplayAll()
+
+        self.assertEqual(self.endpoints[0], self.http.endpoint_url)
+        for i in range(4):
+            self.http.do_request('/v2.0/test', METHOD)
+        self.mox.VerifyAll()
+
+    def test_failover_and_skip_unhealthy(self):
+        self.http.breaker_threshold = 1
+        self._expect(self.endpoints[0]).AndRaise(Exception('refused'))
+        self._expect(self.endpoints[1]).AndReturn((MyResp(200), ''))
+        # a.test is skipped while its circuit breaker is open
+        self._expect(self.endpoints[1]).AndReturn((MyResp(200), ''))
+        self.mox.ReplayAll()
+
+        self.http.do_request('/v2.0/test', METHOD)
+        self.http.do_request('/v2.0/test', METHOD)
+        self.mox.VerifyAll()
+
+    def test_default_threshold(self):
+        self.assertEqual(client.DEFAULT_ENDPOINT_BREAKER_THRESHOLD,
+                         self.http.breaker_threshold)
+        self.assertTrue(self.http.breaker_threshold > 1)
+
+    def test_all_unhealthy_least_recently_failed_tried(self):
+        self.http.breaker_threshold = 1
+        now = [1000.0]
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.client.time.time', lambda: now[0]))
+        for endpoint in reversed(self.endpoints):
+            self.http.get_circuit_breaker(endpoint).record_failure()
+            now[0] += 1
+        # b.test failed first, so it is tried, breaker open or not
+        self._expect(self.endpoints[1]).AndReturn((MyResp(200), 'ok'))
+        self.mox.ReplayAll()
+
+        resp, body = self.http.do_request('/v2.0/test', METHOD)
+        self.assertEqual('ok', body)
+        self.mox.VerifyAll()
+        breaker = self.http.get_circuit_breaker(self.endpoints[1])
+        self.assertEqual(client.CircuitBreaker.CLOSED, breaker.state)
+
+    def test_probing_endpoint_skipped(self):
+        breaker = self.http.get_circuit_breaker(self.endpoints[0])
+        breaker.reset_timeout = 0
+        for i in range(self.http.breaker_threshold):
+            breaker.record_failure()
+        # A probe of a.test is in progress
+        self.assertTrue(breaker.allow())
+        self._expect(self.endpoints[1], 'POST').AndReturn((MyResp(201), ''))
+        self.mox.ReplayAll()
+
+        self.http.do_request('/v2.0/test', 'POST')
+        self.mox.VerifyAll()
+
+    def test_post_sent_to_next_endpoint_on_circuit_open(self):
+        breaker = self.http.get_circuit_breaker(self.endpoints[0])
+        # The breaker opened after the endpoints were ordered
+        self.mox.StubOutWithMock(breaker, 'allow')
+        breaker.allow().AndReturn(False)
+        self._expect(self.endpoints[1], 'POST').AndReturn((MyResp(201), ''))
+        self.mox.ReplayAll()
+
+        self.http.do_request('/v2.0/test', 'POST')
+        self.mox.VerifyAll()
+
+    def test_down_endpoint_not_probed_by_every_other_post(self):
+        self.http.breaker_threshold = 1
+        now = [1000.0]
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.client.time.time', lambda: now[0]))
+        self.http.get_circuit_breaker(self.endpoints[0]).record_failure()
+        now[0] += client.DEFAULT_BREAKER_RESET_TIMEOUT
+        self._expect(self.endpoints[0], 'POST').AndRaise(Exception('down'))
+        for i in range(3):
+            self._expect(self.endpoints[1], 'POST').AndReturn(
+                (MyResp(201), ''))
+        self.mox.ReplayAll()
+
+        self.assertRaises(exceptions.ConnectionFailed,
+                          self.http.do_request, '/v2.0/test', 'POST')
+        for i in range(3):
+            self.http.do_request('/v2.0/test', 'POST')
+        self.mox.VerifyAll()
+
+    def test_failed_post_not_counted(self):
+        self.http.breaker_threshold = 1
+        for endpoint in self.endpoints:
+            self._expect(endpoint, 'POST').AndReturn((MyResp(500), ''))
+        self._expect(self.endpoints[0]).AndReturn((MyResp(200), ''))
+        self.mox.ReplayAll()
+
+        self.http.do_request('/v2.0/test', 'POST')
+        self.http.do_request('/v2.0/test', 'POST')
+        self.http.do_request('/v2.0/test', METHOD)
+        self.mox.VerifyAll()
+
+    def test_failover_on_unavailable(self):
+        self._expect(self.endpoints[0]).AndReturn((MyResp(503), ''))
+        self._expect(self.endpoints[1]).AndReturn((MyResp(200), 'ok'))
+        self.mox.ReplayAll()
+
+        resp, body = self.http.do_request('/v2.0/test', METHOD)
+        self.assertEqual('ok', body)
+        self.mox.VerifyAll()
+
+    def test_post_not_sent_twice(self):
+        self._expect(self.endpoints[0], 'POST').AndRaise(Exception('reset'))
+        self.mox.ReplayAll()
+
+        self.assertRaises(exceptions.ConnectionFailed,
+                          self.http.do_request, '/v2.0/test', 'POST')
+        self.mox.VerifyAll()
+
+    def test_least_outstanding(self):
+        self.http.endpoint_selection = client.LEAST_OUTSTANDING
+        self.http._outstanding[self.endpoints[0]] = 3
+        self.http._next_endpoint = 0
+        self._expect(self.endpoints[1]).AndReturn((MyResp(200), ''))
+        self.mox.ReplayAll()
+
+        self.http.do_request('/v2.0/test', METHOD)
+        self.mox.VerifyAll()
+        self.assertEqual({self.endpoints[0]: 3, self.endpoints[1]: 0},
+                         self.http._outstanding)
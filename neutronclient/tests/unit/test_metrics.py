@@ -0,0 +1,94 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import testtools
+
+from neutronclient import client
+from neutronclient.common import metrics
+
+ENDPOINT = 'http://neutron:9696/v2.0'
+ID = '6e2a3bc4-1111-4c2d-8e4c-2d3b1ac00a11'
+
+
+def _timing(method, path, status, total_time):
+    timing = client.RequestTiming(method, ENDPOINT + path)
+    timing.status = status
+    timing.total_time = total_time
+    return timing
+
+
+class TestRequestMetrics(testtools.TestCase):
+    def setUp(self):
+        super(TestRequestMetrics, self).setUp()
+        self.metrics = metrics.RequestMetrics(buckets=(0.1, 1.0))
+
+    def test_collection(self):
+        for path, collection in [
+                ('/ports.json', 'ports'),
+                ('/ports/%s.json' % ID, 'ports'),
+                ('/lb/pools/%s/health_monitors.json' % ID, 'pools'),
+                ('/lb/health_monitors.json', 'health_monitors'),
+                ('/network_profiles.json', 'network_profiles'),
+                ('/security-group-rules.json', 'security_group_rules'),
+                ('/tokens', metrics.OTHER_COLLECTION)]:
+            self.assertEqual(collection, self.metrics.collection(
+                _timing('GET', path, 200, 0).path))
+
+    def test_snapshot(self):
+        self.metrics(_timing('GET', '/ports.json', 200, 0.05))
+        self.metrics(_timing('GET', '/ports/%s.json' % ID, 200, 0.5))
+        self.metrics(_timing('DELETE', '/ports/%s.json' % ID, 404, 2))
+        self.metrics(_timing('GET', '/networks.json', None, 5))
+        self.assertEqual(
+            {('ports', 'GET', '2xx'): (2, 0.55, [1, 2, 2]),
+             ('ports', 'DELETE', '4xx'): (1, 2, [0, 0, 1]),
+             ('networks', 'GET', 'error'): (1, 5, [0, 0, 1])},
+            self.metrics.snapshot())
+
+    def test_prometheus_text(self):
+        self.metrics(_timing('GET', '/ports.json', 200, 0.5))
+        text = self.metrics.prometheus_text()
+        labels = 'collection="ports",method="GET",status="2xx"'
+        self.assertIn('neutronclient_requests_total{%s} 1\n' % labels, text)
+        self.assertIn('neutronclient_request_duration_seconds_bucket'
+                      '{%s,le="0.1"} 0\n' % labels, text)
+        self.assertIn('neutronclient_request_duration_seconds_bucket'
+                      '{%s,le="1.0"} 1\n' % labels, text)
+        self.assertIn('neutronclient_request_duration_seconds_bucket'
+                      '{%s,le="+Inf"} 1\n' % labels, text)
+        self.assertIn('neutronclient_request_duration_seconds_sum'
+                      '{%s} 0.5\n' % labels, text)
+        self.assertIn('# TYPE neutronclient_request_duration_seconds '
+                      'histogram\n', text)
+
+    def test_statsd_lines(self):
+        self.metrics(_timing('GET', '/ports.json', 200, 0.5))
+        self.metrics(_timing('GET', '/ports.json', 200, 0.25))
+        self.assertEqual(
+            ['neutronclient.requests.ports.GET.2xx:2|c',
+             'neutronclient.requests.ports.GET.2xx.duration:500.000|ms',
+             'neutronclient.requests.ports.GET.2xx.duration:250.000|ms'],
+            self.metrics.statsd_lines())
+        self.assertEqual([], self.metrics.statsd_lines())
+
+    def test_statsd_lines_sampled(self):
+        self.metrics.statsd_samples = 2
+        for i in range(4):
+            self.metrics(_timing('GET', '/ports.json', 200, 0.5))
+        lines = self.metrics.statsd_lines()
+        self.assertEqual('neutronclient.requests.ports.GET.2xx:4|c', lines[0])
+        sample = 'neutronclient.requests.ports.GET.2xx.duration:500.000|ms'
+        self.assertEqual([sample + '|@0.5000'] * 2, lines[1:])
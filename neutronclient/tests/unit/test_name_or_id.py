@@ -129,3 +129,80 @@ class CLITestNameorID(testtools.TestCase):
         except exceptions.NeutronClientException as ex:
             self.assertIn('Unable to find', ex.message)
             self.assertEqual(404, ex.status_code)
+
+    def test_get_id_from_cache(self):
+        name = 'myname'
+        _id = str(uuid.uuid4())
+        self.client.resolution_cache = neutronV20.ResolutionCache()
+        self.mox.StubOutWithMock(self.client, "list_networks")
+        self.client.list_networks(name=name, fields='id').AndReturn(
+            {'networks': [{'id': _id}]})
+        self.mox.ReplayAll()
+        for i in range(2):
+            returned_id = neutronV20.find_resourceid_by_name_or_id(
+                self.client, 'network', name)
+            self.assertEqual(_id, returned_id)
+
+    def test_cache_expires(self):
+        cache = neutronV20.ResolutionCache(ttl=0)
+        cache.put('network', 'myname', 'myid')
+        self.assertIsNone(cache.get('network', 'myname'))
+
+    def test_cache_invalidate(self):
+        cache = neutronV20.ResolutionCache()
+        cache.put('network', 'myname', 'myid')
+        cache.put('port', 'myname', 'myid')
+        cache.invalidate('network')
+        self.assertIsNone(cache.get('network', 'myname'))
+        self.assertEqual('myid', cache.get('port', 'myname'))
+
+    def test_trust_uuids(self):
+        _id = str(uuid.uuid4())
+        self.client.trust_uuids = True
+        self.mox.StubOutWithMock(self.client, "list_networks")
+        self.mox.ReplayAll()
+        returned_id = neutronV20.find_resourceid_by_name_or_id(
+            self.client, 'network', _id)
+        self.assertEqual(_id, returned_id)
+
+    def test_resolve_many(self):
+        id1 = str(uuid.uuid4())
+        id2 = str(uuid.uuid4())
+        id3 = str(uuid.uuid4())
+        self.mox.StubOutWithMock(self.client, "list_security_groups")
+        self.client.list_security_groups(id=[id1, id2], fields='id').AndReturn(
+            {'security_groups': [{'id': id1}]})
+        self.client.list_security_groups(
+            name=[id2, 'name3'], fields=['id', 'name']).AndReturn(
+                {'security_groups': [{'id': id3, 'name': 'name3'},
+                                     {'id': id2, 'name': id2}]})
+        self.mox.ReplayAll()
+        returned_ids = neutronV20.resolve_many(
+            self.client, 'security_group', [id1, id2, 'name3', id1])
+        self.assertEqual([id1, id2, id3, id1], returned_ids)
+
+    def test_resolve_many_uuid_prefixed_name(self):
+        _id = str(uuid.uuid4())
+        name = _id + '-backup'
+        self.mox.StubOutWithMock(self.client, "list_networks")
+        id2 = str(uuid.uuid4())
+        self.client.list_networks(
+            name=[name, 'name2'], fields=['id', 'name']).AndReturn(
+                {'networks': [{'id': _id, 'name': name},
+                              {'id': id2, 'name': 'name2'}]})
+        self.mox.ReplayAll()
+        returned_ids = neutronV20.resolve_many(self.client, 'network',
+                                               [name, 'name2'])
+        self.assertEqual([_id, id2], returned_ids)
+
+    def test_resolve_many_name_notfound(self):
+        self.mox.StubOutWithMock(self.client, "list_networks")
+        self.client.list_networks(
+            name=['name1', 'name2'], fields=['id', 'name']).AndReturn(
+                {'networks': [{'id': str(uuid.uuid4()), 'name': 'name1'}]})
+        self.mox.ReplayAll()
+        ex = self.assertRaises(exceptions.NeutronClientException,
+                               neutronV20.resolve_many, self.client,
+                               'network', ['name1', 'name2'])
+        self.assertIn('name2', ex.message)
+        self.assertEqual(404, ex.status_code)
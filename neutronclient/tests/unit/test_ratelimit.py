@@ -0,0 +1,75 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import fixtures
+import testtools
+
+from neutronclient.common import exceptions
+from neutronclient.common import ratelimit
+
+
+class RateLimiterTest(testtools.TestCase):
+
+    def setUp(self):
+        super(RateLimiterTest, self).setUp()
+        self.now = 1000.0
+        self.delays = []
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.common.ratelimit.time.time', lambda: self.now))
+        # Time does not pass while sleeping, as if requests were made
+        # from several threads at once
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.common.ratelimit.time.sleep', self.delays.append))
+
+    def test_burst_then_rate(self):
+        limiter = ratelimit.RateLimiter(rate=(2, 3))
+        for i in range(5):
+            limiter.acquire('GET')
+        # The waiting requests are served in turn
+        self.assertEqual([0.5, 1], self.delays)
+
+    def test_tokens_refill(self):
+        limiter = ratelimit.RateLimiter(rate=1)
+        limiter.acquire('GET')
+        self.now += 1
+        limiter.acquire('GET')
+        self.assertEqual([], self.delays)
+
+    def test_method_and_collection(self):
+        limiter = ratelimit.RateLimiter(methods={'post': 1},
+                                        collections={'ports': 1})
+        limiter.acquire('POST', 'networks')
+        limiter.acquire('GET', 'ports')
+        limiter.acquire('GET', 'networks')
+        self.assertEqual([], self.delays)
+        limiter.acquire('POST', 'ports')
+        self.assertEqual([1], self.delays)
+
+    def test_fail_fast(self):
+        limiter = ratelimit.RateLimiter(rate=1, block=False)
+        limiter.acquire('GET')
+        self.assertRaises(exceptions.RateLimited, limiter.acquire, 'GET')
+        self.now += 1
+        limiter.acquire('GET')
+        self.assertEqual([], self.delays)
+
+    def test_max_wait(self):
+        limiter = ratelimit.RateLimiter(rate=2, max_wait=0.5)
+        limiter.acquire('GET')
+        limiter.acquire('GET')
+        limiter.acquire('GET')
+        self.assertRaises(exceptions.RateLimited, limiter.acquire, 'GET')
+        self.assertEqual([0.5], self.delays)
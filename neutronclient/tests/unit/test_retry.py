@@ -0,0 +1,84 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+from email import utils as email_utils
+import time
+
+import fixtures
+import testtools
+
+from neutronclient.common import retry
+
+
+class BackoffDelayTest(testtools.TestCase):
+
+    def test_exponential(self):
+        delays = [retry.backoff_delay(i, 0.5, jitter=False)
+                  for i in range(4)]
+        self.assertEqual([0.5, 1, 2, 4], delays)
+
+    def test_max_interval(self):
+        self.assertEqual(3, retry.backoff_delay(5, 1, 3, jitter=False))
+
+    def test_jitter(self):
+        for i in range(20):
+            delay = retry.backoff_delay(3, 1)
+            self.assertTrue(0 <= delay <= 8)
+
+
+class ParseRetryAfterTest(testtools.TestCase):
+
+    def test_seconds(self):
+        self.assertEqual(120, retry.parse_retry_after('120'))
+
+    def test_date(self):
+        date = email_utils.formatdate(time.time() + 60, usegmt=True)
+        self.assertTrue(55 <= retry.parse_retry_after(date) <= 60)
+
+    def test_invalid(self):
+        self.assertIsNone(retry.parse_retry_after(None))
+        self.assertIsNone(retry.parse_retry_after('soon'))
+
+
+class RetryBudgetTest(testtools.TestCase):
+
+    def setUp(self):
+        super(RetryBudgetTest, self).setUp()
+        self.now = 1000.0
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.common.retry.time.time', lambda: self.now))
+
+    def test_min_retries(self):
+        budget = retry.RetryBudget(ratio=0, min_retries=2)
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+
+    def test_ratio_of_requests(self):
+        budget = retry.RetryBudget(ratio=0.5, min_retries=0)
+        for i in range(4):
+            budget.record_request()
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+
+    def test_window(self):
+        budget = retry.RetryBudget(ratio=0, min_retries=1, window=10)
+        self.assertTrue(budget.withdraw())
+        self.now += 5
+        self.assertFalse(budget.withdraw())
+        self.now += 6
+        self.assertTrue(budget.withdraw())
@@ -0,0 +1,98 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import testtools
+
+from neutronclient.common import exceptions
+from neutronclient.common import serializer
+from neutronclient.openstack.common import jsonutils
+
+
+class FakeCodec(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def dumps(self, obj, default=None):
+        self.calls.append('dumps')
+        return jsonutils.dumps(obj, default=default)
+
+    def loads(self, s):
+        self.calls.append('loads')
+        return jsonutils.loads(s)
+
+
+class SerializerTest(testtools.TestCase):
+
+    def setUp(self):
+        super(SerializerTest, self).setUp()
+        serializers = serializer._serializers.copy()
+        deserializers = serializer._deserializers.copy()
+        codec = serializer._json_codec
+
+        def restore():
+            serializer._serializers = serializers
+            serializer._deserializers = deserializers
+            serializer._json_codec = codec
+            serializer._registry_generation += 1
+        self.addCleanup(restore)
+
+    def test_handlers_are_reused(self):
+        s = serializer.Serializer()
+        for content_type in ('application/json', 'application/xml'):
+            self.assertIs(s._get_serialize_handler(content_type),
+                          s._get_serialize_handler(content_type))
+            self.assertIs(s.get_deserialize_handler(content_type),
+                          s.get_deserialize_handler(content_type))
+
+    def test_json_round_trip(self):
+        s = serializer.Serializer()
+        data = {'network': {'name': 'net1', 'admin_state_up': True}}
+        body = s.serialize(data, 'application/json')
+        self.assertEqual(data,
+                         s.deserialize(body, 'application/json')['body'])
+
+    def test_unknown_content_type(self):
+        s = serializer.Serializer()
+        self.assertRaises(exceptions.InvalidContentType,
+                          s.serialize, {}, 'application/yaml')
+        self.assertRaises(exceptions.InvalidContentType,
+                          s.deserialize, '', 'application/yaml')
+
+    def test_set_json_codec(self):
+        s = serializer.Serializer()
+        s.serialize({'a': 1}, 'application/json')
+        codec = FakeCodec()
+        serializer.set_json_codec(codec)
+        body = s.serialize({'a': 1}, 'application/json')
+        self.assertEqual({'a': 1},
+                         s.deserialize(body, 'application/json')['body'])
+        self.assertEqual(['dumps', 'loads'], codec.calls)
+
+    def test_register_content_type(self):
+        class TextSerializer(object):
+            def __init__(self, metadata):
+                self.metadata = metadata
+
+            def serialize(self, data):
+                return str(data)
+
+        serializer.register_content_type('text/plain', TextSerializer,
+                                         TextSerializer)
+        s = serializer.Serializer({'plurals': {}})
+        self.assertEqual("{'a': 1}", s.serialize({'a': 1}, 'text/plain'))
+        self.assertEqual({'plurals': {}},
+                         s._get_serialize_handler('text/plain').metadata)
@@ -18,14 +18,22 @@ import cStringIO
 import os
 import re
 import sys
+import time
 
 import fixtures
+import httplib2
 import mox
 import testtools
 from testtools import matchers
 
+from neutronclient import client
+from neutronclient.common import clientmanager
 from neutronclient.common import exceptions
+from neutronclient.neutron.v2_0 import network
 from neutronclient import shell as openstack_shell
+from neutronclient.tests.unit.test_cli20 import MyResp
+from neutronclient.tests.unit.test_http import FakeConnection
+from neutronclient.v2_0 import client as v2_client
 
 
 DEFAULT_USERNAME = 'username'
@@ -35,6 +43,7 @@ DEFAULT_TENANT_NAME = 'tenant_name'
 DEFAULT_AUTH_URL = 'http://127.0.0.1:5000/v2.0/'
 DEFAULT_TOKEN = '3bcc3d3a03f44e3d8377f9247b0ad155'
 DEFAULT_URL = 'http://quantum.example.org:9696/'
+CONN_KEY = 'http:quantum.example.org:9696'
 
 
 class NoExitArgumentParser(argparse.ArgumentParser):
@@ -143,6 +152,59 @@ class ShellTest(testtools.TestCase):
         self.mox.UnsetStubs()
         self.assertEqual(ret, 0)
 
+    def test_commands_loaded_lazily(self):
+        neutron_shell = openstack_shell.NeutronShell('2.0')
+        entry = neutron_shell.command_manager.commands['net-list']
+        self.assertIsInstance(entry, openstack_shell.LazyCommand)
+        cmd_factory, name, argv = neutron_shell.command_manager.find_command(
+            ['net-list', '-c', 'id'])
+        self.assertIs(network.ListNetwork, cmd_factory)
+        self.assertEqual(['-c', 'id'], argv)
+
+    def test_all_commands_load(self):
+        neutron_shell = openstack_shell.NeutronShell('2.0')
+        for name in openstack_shell.COMMAND_V2:
+            entry = neutron_shell.command_manager.commands[name]
+            self.assertTrue(callable(entry.load()), name)
+
+    def _bash_completion(self, *args):
+        orig = sys.stdout
+        try:
+            sys.stdout = cStringIO.StringIO()
+            openstack_shell.NeutronShell('2.0').run(
+                ['bash-completion'] + list(args))
+            return sys.stdout.getvalue().split()
+        finally:
+            sys.stdout = orig
+
+    def test_bash_completion_cached(self):
+        home = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable('HOME', home))
+        words = self._bash_completion()
+        self.assertIn('net-create', words)
+        self.assertIn('--admin-state-down', words)
+        self.assertIn('--os-token', words)
+
+        path = os.path.join(home, '.neutronclient', 'bash-completion')
+        with open(path) as f:
+            cache = f.read()
+        with open(path, 'w') as f:
+            f.write(cache.replace('--admin-state-down', '--from-cache'))
+        self.assertIn('--from-cache', self._bash_completion())
+
+        with open(path, 'w') as f:
+            f.write(cache.replace('#version', '#version\t0'))
+        self.assertIn('--admin-state-down', self._bash_completion())
+
+    def test_bash_completion_command(self):
+        home = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable('HOME', home))
+        words = self._bash_completion('net-create')
+        self.assertIn('--admin-state-down', words)
+        self.assertIn('--os-token', words)
+        self.assertNotIn('--fixed-ip', words)
+        self.assertNotIn('net-create', words)
+
     def test_endpoint_option(self):
         shell = openstack_shell.NeutronShell('2.0')
         parser = shell.build_option_parser('descr', '2.0')
@@ -170,3 +232,136 @@ class ShellTest(testtools.TestCase):
         # --endpoint-type and $OS_ENDPOINT_TYPE
         namespace = parser.parse_args(['--endpoint-type=admin'])
         self.assertEqual('admin', namespace.endpoint_type)
+
+    def test_timings(self):
+        neutron_shell = openstack_shell.NeutronShell('2.0')
+        neutron_shell.stderr = cStringIO.StringIO()
+        timing = client.RequestTiming('GET',
+                                      'http://neutron:9696/v2.0/ports.json')
+        timing.status = 200
+        timing.bytes_in = 12
+        timing.total_time = 0.25
+        neutron_shell.timings.append(timing)
+        neutron_shell.print_timings(1.0)
+        output = neutron_shell.stderr.getvalue()
+        self.assertIn('neutron:9696', output)
+        self.assertIn('/v2.0/ports.json', output)
+        self.assertIn('0.250', output)
+        self.assertIn('1 requests in 0.250s, command took 1.000s', output)
+
+
+def _set_client_handle(test, neutron):
+    # The client is kept by the class of ClientManager
+    cache = clientmanager.ClientManager.__dict__['neutron']
+    test.addCleanup(setattr, cache, '_handle', cache._handle)
+    cache._handle = neutron
+
+
+class ShellBatchTest(testtools.TestCase):
+
+    def setUp(self):
+        super(ShellBatchTest, self).setUp()
+        for var in ShellTest.FAKE_ENV:
+            self.useFixture(
+                fixtures.EnvironmentVariable(
+                    var, ShellTest.FAKE_ENV[var]))
+        self.stdout = cStringIO.StringIO()
+        self.shell = openstack_shell.NeutronShell('2.0')
+        self.shell.stdout = self.stdout
+        self.commands = []
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.shell.NeutronShell.run_subcommand',
+            self._run_subcommand))
+        self.neutron = v2_client.Client(token=DEFAULT_TOKEN,
+                                        endpoint_url=DEFAULT_URL)
+        _set_client_handle(self, self.neutron)
+
+    def _run_subcommand(self, argv):
+        self.commands.append(argv)
+        if argv[0] == 'slow':
+            time.sleep(0.1)
+        if argv[0] == 'format':
+            # As commands given --request-format do
+            self.neutron.format = argv[1]
+            time.sleep(0.05)
+            argv = [self.neutron.format]
+        self.shell.stdout.write('%s\n' % ' '.join(argv))
+        return argv[0] == 'bad' and 1 or 0
+
+    def _write_batch(self, lines):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path, 'b')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines))
+        return path
+
+    def test_batch(self):
+        path = self._write_batch(['net-list', '# comment', '',
+                                  "net-show 'my net'"])
+        self.assertEqual(0, self.shell.run(['--batch', path]))
+        self.assertEqual([['net-list'], ['net-show', 'my net']],
+                         self.commands)
+        self.assertEqual('net-list\nnet-show my net\n',
+                         self.stdout.getvalue())
+
+    def test_batch_concurrent_output_in_order(self):
+        path = self._write_batch(['slow 1', 'net-list 2', 'bad 3', 'wait',
+                                  'net-list 4'])
+        self.assertEqual(1, self.shell.run(['--batch', path,
+                                            '--batch-workers', '3']))
+        self.assertEqual('slow 1\nnet-list 2\nbad 3\nnet-list 4\n',
+                         self.stdout.getvalue())
+        self.assertIs(self.stdout, self.shell.stdout)
+
+    def test_batch_concurrent_request_formats(self):
+        path = self._write_batch(['format xml', 'format json'])
+        self.assertEqual(0, self.shell.run(['--batch', path,
+                                            '--batch-workers', '2']))
+        self.assertEqual('xml\njson\n', self.stdout.getvalue())
+        self.assertEqual('json', self.neutron.format)
+
+    def test_batch_with_command(self):
+        path = self._write_batch(['net-list'])
+        self.assertEqual(1, self.shell.run(['--batch', path, 'net-list']))
+        self.assertEqual([], self.commands)
+
+
+class ShellBatchKeepaliveTest(testtools.TestCase):
+
+    def setUp(self):
+        super(ShellBatchKeepaliveTest, self).setUp()
+        self.useFixture(fixtures.EnvironmentVariable('OS_TOKEN',
+                                                     DEFAULT_TOKEN))
+        self.useFixture(fixtures.EnvironmentVariable('OS_URL', DEFAULT_URL))
+        self.shell = openstack_shell.NeutronShell('2.0')
+        self.shell.stdout = cStringIO.StringIO()
+        self.mox = mox.Mox()
+        self.mox.StubOutWithMock(httplib2.Http, 'request')
+        self.addCleanup(self.mox.UnsetStubs)
+        self.conn = FakeConnection()
+        self.neutron = None
+        _set_client_handle(self, None)
+
+    def _request(self, *args, **kwargs):
+        self.neutron = self.shell.client_manager.neutron
+        connections = self.neutron.httpclient.connections
+        # The connection of the first line is still there for the second
+        self.assertIs(self.conn,
+                      connections.setdefault(CONN_KEY, self.conn))
+
+    def test_connections_reused_between_lines(self):
+        # Answers the lookup of the name and the show alike
+        body = ('{"networks": [{"id": "x", "name": "x"}],'
+                ' "network": {"id": "x", "name": "x"}}')
+        httplib2.Http.request(
+            mox.IgnoreArg(), 'GET', body=None, headers=mox.IgnoreArg()
+        ).MultipleTimes().WithSideEffects(self._request).AndReturn(
+            (MyResp(200), body))
+        self.mox.ReplayAll()
+
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path, 'b')
+        with open(path, 'w') as f:
+            f.write('net-show x\nnet-show x\n')
+        self.assertEqual(0, self.shell.run(['--batch', path]))
+        self.mox.VerifyAll()
+        self.assertIsNotNone(self.neutron.httpclient.connection_pool)
+        self.assertFalse(self.conn.closed)
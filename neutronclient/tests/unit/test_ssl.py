@@ -61,6 +61,12 @@ class TestSSL(testtools.TestCase):
             url=mox.IgnoreArg(),
             username=mox.IgnoreArg(),
             log_credentials=mox.IgnoreArg(),
+            token_cache=mox.IgnoreArg(),
+            resolution_cache=mox.IgnoreArg(),
+            trust_uuids=mox.IgnoreArg(),
+            list_workers=mox.IgnoreArg(),
+            timing_hooks=mox.IgnoreArg(),
+            keepalive=mox.IgnoreArg(),
         )
         openstack_shell.NeutronShell.interact().AndReturn(0)
         self.mox.ReplayAll()
@@ -90,6 +96,12 @@ class TestSSL(testtools.TestCase):
             url=mox.IgnoreArg(),
             username=mox.IgnoreArg(),
             log_credentials=mox.IgnoreArg(),
+            token_cache=mox.IgnoreArg(),
+            resolution_cache=mox.IgnoreArg(),
+            trust_uuids=mox.IgnoreArg(),
+            list_workers=mox.IgnoreArg(),
+            timing_hooks=mox.IgnoreArg(),
+            keepalive=mox.IgnoreArg(),
         )
         openstack_shell.NeutronShell.interact().AndReturn(0)
         self.mox.ReplayAll()
@@ -110,7 +122,10 @@ class TestSSL(testtools.TestCase):
             region_name=mox.IgnoreArg(),
             tenant_name=mox.IgnoreArg(),
             token=mox.IgnoreArg(),
+            token_cache=mox.IgnoreArg(),
             username=mox.IgnoreArg(),
+            timing_hooks=mox.IgnoreArg(),
+            keepalive=mox.IgnoreArg(),
         )
         self.mox.ReplayAll()
 
@@ -0,0 +1,64 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+import testtools
+
+from neutronclient.common import threadpool
+
+
+class TestThreadPool(testtools.TestCase):
+    def setUp(self):
+        super(TestThreadPool, self).setUp()
+        self.pool = threadpool.ThreadPool(2)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_submit_result(self):
+        future = self.pool.submit(lambda x, y=0: x + y, 1, y=2)
+        self.assertEqual(3, future.result())
+        self.assertTrue(future.done())
+        self.assertIsNone(future.exception())
+
+    def test_submit_exception(self):
+        def fail():
+            raise ValueError('error msg')
+        future = self.pool.submit(fail)
+        self.assertRaises(ValueError, future.result)
+        self.assertIsInstance(future.exception(), ValueError)
+
+    def test_map_keeps_order(self):
+        self.assertEqual([1, 4, 9], self.pool.map(lambda x: x * x, [1, 2, 3]))
+
+    def test_calls_run_concurrently(self):
+        barrier = threading.Event()
+
+        def wait():
+            return barrier.wait(5) or barrier.is_set()
+
+        waiting = self.pool.submit(wait)
+        self.pool.submit(barrier.set).result()
+        self.assertTrue(waiting.result())
+
+    def test_done_callback(self):
+        results = []
+        future = self.pool.submit(lambda: 'done')
+        future.result()
+        future.add_done_callback(lambda f: results.append(f.result()))
+        self.assertEqual(['done'], results)
+
+    def test_submit_after_shutdown(self):
+        self.pool.shutdown()
+        self.assertRaises(RuntimeError, self.pool.submit, lambda: None)
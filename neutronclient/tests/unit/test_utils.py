@@ -14,8 +14,11 @@
 #    under the License.
 
 import datetime
+import os
+import stat
 import sys
 
+import fixtures
 import testtools
 
 from neutronclient.common import exceptions
@@ -118,6 +121,27 @@ class JSONUtilsTestCase(testtools.TestCase):
         self.assertEqual(utils.loads('{"a": "b"}'), {'a': 'b'})
 
 
+class WriteFileAtomicallyTestCase(testtools.TestCase):
+    def setUp(self):
+        super(WriteFileAtomicallyTestCase, self).setUp()
+        self.dir = self.useFixture(fixtures.TempDir()).path
+        self.path = os.path.join(self.dir, 'file')
+
+    def test_write(self):
+        utils.write_file_atomically(self.path, 'old')
+        utils.write_file_atomically(self.path, 'new')
+        with open(self.path) as f:
+            self.assertEqual('new', f.read())
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(self.path).st_mode))
+        self.assertEqual(['file'], os.listdir(self.dir))
+
+    def test_write_failure(self):
+        os.mkdir(self.path)
+        self.assertRaises(OSError, utils.write_file_atomically,
+                          self.path, 'content')
+        self.assertEqual(['file'], os.listdir(self.dir))
+
+
 class ToPrimitiveTestCase(testtools.TestCase):
     def test_list(self):
         self.assertEqual(utils.to_primitive([1, 2, 3]), [1, 2, 3])
@@ -167,6 +191,19 @@ class ToPrimitiveTestCase(testtools.TestCase):
         ret = utils.to_primitive(x)
         self.assertEqual(len(ret), 3)
 
+    def test_path_template(self):
+        self.assertEqual(
+            '/v2.0/ports/{id}.json',
+            utils.path_template('http://neutron:9696/v2.0/ports/'
+                                '6e2a3bc4-1111-4c2d-8e4c-2d3b1ac00a11.json'
+                                '?fields=id'))
+        self.assertEqual(
+            '/v2.0/tokens/{id}/endpoints',
+            utils.path_template('http://keystone:5000/v2.0/tokens/'
+                                '0123456789abcdef0123456789abcdef/endpoints'))
+        self.assertEqual('/v2.0/ports.json',
+                         utils.path_template('/v2.0/ports.json'))
+
     def test_to_primitive_dict_with_date_value(self):
         x = datetime.datetime(1920, 2, 3, 4, 5, 6, 7)
         res = utils.to_primitive({'a': x})
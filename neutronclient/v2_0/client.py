@@ -14,17 +14,30 @@
 #    under the License.
 #
 
+import collections
+import contextlib
+import copy
 import httplib
+import inspect
+import itertools
+import json
 import logging
+import re
+import sys
+import threading
 import time
 import urllib
 import urlparse
 
+import six
+
 from neutronclient import client
 from neutronclient.common import _
 from neutronclient.common import constants
 from neutronclient.common import exceptions
+from neutronclient.common import retry
 from neutronclient.common import serializer
+from neutronclient.common import threadpool
 from neutronclient.common import utils
 
 
@@ -42,6 +55,27 @@ NEUTRON_ERRORS = {
     'ExternalIpAddressExhausted': exceptions.ExternalIpAddressExhaustedClient,
 }
 
+# Resources created by each request of a bulk create
+DEFAULT_BULK_CHUNK_SIZE = 100
+# Requests run at the same time by bulk updates and deletes
+DEFAULT_BULK_WORKERS = 10
+# Responses after which idempotent requests are retried
+RETRY_STATUS_CODES = (httplib.BAD_GATEWAY, httplib.SERVICE_UNAVAILABLE,
+                      httplib.GATEWAY_TIMEOUT)
+
+_FORMAT_SUFFIX = re.compile(r'\.(json|xml)$')
+# (path, collection) of the collections of each client class
+_COLLECTION_PATHS = {}
+# Result of a coalesced GET whose request was interrupted
+_GET_ABORTED = object()
+
+BulkResult = collections.namedtuple('BulkResult', ['item', 'result', 'error'])
+"""Outcome of a bulk operation for one item.
+
+result is the response for the item, or None and error the
+NeutronClientException raised for it.
+"""
+
 
 def exception_handler_v20(status_code, error_content):
     """Exception handler for API v2.0 client
@@ -104,15 +138,22 @@ class APIParamsCall(object):
 
     def __get__(self, instance, owner):
         def with_params(*args, **kwargs):
-            _format = instance.format
-            if 'format' in kwargs:
-                instance.format = kwargs['format']
-            ret = self.function(instance, *args, **kwargs)
-            instance.format = _format
-            return ret
+            if 'format' not in kwargs:
+                return self.function(instance, *args, **kwargs)
+            with instance._request_format(kwargs['format']):
+                return self.function(instance, *args, **kwargs)
         return with_params
 
 
+def _get_api_method(cls, name):
+    """Return the APIParamsCall named name of cls, or None."""
+    for klass in cls.__mro__:
+        if name in klass.__dict__:
+            attr = klass.__dict__[name]
+            return attr if isinstance(attr, APIParamsCall) else None
+    return None
+
+
 class Client(object):
 
     """Client for the OpenStack Neutron v2.0 API.
@@ -136,6 +177,58 @@ class Client(object):
                             http requests. (optional)
     :param bool insecure: SSL certificate validation. (optional)
     :param string ca_cert: SSL CA bundle file to use. (optional)
+    :param bool keepalive: Reuse HTTP connections across requests instead
+                           of opening a new one for every request.
+                           (optional)
+    :param integer pool_maxsize: Maximum number of idle connections kept
+                                 per host when keepalive is set. (optional)
+    :param integer pool_idle_timeout: Seconds an idle connection is kept
+                                      when keepalive is set. (optional)
+    :param token_cache: A tokencache.TokenCache used to share tokens
+                        between clients and processes. (optional)
+    :param string attr_metadata_file: File keeping the extension namespaces
+                                      used for XML requests between
+                                      processes. (optional)
+    :param integer token_refresh_skew: Seconds before its expiry a token
+                                       is renewed, None to only renew
+                                       refused tokens. (optional)
+    :param integer list_workers: Requests run at the same time when a list
+                                 is split because its filters do not fit
+                                 in one URI. (optional)
+    :param integer breaker_threshold: Consecutive failures of an endpoint
+                                      after which its requests fail at once
+                                      with CircuitOpen, None to always send
+                                      them. (optional)
+    :param integer breaker_reset_timeout: Seconds before a request is sent
+                                          again to an endpoint whose circuit
+                                          breaker opened. (optional)
+    :param list endpoint_urls: Several URLs of the service to spread the
+                               requests over, instead of endpoint_url.
+                               (optional)
+    :param bool multiple_endpoints: Use every endpoint of the service
+                                    catalog matching the region instead of
+                                    requiring a single one. (optional)
+    :param string endpoint_selection: With several endpoints, send each
+                                      request to the next one in turn
+                                      ('round-robin', default) or to the one
+                                      with the fewest requests in progress
+                                      ('least-outstanding'). Endpoints whose
+                                      circuit breaker is open are skipped
+                                      unless all of them are, and failed
+                                      idempotent requests are sent to the
+                                      next endpoint. (optional)
+    :param list timing_hooks: Callables given a client.RequestTiming after
+                              each HTTP request, with its method, path
+                              template, status, sizes, and connect, first
+                              byte and total times. (optional)
+    :param rate_limiter: A ratelimit.RateLimiter the requests wait for, or
+                         fail with RateLimited, when they exceed its rates.
+                         It can be shared between clients. (optional)
+    :param response_cache: A cache.ResponseCache keeping the responses of
+                           GET requests of the collections it is given,
+                           such as 'extensions'. Writes to a collection
+                           through the client drop its responses.
+                           (optional)
 
     Example::
 
@@ -148,6 +241,12 @@ class Client(object):
         nets = neutron.list_networks()
         ...
 
+    Paginated collections can also be walked one resource at a time
+    without loading them whole, e.g.::
+
+        for port in neutron.iter_ports(prefetch=True, device_owner=OWNER):
+            ...
+
     """
 
     networks_path = "/networks"
@@ -260,19 +359,70 @@ class Client(object):
                      }
     # 8192 Is the default max URI len for eventlet.wsgi.server
     MAX_URI_LEN = 8192
+    # Query parameters which are not filters and must not be split
+    UNSPLIT_PARAMS = ('fields', 'sort_key', 'sort_dir')
+    # Room kept in split requests for the marker of the following pages
+    PAGINATION_URI_ALLOWANCE = 64
+    # Used by the CLI to find resources by name or id: a
+    # neutron.v2_0.ResolutionCache, and whether ids which are well-formed
+    # UUIDs are used without checking that they exist
+    resolution_cache = None
+    trust_uuids = False
+    # Shared by all the clients of the process unless set on one
+    retry_budget = retry.RetryBudget()
 
     def get_attr_metadata(self):
         if self.format == 'json':
             return {}
-        old_request_format = self.format
-        self.format = 'json'
-        exts = self.list_extensions()['extensions']
-        self.format = old_request_format
+        if self._attr_metadata is None:
+            ns = self._get_extension_namespaces()
+            self.EXTED_PLURALS.update(constants.PLURALS)
+            self._attr_metadata = {'plurals': self.EXTED_PLURALS,
+                                   'xmlns': constants.XML_NS_V20,
+                                   constants.EXT_NS: ns}
+        return self._attr_metadata
+
+    def invalidate_attr_metadata(self):
+        """Forget the cached extension namespaces used for XML.
+
+        They are fetched again by the next XML request, e.g. after
+        extensions were enabled on the server.
+        """
+        self._attr_metadata = None
+        if self.attr_metadata_file:
+            cached = self._read_attr_metadata_file()
+            if cached.pop(self.httpclient.endpoint_url, None) is not None:
+                self._write_attr_metadata_file(cached)
+
+    def _get_extension_namespaces(self):
+        if self.attr_metadata_file:
+            self.httpclient.authenticate_and_fetch_endpoint_url()
+            cached = self._read_attr_metadata_file()
+            if self.httpclient.endpoint_url in cached:
+                return cached[self.httpclient.endpoint_url]
+        with self._request_format('json'):
+            exts = self.list_extensions()['extensions']
         ns = dict([(ext['alias'], ext['namespace']) for ext in exts])
-        self.EXTED_PLURALS.update(constants.PLURALS)
-        return {'plurals': self.EXTED_PLURALS,
-                'xmlns': constants.XML_NS_V20,
-                constants.EXT_NS: ns}
+        if self.attr_metadata_file:
+            cached = self._read_attr_metadata_file()
+            cached[self.httpclient.endpoint_url] = ns
+            self._write_attr_metadata_file(cached)
+        return ns
+
+    def _read_attr_metadata_file(self):
+        try:
+            with open(self.attr_metadata_file) as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return {}
+
+    def _write_attr_metadata_file(self, cached):
+        try:
+            utils.write_file_atomically(self.attr_metadata_file,
+                                        json.dumps(cached))
+        except (IOError, OSError) as e:
+            _logger.warning(_("Unable to write %(file)s: %(error)s"),
+                            {'file': self.attr_metadata_file, 'error': e})
 
     @APIParamsCall
     def get_quotas_tenant(self, **_params):
@@ -338,6 +488,23 @@ class Client(object):
         """Deletes the specified port."""
         return self.delete(self.port_path % (port))
 
+    @APIParamsCall
+    def bulk_create_ports(self, ports, chunk_size=DEFAULT_BULK_CHUNK_SIZE,
+                          workers=1):
+        """Creates many ports, chunk_size per request."""
+        return self.bulk_create('ports', self.ports_path, ports,
+                                chunk_size=chunk_size, workers=workers)
+
+    @APIParamsCall
+    def bulk_update_ports(self, updates, workers=DEFAULT_BULK_WORKERS):
+        """Updates many ports given as (port, body) pairs."""
+        return self.bulk_update(self.port_path, updates, workers=workers)
+
+    @APIParamsCall
+    def bulk_delete_ports(self, ports, workers=DEFAULT_BULK_WORKERS):
+        """Deletes many ports."""
+        return self.bulk_delete(self.port_path, ports, workers=workers)
+
     @APIParamsCall
     def list_networks(self, retrieve_all=True, **_params):
         """Fetches a list of all networks for a tenant."""
@@ -365,6 +532,23 @@ class Client(object):
         """Deletes the specified network."""
         return self.delete(self.network_path % (network))
 
+    @APIParamsCall
+    def bulk_create_networks(self, networks,
+                             chunk_size=DEFAULT_BULK_CHUNK_SIZE, workers=1):
+        """Creates many networks, chunk_size per request."""
+        return self.bulk_create('networks', self.networks_path, networks,
+                                chunk_size=chunk_size, workers=workers)
+
+    @APIParamsCall
+    def bulk_update_networks(self, updates, workers=DEFAULT_BULK_WORKERS):
+        """Updates many networks given as (network, body) pairs."""
+        return self.bulk_update(self.network_path, updates, workers=workers)
+
+    @APIParamsCall
+    def bulk_delete_networks(self, networks, workers=DEFAULT_BULK_WORKERS):
+        """Deletes many networks."""
+        return self.bulk_delete(self.network_path, networks, workers=workers)
+
     @APIParamsCall
     def list_subnets(self, retrieve_all=True, **_params):
         """Fetches a list of all networks for a tenant."""
@@ -391,6 +575,23 @@ class Client(object):
         """Deletes the specified subnet."""
         return self.delete(self.subnet_path % (subnet))
 
+    @APIParamsCall
+    def bulk_create_subnets(self, subnets, chunk_size=DEFAULT_BULK_CHUNK_SIZE,
+                            workers=1):
+        """Creates many subnets, chunk_size per request."""
+        return self.bulk_create('subnets', self.subnets_path, subnets,
+                                chunk_size=chunk_size, workers=workers)
+
+    @APIParamsCall
+    def bulk_update_subnets(self, updates, workers=DEFAULT_BULK_WORKERS):
+        """Updates many subnets given as (subnet, body) pairs."""
+        return self.bulk_update(self.subnet_path, updates, workers=workers)
+
+    @APIParamsCall
+    def bulk_delete_subnets(self, subnets, workers=DEFAULT_BULK_WORKERS):
+        """Deletes many subnets."""
+        return self.bulk_delete(self.subnet_path, subnets, workers=workers)
+
     @APIParamsCall
     def list_routers(self, retrieve_all=True, **_params):
         """Fetches a list of all routers for a tenant."""
@@ -1270,15 +1471,58 @@ class Client(object):
         """Update an ssl cert key."""
         return self.put(self.ssl_cert_key_path % cert_key, body=body)
 
-    def __init__(self, **kwargs):
+    def __init__(self, attr_metadata_file=None, list_workers=1,
+                 rate_limiter=None, response_cache=None, **kwargs):
         """Initialize a new client for the Neutron v2.0 API."""
         super(Client, self).__init__()
         self.httpclient = client.HTTPClient(**kwargs)
+        self.attr_metadata_file = attr_metadata_file
+        self.list_workers = list_workers
+        self.rate_limiter = rate_limiter
+        self.response_cache = response_cache
+        self._attr_metadata = None
+        self._serializers = {}
         self.version = '2.0'
+        self._local = threading.local()
         self.format = 'json'
         self.action_prefix = "/v%s" % (self.version)
         self.retries = 0
         self.retry_interval = 1
+        self.retry_max_interval = 30
+        self.retry_jitter = True
+        self.retry_max_time = None
+        self.coalesce_gets = True
+        # [future, waiters] of the GET requests in progress, by format
+        # and URL
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    @property
+    def format(self):
+        """The request format, 'json' or 'xml'.
+
+        A format given to a single call overrides it for the calling
+        thread only, so one client can be shared between threads. Within
+        _request_format(), setting it also changes it for the calling
+        thread only.
+        """
+        return getattr(self._local, 'format', None) or self._format
+
+    @format.setter
+    def format(self, value):
+        if getattr(self._local, 'format', None):
+            self._local.format = value
+        else:
+            self._format = value
+
+    @contextlib.contextmanager
+    def _request_format(self, _format):
+        old_format = getattr(self._local, 'format', None)
+        self._local.format = _format
+        try:
+            yield
+        finally:
+            self._local.format = old_format
 
     def _handle_fault_response(self, status_code, response_body):
         # Create exception with HTTP status code and message
@@ -1293,6 +1537,31 @@ class Client(object):
         # Raise the appropriate exception
         exception_handler_v20(status_code, des_error_body)
 
+    @classmethod
+    def collection(cls, path):
+        """Return the collection a request path belongs to, or None.
+
+        The collections are named after the *_path attributes of the
+        client, such as ports_path = "/ports". The requests of a member, or
+        of an action on it, belong to the collection of the member.
+        """
+        paths = _COLLECTION_PATHS.get(cls)
+        if paths is None:
+            paths = {}
+            for name in dir(cls):
+                value = getattr(cls, name)
+                if (name.endswith('_path') and isinstance(value, str) and
+                        '%' not in value):
+                    paths[value] = name[:-len('_path')]
+            # Longest first, the most specific path wins
+            paths = _COLLECTION_PATHS[cls] = sorted(
+                paths.items(), key=lambda item: -len(item[0]))
+        path = _FORMAT_SUFFIX.sub('', urlparse.urlparse(path).path)
+        for collection_path, name in paths:
+            if (path.endswith(collection_path) or
+                    collection_path + '/' in path):
+                return name
+
     def _check_uri_length(self, action):
         uri_len = len(self.httpclient.endpoint_url) + len(action)
         if uri_len > self.MAX_URI_LEN:
@@ -1312,8 +1581,15 @@ class Client(object):
 
         if body:
             body = self.serialize(body)
-        self.httpclient.content_type = self.content_type()
-        resp, replybody = self.httpclient.do_request(action, method, body=body)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(method, self.collection(action))
+        try:
+            resp, replybody = self.httpclient.do_request(
+                action, method, body=body, content_type=self.content_type())
+        finally:
+            if method != 'GET' and self.response_cache is not None:
+                # Even a failed write may have changed the collection
+                self.response_cache.invalidate(self.collection(action))
         status_code = self.get_status_code(resp)
         if status_code in (httplib.OK,
                            httplib.CREATED,
@@ -1321,7 +1597,13 @@ class Client(object):
                            httplib.NO_CONTENT):
             return self.deserialize(replybody, status_code)
         else:
-            self._handle_fault_response(status_code, replybody)
+            try:
+                self._handle_fault_response(status_code, replybody)
+            except exceptions.NeutronClientException as e:
+                if hasattr(resp, 'get'):
+                    e.retry_after = retry.parse_retry_after(
+                        resp.get('retry-after'))
+                raise
 
     def get_auth_info(self):
         return self.httpclient.get_auth_info()
@@ -1346,8 +1628,8 @@ class Client(object):
         if data is None:
             return None
         elif isinstance(data, dict):
-            return serializer.Serializer(
-                self.get_attr_metadata()).serialize(data, self.content_type())
+            return self._get_serializer().serialize(data,
+                                                    self.content_type())
         else:
             raise Exception(_("Unable to serialize object of type = '%s'") %
                             type(data))
@@ -1356,9 +1638,24 @@ class Client(object):
         """Deserializes an xml or json string into a dictionary."""
         if status_code == 204:
             return data
-        return serializer.Serializer(self.get_attr_metadata()).deserialize(
+        return self._get_serializer().deserialize(
             data, self.content_type())['body']
 
+    def _get_serializer(self):
+        """Return a Serializer for the current format and metadata.
+
+        It is kept until the attribute metadata changes so its handlers
+        are not rebuilt for every request.
+        """
+        metadata = self.get_attr_metadata()
+        _format = self.format
+        _serializer = self._serializers.get(_format)
+        if (_serializer is None or
+                (metadata and _serializer.metadata is not metadata)):
+            _serializer = serializer.Serializer(metadata)
+            self._serializers[_format] = _serializer
+        return _serializer
+
     def content_type(self, _format=None):
         """Returns the mime-type for either 'xml' or 'json'.
 
@@ -1371,20 +1668,61 @@ class Client(object):
                       headers=None, params=None):
         """Call do_request with the default retry configuration.
 
-        Only idempotent requests should retry failed connection attempts.
+        Only idempotent requests should retry failed connection attempts
+        and 502, 503 and 504 responses. The delay before attempt n is
+        retry_interval * 2 ** n, at most retry_max_interval, and with
+        retry_jitter a random part of that. A longer Retry-After of the
+        response is honored, up to retry_max_interval. Retrying stops
+        after retries attempts, when retry_max_time seconds would be
+        exceeded, or when retry_budget is spent.
         :raises: ConnectionFailed if the maximum # of retries is exceeded
         """
-        max_attempts = self.retries + 1
-        for i in range(max_attempts):
+        deadline = None
+        if self.retry_max_time is not None:
+            deadline = time.time() + self.retry_max_time
+        budget = self.retry_budget
+        if budget is not None:
+            budget.record_request()
+        exc_info = None
+        for i in range(self.retries + 1):
             try:
                 return self.do_request(method, action, body=body,
                                        headers=headers, params=params)
+            except exceptions.CircuitOpen:
+                # The endpoint failed repeatedly, fail fast
+                raise
             except exceptions.ConnectionFailed:
                 # Exception has already been logged by do_request()
-                if i < self.retries:
-                    _logger.debug(_('Retrying connection to Neutron service'))
-                    time.sleep(self.retry_interval)
+                exc_info = None
+                retry_after = None
+            except exceptions.NeutronClientException as e:
+                if e.status_code not in RETRY_STATUS_CODES:
+                    raise
+                exc_info = sys.exc_info()
+                retry_after = getattr(e, 'retry_after', None)
+            if i >= self.retries:
+                break
+            delay = retry.backoff_delay(i, self.retry_interval,
+                                        self.retry_max_interval,
+                                        self.retry_jitter)
+            if retry_after is not None:
+                # The server may not make the client wait for ever
+                if self.retry_max_interval is not None:
+                    retry_after = min(retry_after, self.retry_max_interval)
+                delay = max(delay, retry_after)
+            if deadline is not None and time.time() + delay > deadline:
+                _logger.debug(_('Not retrying, the retry time would exceed '
+                                '%s seconds'), self.retry_max_time)
+                break
+            if budget is not None and not budget.withdraw():
+                _logger.debug(_('Not retrying, the retry budget is spent'))
+                break
+            _logger.debug(_('Retrying connection to Neutron service in '
+                            '%.1f seconds'), delay)
+            time.sleep(delay)
 
+        if exc_info:
+            six.reraise(*exc_info)
         raise exceptions.ConnectionFailed(reason=_("Maximum attempts reached"))
 
     def delete(self, action, body=None, headers=None, params=None):
@@ -1392,8 +1730,75 @@ class Client(object):
                                   headers=headers, params=params)
 
     def get(self, action, body=None, headers=None, params=None):
-        return self.retry_request("GET", action, body=body,
-                                  headers=headers, params=params)
+        """Send a GET request, or return its cached response.
+
+        The response comes from response_cache when it keeps the
+        collection of action.
+        """
+        if body:
+            return self.retry_request("GET", action, body=body,
+                                      headers=headers, params=params)
+        query = ''
+        if isinstance(params, dict) and params:
+            query = urllib.urlencode(utils.safe_encode_dict(params), doseq=1)
+        key = (self.format, action, query)
+        cache = self.response_cache
+        collection = cache is not None and self.collection(action)
+        if not collection or not cache.caches(collection):
+            return self._get(key, action, headers, params)
+        response = cache.get(collection, key)
+        if response is not None:
+            return response
+        generation = cache.generation(collection)
+        response = self._get(key, action, headers, params)
+        cache.put(collection, key, response, generation)
+        return response
+
+    def _get(self, key, action, headers, params):
+        """Send a GET request, or wait for an identical one in progress.
+
+        With coalesce_gets, threads asking for the same URL at the same
+        time share a single request, and each gets its own copy of the
+        result.
+        """
+        if not self.coalesce_gets:
+            return self.retry_request("GET", action, headers=headers,
+                                      params=params)
+        with self._inflight_lock:
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                inflight[1] += 1
+            else:
+                self._inflight[key] = [threadpool.Future(), 0]
+        if inflight is not None:
+            result = inflight[0].result()
+            if result is _GET_ABORTED:
+                # The request was interrupted, send it again
+                return self._get(key, action, headers, params)
+            return copy.deepcopy(result)
+        try:
+            result = self.retry_request("GET", action, headers=headers,
+                                        params=params)
+        except Exception:
+            exc_info = sys.exc_info()
+            self._finish_get(key)[0].set_exc_info(exc_info)
+            six.reraise(*exc_info)
+        except BaseException:
+            # The caller was killed or interrupted, which the waiters
+            # should not be
+            self._finish_get(key)[0].set_result(_GET_ABORTED)
+            raise
+        future, waiters = self._finish_get(key)
+        future.set_result(result)
+        if waiters:
+            # The waiters copy the result while the caller may change it
+            result = copy.deepcopy(result)
+        return result
+
+    def _finish_get(self, key):
+        # Later requests for the URL are sent again
+        with self._inflight_lock:
+            return self._inflight.pop(key)
 
     def post(self, action, body=None, headers=None, params=None):
         # Do not retry POST requests to avoid the orphan objects problem.
@@ -1413,14 +1818,166 @@ class Client(object):
         else:
             return self._pagination(collection, path, **params)
 
+    def bulk_create(self, collection, path, resources,
+                    chunk_size=DEFAULT_BULK_CHUNK_SIZE, workers=1):
+        """Create resources with bulk requests of chunk_size resources.
+
+        Neutron creates all the resources of a request or none of them,
+        so a failed request fails every resource of its chunk. Returns
+        one BulkResult per resource, in the order of resources.
+        """
+        resources = list(resources)
+        chunks = [resources[i:i + chunk_size]
+                  for i in range(0, len(resources), chunk_size)]
+
+        def create(chunk):
+            return self.post(path, body={collection: chunk})[collection]
+
+        results = []
+        for chunk_result in self._bulk_call(create, chunks, workers):
+            chunk = chunk_result.item
+            if chunk_result.error:
+                results.extend([BulkResult(resource, None, chunk_result.error)
+                                for resource in chunk])
+            else:
+                results.extend([BulkResult(resource, created, None)
+                                for resource, created
+                                in zip(chunk, chunk_result.result)])
+        return results
+
+    def bulk_update(self, resource_path, updates,
+                    workers=DEFAULT_BULK_WORKERS):
+        """Update resources concurrently.
+
+        :param resource_path: path of a resource, e.g. Client.port_path
+        :param updates: (id, body) pairs or a dict of bodies by id
+        Returns one BulkResult per update, whose item is its (id, body).
+        """
+        if isinstance(updates, dict):
+            updates = updates.items()
+
+        def update(id_body):
+            return self.put(resource_path % id_body[0], body=id_body[1])
+        return self._bulk_call(update, updates, workers)
+
+    def bulk_delete(self, resource_path, ids, workers=DEFAULT_BULK_WORKERS):
+        """Delete resources concurrently.
+
+        :param resource_path: path of a resource, e.g. Client.port_path
+        Returns one BulkResult per id.
+        """
+        def delete(resource_id):
+            return self.delete(resource_path % resource_id)
+        return self._bulk_call(delete, ids, workers)
+
+    def _bulk_call(self, fn, items, workers):
+        """Call fn on every item with up to workers threads.
+
+        API errors are reported in the BulkResult of their item rather
+        than raised.
+        """
+        def call(item):
+            try:
+                return BulkResult(item, fn(item), None)
+            except exceptions.NeutronClientException as e:
+                return BulkResult(item, None, e)
+        return self._map(call, items, workers)
+
+    def _map(self, fn, items, workers):
+        """Return the results of fn on every item, with up to workers threads.
+
+        The calls use the format of the calling thread.
+        """
+        items = list(items)
+        if workers <= 1 or len(items) <= 1:
+            return [fn(item) for item in items]
+        _format = self.format
+
+        def call(item):
+            with self._request_format(_format):
+                return fn(item)
+
+        pool = threadpool.ThreadPool(min(workers, len(items)))
+        try:
+            return pool.map(call, items)
+        finally:
+            pool.shutdown()
+
+    def iterate(self, collection, path, prefetch=False, **params):
+        """Iterate over the resources of a collection page by page.
+
+        Only the page being walked through is kept in memory. With
+        prefetch, the next page is requested in the background while
+        the caller works on the current one.
+        """
+        pages = self._pagination(collection, path, **params)
+        return self._iter_items(collection, pages, prefetch)
+
+    def __getattr__(self, name):
+        # iter_<resource>(prefetch=False, **params) for every paginated
+        # list_<resource> method
+        if name.startswith('iter_'):
+            collection = name[len('iter_'):]
+            list_method = _get_api_method(type(self), 'list_' + collection)
+            if (list_method is not None and
+                    'retrieve_all' in
+                    inspect.getargspec(list_method.function).args):
+                def iterate(prefetch=False, **params):
+                    pages = list_method.function(self, retrieve_all=False,
+                                                 **params)
+                    return self._iter_items(collection, pages, prefetch)
+                iterate.__name__ = name
+                return iterate
+        raise AttributeError(name)
+
+    def _iter_items(self, collection, pages, prefetch):
+        if prefetch:
+            pool = threadpool.ThreadPool(1)
+            pages = self._prefetch_pages(pages, pool)
+        try:
+            for page in pages:
+                items = page[collection]
+                # Drop the page so only its resources stay referenced
+                del page
+                for item in items:
+                    yield item
+        finally:
+            if prefetch:
+                pool.shutdown(wait=False)
+
+    def _prefetch_pages(self, pages, pool):
+        """Yield pages, fetching each next one in a worker of pool."""
+        _format = self.format
+
+        def fetch():
+            with self._request_format(_format):
+                return next(pages, None)
+
+        future = pool.submit(fetch)
+        while True:
+            page = future.result()
+            if page is None:
+                return
+            future = pool.submit(fetch)
+            yield page
+
     def _pagination(self, collection, path, **params):
         if params.get('page_reverse', False):
             linkrel = 'previous'
         else:
             linkrel = 'next'
+        try:
+            res = self.get(path, params=params)
+        except exceptions.RequestURITooLong as e:
+            split_params = self._split_filters(params, e.excess)
+            if not split_params:
+                raise
+            for res in self._split_pagination(collection, path,
+                                              split_params):
+                yield res
+            return
         next = True
         while next:
-            res = self.get(path, params=params)
             yield res
             next = False
             try:
@@ -1432,3 +1989,146 @@ class Client(object):
                         break
             except KeyError:
                 break
+            if next:
+                res = self.get(path, params=params)
+
+    def _split_filters(self, params, excess):
+        """Split the longest multi-valued filter of params.
+
+        Returns the params of requests whose URIs are each at least excess
+        characters shorter, or None if no filter can be split. Sorted
+        lists are not split, since their parts would not be in order.
+
+        This lets callers filter a list on many ids at once, such as the
+        subnets of the networks listed by net-list: the id filter is split
+        when the URI would be too long, and the parts are fetched with the
+        list workers.
+        """
+        if 'sort_key' in params or 'sort_dir' in params:
+            return None
+
+        def encoded_len(key, value):
+            return len(urllib.urlencode(utils.safe_encode_dict({key: value}),
+                                        doseq=1))
+
+        filters = [(encoded_len(key, value), key)
+                   for key, value in params.items()
+                   if (key not in self.UNSPLIT_PARAMS and
+                       isinstance(value, (list, tuple)) and len(value) > 1)]
+        if not filters:
+            return None
+        filter_len, key = max(filters)
+        max_len = filter_len - excess
+        if 'limit' in params:
+            max_len -= self.PAGINATION_URI_ALLOWANCE
+        chunks = [[]]
+        chunk_len = 0
+        for value in params[key]:
+            # Count the '&' separating the value from the next one
+            value_len = encoded_len(key, value) + 1
+            if chunks[-1] and chunk_len + value_len > max_len:
+                chunks.append([])
+                chunk_len = 0
+            chunks[-1].append(value)
+            chunk_len += value_len
+        return [dict(params, **{key: chunk}) for chunk in chunks]
+
+    def _split_pagination(self, collection, path, split_params):
+        """Yield the pages of split requests, once per resource.
+
+        With list_workers, the requests are run at the same time and a
+        single page is yielded for each of them.
+        """
+        if self.list_workers > 1:
+            def list_all(params):
+                return self.list(collection, path, **params)
+            pages = self._map(list_all, split_params, self.list_workers)
+        else:
+            pages = itertools.chain.from_iterable(
+                self._pagination(collection, path, **params)
+                for params in split_params)
+        seen = set()
+        for page in pages:
+            items = []
+            for item in page.get(collection, []):
+                item_id = item.get('id')
+                if item_id is not None:
+                    if item_id in seen:
+                        continue
+                    seen.add(item_id)
+                items.append(item)
+            page = dict(page)
+            page[collection] = items
+            yield page
+
+
+class AsyncClient(object):
+
+    """Client for the OpenStack Neutron v2.0 API returning futures.
+
+    AsyncClient has the resource methods and paths of Client. Each API
+    call is run by a pool of worker threads sharing a single Client, and
+    returns a threadpool.Future at once instead of waiting for the
+    response, so many requests can be in flight together.
+
+    :param integer workers: Maximum number of API calls run at the same
+                            time. (optional)
+
+    The other parameters are those of Client.
+
+    Example::
+
+        from neutronclient.v2_0 import client
+        neutron = client.AsyncClient(username=USER,
+                                     password=PASS,
+                                     tenant_name=TENANT_NAME,
+                                     auth_url=KEYSTONE_URL)
+
+        futures = [neutron.show_port(port_id) for port_id in port_ids]
+        ports = [f.result()['port'] for f in futures]
+        ...
+
+    """
+
+    # Generic request methods of Client which are run in the pool along
+    # with the resource methods.
+    REQUEST_METHODS = ('do_request', 'retry_request', 'get', 'post', 'put',
+                       'delete', 'list')
+
+    def __init__(self, workers=threadpool.DEFAULT_POOL_SIZE, **kwargs):
+        self.client = Client(**kwargs)
+        self.pool = threadpool.ThreadPool(workers)
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not self._is_api_method(name):
+            return attr
+
+        def submit(*args, **kwargs):
+            return self.pool.submit(attr, *args, **kwargs)
+        submit.__name__ = name
+        submit.__doc__ = attr.__doc__
+        return submit
+
+    def _is_api_method(self, name):
+        if name in self.REQUEST_METHODS:
+            return True
+        return _get_api_method(type(self.client), name) is not None
+
+    def authenticate(self):
+        """Fetch a new token in the background."""
+        return self.pool.submit(self.client.httpclient.authenticate)
+
+    def pages(self, collection, path, **params):
+        """Iterate over the pages of a collection.
+
+        Each page is followed by requesting the page it links to in the
+        background, while the caller works on the page just returned.
+        """
+        pages = self.client._pagination(collection, path, **params)
+        return self.client._prefetch_pages(pages, self.pool)
+
+    def close(self):
+        """Stop the worker threads and close idle connections."""
+        self.pool.shutdown()
+        self.client.httpclient.close_connections()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure how long the neutron CLI takes to start.
+
+Each command is run in a new interpreter, as it is from a shell. net-list
+is sent to an endpoint nobody listens on with a fake token, so that it
+fails right after the command is loaded, without waiting for a server.
+
+Usage: tools/cli_startup_benchmark.py [--runs N]
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+COMMANDS = {
+    'help': ['help'],
+    'net-list': ['--os-token', 'x', '--os-url', 'http://127.0.0.1:9',
+                 'net-list'],
+}
+
+
+def run(argv):
+    start = time.time()
+    with open(os.devnull, 'w') as devnull:
+        subprocess.call([sys.executable, '-m', 'neutronclient.shell'] + argv,
+                        stdout=devnull, stderr=devnull)
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10,
+                        help='Runs of each command, default 10')
+    args = parser.parse_args()
+    for name in sorted(COMMANDS):
+        times = sorted(run(COMMANDS[name]) for i in range(args.runs))
+        print('%-10s min %.3fs  median %.3fs  max %.3fs' %
+              (name, times[0], times[len(times) // 2], times[-1]))
+
+
+if __name__ == '__main__':
+    main()